@@ -13,4 +13,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AXIOM.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Subidas en streaming (AXIOM_STREAM_UPLOAD_PREFIX) fuera del request de Django:
+# el cuerpo se hashea y se escribe a disco según llega, sin ocupar un hilo por conexión.
+from pipeline.asgi_upload import StreamingUploadRouter  # noqa: E402 (requiere apps cargadas)
+
+application = StreamingUploadRouter(django_application)
+
+# uvicorn no sirve /static/ como runserver: en desarrollo lo hace el handler de staticfiles
+from django.conf import settings  # noqa: E402
+
+if settings.DEBUG:
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+
+    application = ASGIStaticFilesHandler(application)
@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import celeryd_init, worker_process_init, worker_process_shutdown
 
 # Seteamos las variables de entorno de Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AXIOM.settings')
@@ -10,4 +11,29 @@ app = Celery('AXIOM')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Autodescubrimiento de tareas en tus apps (como pipeline/tasks.py)
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(**kwargs):
+    # Métricas multiproceso: el hijo del prefork que muere deja de reportar gauges 'live'
+    from pipeline.metrics import mark_process_dead
+    mark_process_dead()
+
+# Workers que consumen la cola de stills: sus hijos llevan el mismo tope de memoria que rebuild_stills
+STILLS_QUEUE = 'stills'
+_stills_worker = False
+
+@celeryd_init.connect
+def detect_stills_worker(options=None, **kwargs):
+    global _stills_worker
+    queues = (options or {}).get('queues') or []
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    _stills_worker = STILLS_QUEUE in queues
+
+@worker_process_init.connect
+def limit_stills_memory(**kwargs):
+    # El hijo del prefork hereda _stills_worker del proceso principal
+    if _stills_worker:
+        from pipeline.stills import limit_memory
+        limit_memory()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from celery.schedules import crontab
+from kombu import Exchange, Queue
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -98,6 +99,7 @@ if os.environ.get('DATABASE_URL'):
     } 
     # Usamos el nombre del servicio definido en docker-compose
     CELERY_BROKER_URL = 'redis://redis:6379/0'
+    CELERY_RESULT_BACKEND = 'redis://redis:6379/0' # Necesario para los chords (transcode segmentado)
     CACHES = {
         "default": {
             "BACKEND": "django_redis.cache.RedisCache",
@@ -118,6 +120,7 @@ else:
     } 
     # Usamos localhost porque el servicio corre directo en tu máquina
     CELERY_BROKER_URL = 'redis://localhost:6379/0'
+    CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
     CACHES = {
         "default": {
             "BACKEND": "django_redis.cache.RedisCache",
@@ -189,11 +192,174 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'pipeline.tasks.run_system_diagnostic',
         'schedule': 900.0,  # Cada 15 minutos (900 segundos)
     },
+    # Scrub de integridad incremental: avanza la pasada en curso un rato cada hora
+    'integrity-scrub-hourly': {
+        'task': 'pipeline.tasks.scrub_media_task',
+        'schedule': 3600.0,
+    },
+    # Subidas por bloques abandonadas: libera su staging
+    'expire-upload-sessions-hourly': {
+        'task': 'pipeline.tasks.expire_upload_sessions_task',
+        'schedule': 3600.0,
+    },
+    # Ingestas que nunca llegaron al broker (o murieron con el worker): se re-encolan
+    'requeue-stale-ingests': {
+        'task': 'pipeline.tasks.requeue_stale_ingests_task',
+        'schedule': 900.0,
+    },
+}
+
+# --- COLAS DE CELERY (Aislamiento de cargas) ---
+# Cada cola tiene sus propios workers (ver start_axiom.sh / docker-compose.yml):
+#   ingest       -> hash + ffprobe (IO-bound)      -c 8 --prefetch-multiplier 4 --time-limit 2100
+#   transcode    -> ffmpeg largo (CPU-bound)       -c 2 --prefetch-multiplier 1 --time-limit 10800
+#   stills       -> thumbnails/posters (cortos)    -c 4 --prefetch-multiplier 4 --time-limit 360
+#   housekeeping -> diagnóstico, limpieza, beat    -c 1 --prefetch-multiplier 1 --time-limit 900
+#   scrub        -> scrub de integridad periódico  -c 1 --prefetch-multiplier 1 --time-limit 900
+# Así un encode de dos horas nunca bloquea un thumbnail, y el scrub (hasta 14 min por
+# ejecución) nunca ocupa el único slot de housekeeping ni retrasa el heartbeat de 15 min.
+CELERY_TASK_QUEUES = tuple(
+    Queue(name, Exchange(name), routing_key=name)
+    for name in ('ingest', 'transcode', 'stills', 'housekeeping', 'scrub')
+)
+CELERY_TASK_DEFAULT_QUEUE = 'housekeeping'
+
+CELERY_TASK_ROUTES = {
+    'pipeline.tasks.ingest_version_task': {'queue': 'ingest'},
+    # Footage por defecto; los stills se encolan explícitamente en 'stills'
+    'pipeline.tasks.process_version_task': {'queue': 'transcode'},
+    'pipeline.tasks.transcode_segment_task': {'queue': 'transcode'},
+    'pipeline.tasks.concat_segments_task': {'queue': 'transcode'},
+    'pipeline.tasks.segmented_transcode_failed': {'queue': 'housekeeping'},
+    'pipeline.tasks.run_system_diagnostic': {'queue': 'housekeeping'},
+    'pipeline.tasks.recompute_project_qc_task': {'queue': 'housekeeping'},
+    'pipeline.tasks.scrub_media_task': {'queue': 'scrub'},
+    'pipeline.tasks.expire_upload_sessions_task': {'queue': 'housekeeping'},
+    'pipeline.tasks.requeue_stale_ingests_task': {'queue': 'housekeeping'},
 }
 
+# Tareas largas: se confirman al terminar (si un worker muere, la tarea se reintenta)
+# y cada worker solo reserva lo que indica su --prefetch-multiplier.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Con acks_late, Redis re-entrega lo no confirmado tras visibility_timeout:
+# debe superar el encode más largo para no duplicar trabajos.
+CELERY_BROKER_TRANSPORT_OPTIONS = {'visibility_timeout': 4 * 3600}
+
+# Límites por tarea (los workers de cada cola añaden su propio --time-limit)
+CELERY_TASK_ANNOTATIONS = {
+    'pipeline.tasks.ingest_version_task': {'soft_time_limit': 1800, 'time_limit': 2100},
+    'pipeline.tasks.process_version_task': {'soft_time_limit': 3 * 3600, 'time_limit': 3 * 3600 + 300},
+    'pipeline.tasks.transcode_segment_task': {'soft_time_limit': 1800, 'time_limit': 2100},
+    'pipeline.tasks.run_system_diagnostic': {'soft_time_limit': 300, 'time_limit': 600},
+    'pipeline.tasks.scrub_media_task': {'soft_time_limit': 840, 'time_limit': 900},
+}
+# process_version_task encolada en 'stills' lleva sus propios límites (cortos)
+AXIOM_STILLS_TIME_LIMITS = {'soft_time_limit': 300, 'time_limit': 360}
+
 # Ruta física en tu disco donde se guardarán los assets
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Upload handlers de AXIOM: calculan el SHA-256 mientras el archivo se recibe,
+# así cada byte de una entrega se lee una sola vez.
+FILE_UPLOAD_HANDLERS = [
+    'pipeline.upload_handlers.HashingMemoryFileUploadHandler',
+    'pipeline.upload_handlers.HashingTemporaryFileUploadHandler',
+]
+
+# Ingesta asíncrona: la subida responde 202 y el hash/ffprobe corren en Celery
+AXIOM_ASYNC_INGEST = os.environ.get('AXIOM_ASYNC_INGEST', '1') == '1'
+AXIOM_INGEST_REQUEUE_SECONDS = 3600     # INGESTING sin cambios tanto tiempo = encolado perdido (> --time-limit de ingest)
+AXIOM_INGEST_REQUEUE_MAX = 3            # Re-encolados antes de cerrar la ingesta en ERROR
+# 1 = la ingesta relee el original y lo compara con el hash de la subida (auditorías); 0 = se confía en él
+AXIOM_INGEST_FORCE_VERIFY = os.environ.get('AXIOM_INGEST_FORCE_VERIFY', '0') == '1'
+
+# Almacén direccionado por contenido: los originales se guardan una vez en
+# MEDIA_ROOT/cas/ab/cd/<sha256> y la ruta del proyecto es un hard link (o reflink)
+AXIOM_CAS_ENABLED = os.environ.get('AXIOM_CAS_ENABLED', '1') == '1'
+
+# Caché de digests SHA-256: entradas por proceso (la tabla FileDigest es la caché compartida)
+AXIOM_DIGEST_CACHE_SIZE = 4096
+
+# Motor de hashing: manifiesto por bloques de este tamaño, hasheados en paralelo
+AXIOM_HASH_CHUNK_SIZE = 64 * 1024 * 1024
+AXIOM_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+# Renditions extra del footage (mismo decode que el proxy 720p).
+# Ej: [{'name': '1080p', 'height': 1080, 'crf': 20}]
+AXIOM_EXTRA_RENDITIONS = []
+
+# Límites de la escalera HLS de cada proyecto (Project.proxy_ladder)
+AXIOM_HLS_MAX_RUNGS = 6
+AXIOM_HLS_MIN_HEIGHT = 144
+AXIOM_HLS_MAX_HEIGHT = 4320      # 8K
+
+# Transcodificación segmentada: footage a partir de esta duración (s) se corta en
+# segmentos que se encodean en paralelo en varios workers y luego se concatenan.
+# Cada segmento produce también las AXIOM_EXTRA_RENDITIONS y los peldaños HLS del proyecto
+# (la escalera se empaqueta con remux, sin segundo decode del original).
+AXIOM_SEGMENTED_TRANSCODE_MIN_DURATION = 600.0
+AXIOM_SEGMENT_DURATION = 60
+
+# Subidas por bloques (publish_tool / API resumible)
+AXIOM_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024       # Tamaño por defecto de cada bloque
+AXIOM_UPLOAD_MIN_CHUNK_SIZE = 1 * 1024 * 1024
+AXIOM_UPLOAD_MAX_CHUNK_SIZE = 512 * 1024 * 1024
+AXIOM_UPLOAD_SESSION_TTL_HOURS = 48             # Sesión OPEN sin bloques nuevos durante este tiempo = abandonada
+
+# Publicación por lotes: archivos pre-subidos (rsync/NFS) que se referencian por ruta.
+# Debe estar en el mismo volumen que MEDIA_ROOT para que publicar sea un rename.
+AXIOM_STAGING_ROOT = os.environ.get('AXIOM_STAGING_ROOT', os.path.join(MEDIA_ROOT, 'staging'))
+AXIOM_BATCH_MAX_ITEMS = 1000
+
+# Drop folders de proveedores (manage.py watch_dropfolders). Cada regla: carpeta raíz
+# (mismo volumen que MEDIA_ROOT: publicar es un rename), regex sobre la ruta relativa con
+# grupos project / asset / department, valores fijos para lo que no capture, y usuario.
+# Ej: [{'path': '/mnt/vendors/acme', 'user': 'acme',
+#       'pattern': r'^(?P<project>[^/]+)/(?P<department>[A-Z]+)/(?P<asset>[^/.]+)'}]
+AXIOM_DROPFOLDERS = []
+AXIOM_DROPFOLDER_SETTLE_SECONDS = 30    # Sin crecer durante este tiempo = entrega completa
+AXIOM_DROPFOLDER_POLL_SECONDS = 60      # Escaneo completo (incremental) aunque haya inotify
+AXIOM_DROPFOLDER_IGNORE = ('.*', '*.part', '*.tmp', '*.crdownload', '*~')
+AXIOM_DROPFOLDER_RETRY_SECONDS = 300    # Primer reintento de rechazados / sin destino (se duplica en cada intento)
+AXIOM_DROPFOLDER_RETRY_MAX_SECONDS = 6 * 3600
+
+# Scrub de integridad de originales (manage.py scrub_media / scrub_media_task)
+AXIOM_SCRUB_WORKERS = 2
+AXIOM_SCRUB_MAX_MBPS = 200          # Tope global de lectura (MB/s); 0 = sin límite
+AXIOM_SCRUB_INTERVAL_DAYS = 30      # Un original verificado hace menos no entra en la pasada
+AXIOM_SCRUB_BATCH = 200             # Versiones por consulta a la cola (el avance se guarda por archivo)
+AXIOM_SCRUB_TASK_BUDGET = 600       # Segundos por ejecución periódica (la pasada se reanuda en la siguiente)
+
+# Motor de stills (thumbnails de JPEG/TIFF/PSD sin decodificar el raster completo)
+AXIOM_STILLS_MAX_DECODE_BYTES = 1024 ** 3           # Tope de una decodificación completa (formatos sin ruta acotada)
+AXIOM_STILLS_WORKERS = 4                            # Procesos de manage.py rebuild_stills
+AXIOM_STILLS_MEMORY_LIMIT = 3 * 1024 ** 3           # RLIMIT_AS por proceso (pool de rebuild_stills y worker de stills); 0 = sin límite
+
+# Secuencias de imágenes (publish/sequence/): frames pre-subidos a AXIOM_STAGING_ROOT
+AXIOM_SEQUENCE_MAX_FRAMES = 100000
+AXIOM_SEQUENCE_SHORT_FRAME_RATIO = 0.5   # Candidato a frame "cortado" (se verifica su estructura): menos de esta fracción del tamaño mediano
+
+# Sprite sheets de scrub (mismo decode que el proxy)
+AXIOM_SPRITE_FRAMES = 100        # Tiles como máximo (frames equiespaciados)
+AXIOM_SPRITE_COLUMNS = 10
+AXIOM_SPRITE_TILE_WIDTH = 160    # px; el alto sigue el aspecto del original
+AXIOM_SPRITE_FORMAT = 'jpg'      # 'jpg' o 'webp'
+
+# Telemetría del dashboard (foto compartida + stream SSE en dashboard/stream/)
+AXIOM_TELEMETRY_INTERVAL = 5            # Segundos: la foto se recalcula como mucho una vez por intervalo
+AXIOM_TELEMETRY_STREAM_SECONDS = 300    # Cada conexión SSE (ASGI) se recicla (EventSource reconecta solo)
+
+# /metrics (Prometheus): solo con 'Authorization: Bearer <token>' o desde estas IPs / redes
+AXIOM_METRICS_TOKEN = os.environ.get('AXIOM_METRICS_TOKEN', '')
+AXIOM_METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('AXIOM_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+
+# Subida en streaming (solo bajo ASGI: AXIOM/asgi.py). El cuerpo crudo se escribe y hashea por bloques
+AXIOM_STREAM_UPLOAD_PREFIX = '/api/stream/'
+AXIOM_STREAM_UPLOAD_BUFFER = 1024 * 1024                # Memoria máxima por subida en curso
+AXIOM_STREAM_UPLOAD_MAX_BYTES = 2 * 1024 ** 4           # 2 TiB
+
 #CACHES = {
 #    "default": {
 #        "BACKEND": "django_redis.cache.RedisCache",
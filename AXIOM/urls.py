@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.authtoken import views 
+from pipeline.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -14,6 +15,9 @@ urlpatterns = [
     # Esto genera el token para que los scripts externos se conecten
     path('api-token-auth/', views.obtain_auth_token),
     path('pipeline/', include('pipeline.urls')),
+
+    # Scrape de Prometheus (web + workers de Celery)
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Esto permite que AXIOM sirva los videos en modo desarrollo (muy importante para VFX)
@@ -1,8 +1,11 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db.models import Q
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from .models import Profile, Project, Asset, Version, Comment, SystemHealth
+from .models import Profile, Project, Asset, Version, Comment, SystemHealth, ContentBlob, DropFolderEntry
+from .qc import annotate_qc, annotated_qc_codes, evaluate_qc, qc_messages
 
 # ==========================================
 # --- 1. JERARQUÍA ---
@@ -24,6 +27,8 @@ def get_app_list(self, request, app_label=None):
                 "Profile": 5,
                 #"License": 6,
                 "SystemHealth": 7,
+                "ContentBlob": 8,
+                "DropFolderEntry": 9,
             }
             app['models'].sort(key=lambda x: ordering.get(x['object_name'], 99))
     return app_list
@@ -53,7 +58,7 @@ class ProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
-    list_display = ('title', 'owner', 'target_fps', 'get_target_res', 'created_at')
+    list_display = ('title', 'owner', 'target_fps', 'get_target_res', 'proxy_ladder', 'created_at')
     search_fields = ('title', 'owner__username')
     
     @admin.display(description='Target Resolution')
@@ -83,14 +88,16 @@ class VersionAdmin(admin.ModelAdmin):
         'colored_status' # Usamos la versión con colores
     )
     
-    list_filter = ('department', 'approval_status', 'asset__project', 'transcoding_status')
+    list_filter = ('department', 'approval_status', 'qc_passed', 'asset__project', 'transcoding_status')
+    # Asset + Proyecto en la misma consulta del listado (get_project, __str__ del asset, QC)
+    list_select_related = ('asset__project',)
     search_fields = ('asset__name', 'uuid', 'version_number')
     
     # Integramos los comentarios en la vista de la Versión
     inlines = [CommentInline]
 
     # --- ACCIONES MASIVAS PARA SUPERVISORES ---
-    actions = ['approve_versions', 'reject_versions', 'mark_as_cbb']
+    actions = ['approve_versions', 'reject_versions', 'mark_as_cbb', 'regenerate_thumbnails']
 
     fieldsets = (
         ('Ingesta de Archivo', {
@@ -105,26 +112,33 @@ class VersionAdmin(admin.ModelAdmin):
             'description': 'Control de estatus artístico y técnico basado en estándares de la industria.'
         }),
         ('Control de Calidad (QC)', {
-            'fields': ('transcoding_status', 'display_proxy', 'display_thumb')
+            'fields': ('transcoding_status', 'qc_passed', 'qc_errors', 'display_proxy', 'display_hls', 'display_thumb', 'display_sprite')
         }),
         ('Metadatos Técnicos (Inmutables)', {
             'classes': ('collapse',), 
             'fields': (
                 'uuid', 'fps', 'resolution_width', 'resolution_height', 
                 'display_human_duration', 'filesize', 'color_space', 
-                'timecode_start', 'extra_metadata'
+                'timecode_start', 'frame_start', 'frame_end', 'frames_missing', 'frames_short',
+                'extra_metadata'
             )
         }),
     )
 
     readonly_fields = (
-        'uuid', 'version_number', 'created_at', 'display_thumb', 
-        'display_proxy', 'transcoding_status', 'fps', 'resolution_width', 
+        'uuid', 'version_number', 'created_at', 'display_thumb', 'display_sprite',
+        'display_proxy', 'display_hls', 'transcoding_status', 'fps', 'resolution_width', 
         'resolution_height', 'display_human_duration', 'filesize', 
-        'color_space', 'timecode_start', 'reviewed_by', 'reviewed_at'
+        'color_space', 'timecode_start', 'reviewed_by', 'reviewed_at',
+        'qc_passed', 'qc_errors', 'frame_start', 'frame_end', 'frames_missing', 'frames_short'
     )
     
-    exclude = ('proxy_file_path', 'duration', 'thumbnail')
+    exclude = ('proxy_file_path', 'hls_playlist_path', 'duration', 'thumbnail', 'sprite_sheet', 'sprite_index')
+
+    def get_queryset(self, request):
+        # QC calculado en SQL: el listado no lanza consultas por fila sin importar el tamaño de página
+        # (el JOIN con asset/proyecto lo pone list_select_related)
+        return annotate_qc(super().get_queryset(request))
 
     def get_readonly_fields(self, request, obj=None):
         # 1. Verificamos si el usuario tiene el rol de 'Supervisor' en su perfil
@@ -147,7 +161,8 @@ class VersionAdmin(admin.ModelAdmin):
         queryset.update(
             approval_status=Version.ApprovalStatus.APPROVED,
             reviewed_by=request.user,
-            reviewed_at=timezone.now()
+            reviewed_at=timezone.now(),
+            updated_at=timezone.now()
         )
         self.message_user(request, "Las versiones han sido marcadas como APROBADAS.")
 
@@ -156,7 +171,8 @@ class VersionAdmin(admin.ModelAdmin):
         queryset.update(
             approval_status=Version.ApprovalStatus.REJECTED,
             reviewed_by=request.user,
-            reviewed_at=timezone.now()
+            reviewed_at=timezone.now(),
+            updated_at=timezone.now()
         )
         self.message_user(request, "Las versiones han sido RECHAZADAS.")
 
@@ -165,10 +181,32 @@ class VersionAdmin(admin.ModelAdmin):
         queryset.update(
             approval_status=Version.ApprovalStatus.CBB,
             reviewed_by=request.user,
-            reviewed_at=timezone.now()
+            reviewed_at=timezone.now(),
+            updated_at=timezone.now()
         )
         self.message_user(request, "Las versiones han sido marcadas como CBB.")
 
+    @admin.action(description="🖼️ Regenerar thumbnails (solo poster frame)")
+    def regenerate_thumbnails(self, request, queryset):
+        from .tasks import process_version_task
+        # Solo footage, stills y secuencias tienen poster: el resto (código, 3D, docs) se omite
+        media = queryset.filter(
+            Q(asset__category__in=[Asset.AssetCategory.VIDEO, Asset.AssetCategory.IMAGE]) |
+            Q(frame_start__isnull=False)
+        )
+        version_ids = list(media.values_list('pk', flat=True))
+        for version_id in version_ids:
+            # Trabajo corto (seek de entrada): va a la cola de stills, no a la de transcode
+            process_version_task.apply_async(
+                args=[version_id], kwargs={'thumbnail_only': True},
+                queue='stills', **settings.AXIOM_STILLS_TIME_LIMITS
+            )
+        skipped = queryset.count() - len(version_ids)
+        message = f"Regeneración de {len(version_ids)} thumbnails enviada a la cola."
+        if skipped:
+            message += f" {skipped} omitidas: no son video, still ni secuencia."
+        self.message_user(request, message, level=messages.WARNING if skipped else messages.INFO)
+
     # --- MÉTODOS DE VISUALIZACIÓN ---
     @admin.display(description='Status')
     def colored_status(self, obj):
@@ -203,6 +241,8 @@ class VersionAdmin(admin.ModelAdmin):
         if obj.fps or obj.resolution_width:
             size_mb = f"{obj.filesize / (1024*1024):.2f} MB" if obj.filesize else "---"
             dur_str = self.display_human_duration(obj)
+            if obj.is_sequence:
+                dur_str = f"{dur_str} | frames {obj.frame_start}-{obj.frame_end}"
             return format_html(
                 "{} fps | {}x{}<br><small style='color: #888;'>{} | {} | {}</small>",
                 obj.fps or "--", obj.resolution_width or "--", obj.resolution_height or "--", 
@@ -212,7 +252,12 @@ class VersionAdmin(admin.ModelAdmin):
 
     @admin.display(description='QC Status')
     def qc_status(self, obj):
-        errors = obj.check_qc()
+        # QC materializado; las anotaciones SQL cubren las versiones aún sin evaluar
+        if obj.qc_passed is not None:
+            codes = obj.qc_errors
+        else:
+            codes = annotated_qc_codes(obj) if hasattr(obj, 'qc_ok') else evaluate_qc(obj)
+        errors = qc_messages(obj, codes)
         if errors:
             error_string = ", ".join([str(error) for error in errors])
             return format_html('<span style="color: #d9534f; font-weight: bold; cursor: help;" title="{}">⚠️ FAIL</span>', error_string)
@@ -241,6 +286,35 @@ class VersionAdmin(admin.ModelAdmin):
         
         return "No generado"
 
+    @admin.display(description='HLS (Adaptive)')
+    def display_hls(self, obj):
+        if obj.hls_playlist_path:
+            return format_html(
+                '<a href="{}" target="_blank" style="font-weight: bold; color: #ffaa00;">📶 Master Playlist (HLS)</a>',
+                obj.hls_playlist_path.url
+            )
+        return "No generado"
+
+    @admin.display(description='Scrub (Sprite)')
+    def display_sprite(self, obj):
+        grid = obj.extra_metadata.get('sprite')
+        if not obj.sprite_sheet or not grid:
+            return "No generado"
+        # Scrub sin cargar video: el cursor elige el tile y se desplaza el fondo del sprite
+        scrub = (
+            "var g=this.dataset,r=this.getBoundingClientRect(),"
+            "t=Math.min(g.tiles-1,Math.floor((event.clientX-r.left)/r.width*g.tiles));"
+            "this.style.backgroundPosition=(-(t%g.columns)*g.tw)+'px '+(-Math.floor(t/g.columns)*g.th)+'px';"
+            "this.title='Frame '+(+g.first+t*g.interval);"
+        )
+        return format_html(
+            '<div data-tiles="{}" data-columns="{}" data-tw="{}" data-th="{}" data-interval="{}" data-first="{}" '
+            'onmousemove="{}" style="width: {}px; height: {}px; background: url(\'{}\') 0 0 no-repeat; '
+            'border-radius: 5px; border: 1px solid #444; cursor: col-resize;"></div>',
+            grid['tiles'], grid['columns'], grid['tile_width'], grid['tile_height'], grid['interval'],
+            grid['first_frame'], scrub, grid['tile_width'], grid['tile_height'], obj.sprite_sheet.url,
+        )
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'version', 'type', 'frame_number', 'priority', 'is_resolved', 'created_at')
@@ -250,4 +324,20 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(SystemHealth)
 class SystemHealthAdmin(admin.ModelAdmin):
     list_display = ('last_diagnostic', 'storage_score', 'database_score', 'ffmpeg_score', 'integrity_score')
-    readonly_fields = ('storage_score', 'database_score', 'ffmpeg_score', 'integrity_score', 'last_diagnostic')
\ No newline at end of file
+    readonly_fields = ('storage_score', 'database_score', 'ffmpeg_score', 'integrity_score', 'last_diagnostic')
+
+@admin.register(ContentBlob)
+class ContentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'link_method', 'created_at', 'last_verified_at')
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'size', 'path', 'link_method', 'created_at', 'last_verified_at')
+
+@admin.register(DropFolderEntry)
+class DropFolderEntryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'directory', 'status', 'size', 'version', 'changed_at', 'attempts', 'retry_at')
+    list_filter = ('status',)
+    search_fields = ('name', 'directory')
+    list_select_related = ('version__asset',)
+    readonly_fields = (
+        'directory', 'name', 'size', 'mtime_ns', 'version', 'error', 'first_seen_at', 'changed_at', 'attempts', 'retry_at'
+    )
@@ -0,0 +1,272 @@
+# Subida en streaming de AXIOM (ASGI puro, montada en AXIOM/asgi.py por prefijo de ruta).
+# Una conexión lenta (artista por VPN) no ocupa un hilo: el cuerpo se lee con await,
+# se acumula en un buffer acotado y cada bloque se escribe y hashea en un hilo
+# (asyncio.to_thread). Mientras ese bloque se escribe no se leen más bytes, así que
+# la memoria por subida nunca pasa de AXIOM_STREAM_UPLOAD_BUFFER (backpressure TCP).
+# Solo el INSERT final toca el ORM (sync_to_async).
+#
+#   PUT /api/stream/projects/<id>/upload/?asset_name=sh010&department=COMP&filename=plate.mov[&sha256=...]
+#   Authorization: Token <key>
+#   <bytes del archivo>
+
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http.request import split_domain_port, validate_host
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .divergence_engine import PipelineStabilityIndex
+from .hashing import ChunkedHasher
+from .metrics import observe_upload
+from .models import Asset, Project, Version, get_version_path
+from .publishing import get_category_from_extension
+
+logger = logging.getLogger(__name__)
+
+ROUTE = re.compile(r'^projects/(?P<project_id>\d+)/upload/?$')
+
+engine = PipelineStabilityIndex()
+
+class UploadRejected(Exception):
+    """Error con su código HTTP (se responde tal cual al cliente)."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- 1. ORM (solo en los extremos de la subida) ---
+
+def _authenticate(key):
+    token = Token.objects.select_related('user').filter(key=key).first()
+    if token is None or not token.user.is_active:
+        raise UploadRejected(401, "Token inválido.")
+    return token.user
+
+def _get_project(project_id):
+    project = Project.objects.filter(pk=project_id).first()
+    if project is None:
+        raise UploadRejected(404, "El proyecto no existe.")
+    return project
+
+def _register_version(project, user, params, staging_path, digest, size, manifest):
+    """
+    Mismo registro que UploadSessionCompleteView: valida SSOT, mueve el staging a su
+    ruta definitiva (rename, sin copia) y guarda la Versión. El hash ya viene calculado.
+    Si el INSERT falla el rename se deshace (y el asset creado se revierte con la transacción).
+    """
+    from .views import initial_transcoding_status, restore_staging
+
+    final_path = None
+    try:
+        with transaction.atomic():
+            asset, _ = Asset.objects.get_or_create(
+                name=params['asset_name'],
+                project=project,
+                defaults={'category': get_category_from_extension(params['filename'])}
+            )
+            version = Version(
+                asset=asset,
+                department=params['department'],
+                uploaded_by=user,
+                checksum_sha256=digest,
+                filesize=size,
+                transcoding_status=initial_transcoding_status()
+            )
+            version.extra_metadata['chunk_manifest'] = manifest
+            version.assign_version_number()
+            relative_path = default_storage.get_available_name(get_version_path(version, params['filename']))
+            version.file.name = relative_path
+
+            # El hash salió del streaming: los duplicados SSOT se rechazan ya, aunque la ingesta sea asíncrona
+            version.verify_integrity(digest)
+            version.full_clean()
+
+            # La ingesta síncrona lee el archivo dentro del save(): primero el rename
+            final_path = default_storage.path(relative_path)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(staging_path, final_path)
+            version.save()
+    except ValidationError as e:
+        restore_staging(final_path, staging_path)
+        engine.report_status('integrity', success=False)
+        raise UploadRejected(400, str(e))
+    except IntegrityError as e:
+        # Carrera (número de versión / checksum): el cliente puede reintentar
+        restore_staging(final_path, staging_path)
+        raise UploadRejected(409, f"Conflicto al registrar la versión, reintenta: {e}")
+    except Exception:
+        restore_staging(final_path, staging_path)
+        raise
+
+    engine.report_status('storage', success=True)
+    observe_upload('stream', size)
+    return version
+
+# --- 2. Cuerpo de la petición ---
+
+def _write_block(fp, hasher, block):
+    """Corre en un hilo: disco y SHA-256 (hashlib suelta el GIL) fuera del event loop."""
+    fp.write(block)
+    hasher.update(block)
+
+def _open_staging():
+    directory = os.path.join(settings.AXIOM_STAGING_ROOT, '.stream')
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.part")
+    return path, open(path, 'wb')
+
+async def _receive_body(receive, fp, hasher, max_bytes):
+    """Vuelca el cuerpo al archivo de staging por bloques de AXIOM_STREAM_UPLOAD_BUFFER."""
+    buffer_size = settings.AXIOM_STREAM_UPLOAD_BUFFER
+    buffer = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise UploadRejected(499, "El cliente cerró la conexión.")
+        buffer += message.get('body', b'')
+        if hasher.size + len(buffer) > max_bytes:
+            raise UploadRejected(413, "El archivo supera AXIOM_STREAM_UPLOAD_MAX_BYTES.")
+        more = message.get('more_body', False)
+        if len(buffer) >= buffer_size or (buffer and not more):
+            block, buffer = bytes(buffer), bytearray()
+            await asyncio.to_thread(_write_block, fp, hasher, block)
+        if not more:
+            return
+
+# --- 3. Aplicación ASGI ---
+
+def _parse_params(scope):
+    query = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    params = {
+        'asset_name': query.get('asset_name'),
+        'department': query.get('department', Version.Department.GENERIC),
+        'filename': os.path.basename(query.get('filename', '')),
+        'sha256': (query.get('sha256') or '').lower() or None,
+    }
+    if not params['asset_name'] or not params['filename']:
+        raise UploadRejected(400, "Faltan datos críticos: 'asset_name' o 'filename'")
+    if params['department'] not in Version.Department.values:
+        raise UploadRejected(400, f"Departamento desconocido: {params['department']}")
+    return params
+
+def _token(headers):
+    scheme, _, key = headers.get(b'authorization', b'').decode().partition(' ')
+    if scheme.lower() != 'token' or not key:
+        raise UploadRejected(401, "Se requiere 'Authorization: Token <key>'.")
+    return key.strip()
+
+def _host(headers):
+    """Host de la petición validado contra ALLOWED_HOSTS (mismas reglas que HttpRequest.get_host)."""
+    host = headers.get(b'host', b'').decode('latin-1')
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    domain, _ = split_domain_port(host)
+    if not domain or not validate_host(domain, allowed_hosts):
+        raise UploadRejected(400, f"Host no permitido: {host!r}")
+    return host
+
+def _status_url(scope, host, version):
+    path = reverse('version-status', kwargs={'pk': version.pk})
+    return f"{scope.get('scheme', 'http')}://{host}{path}"
+
+async def _respond(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def handle_upload(scope, receive, send, path):
+    """Una subida completa: auth -> streaming a staging -> INSERT. Siempre responde JSON."""
+    if scope['method'] not in ('PUT', 'POST'):
+        return await _respond(send, 405, {"error": "Usa PUT (o POST) con el archivo como cuerpo."})
+    route = ROUTE.match(path)
+    if route is None:
+        return await _respond(send, 404, {"error": "Ruta desconocida."})
+
+    headers = dict(scope.get('headers', []))
+    staging_path = fp = None
+    try:
+        host = _host(headers)
+        params = _parse_params(scope)
+        declared_size = headers.get(b'content-length', b'0')
+        max_bytes = settings.AXIOM_STREAM_UPLOAD_MAX_BYTES
+        if not declared_size.isdigit():
+            raise UploadRejected(400, "Content-Length inválido.")
+        if int(declared_size) > max_bytes:
+            raise UploadRejected(413, "El archivo supera AXIOM_STREAM_UPLOAD_MAX_BYTES.")
+
+        # Auth y proyecto antes de aceptar un solo byte
+        user = await sync_to_async(_authenticate)(_token(headers))
+        project = await sync_to_async(_get_project)(int(route['project_id']))
+
+        staging_path, fp = await asyncio.to_thread(_open_staging)
+        hasher = ChunkedHasher()
+        await _receive_body(receive, fp, hasher, max_bytes)
+        await asyncio.to_thread(fp.close)
+
+        digest = hasher.hexdigest()
+        if params['sha256'] and params['sha256'] != digest:
+            engine.report_status('integrity', success=False)
+            raise UploadRejected(400, "El hash del archivo no coincide con el declarado.")
+
+        version = await sync_to_async(_register_version)(
+            project, user, params, staging_path, digest, hasher.size, hasher.manifest()
+        )
+    except UploadRejected as e:
+        if e.status != 499:
+            await _respond(send, e.status, {"error": str(e)})
+        return
+    except Exception:
+        # El detalle (rutas, SQL...) queda en el log; el cliente recibe un mensaje genérico
+        logger.exception("📥 Subida en streaming fallida")
+        await _respond(send, 500, {"error": "Error interno al registrar la subida."})
+        return
+    finally:
+        # Si la Versión no llegó a registrarse, el staging se descarta
+        if fp is not None and not fp.closed:
+            fp.close()
+        if staging_path and os.path.exists(staging_path):
+            os.remove(staging_path)
+
+    payload = {
+        "id": version.pk,
+        "version_number": version.version_number,
+        "checksum_sha256": digest,
+        "filesize": version.filesize,
+        "transcoding_status": version.transcoding_status,
+        "status_url": _status_url(scope, host, version),
+    }
+    if version.transcoding_status == Version.TranscodingStatus.INGESTING:
+        return await _respond(send, 202, payload)
+    payload["message"] = f"Ingreso exitoso en {params['department']}. Hash verificado."
+    await _respond(send, 201, payload)
+
+class StreamingUploadRouter:
+    """
+    Envuelve la app ASGI de Django: las rutas bajo AXIOM_STREAM_UPLOAD_PREFIX van a
+    handle_upload (cuerpo en streaming); el resto sigue su camino normal.
+    """
+
+    def __init__(self, django_app, prefix=None):
+        self.django_app = django_app
+        self.prefix = prefix or settings.AXIOM_STREAM_UPLOAD_PREFIX
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'].startswith(self.prefix):
+            return await handle_upload(scope, receive, send, scope['path'][len(self.prefix):])
+        return await self.django_app(scope, receive, send)
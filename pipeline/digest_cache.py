@@ -0,0 +1,77 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Caché L1 (por proceso). La L2 es la tabla FileDigest, compartida por web y workers.
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+def _signed64(value):
+    """st_ino/st_dev son unsigned de 64 bits (NFS); la columna BIGINT es con signo."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+def file_key(file_path):
+    """Identidad física del archivo: (device, inode, size, mtime_ns). Cuesta un stat()."""
+    st = os.stat(file_path)
+    return (_signed64(st.st_dev), _signed64(st.st_ino), st.st_size, st.st_mtime_ns)
+
+def _lru_get(key):
+    with _lru_lock:
+        digest = _lru.get(key)
+        if digest is not None:
+            _lru.move_to_end(key)
+        return digest
+
+def _lru_put(key, digest):
+    with _lru_lock:
+        _lru[key] = digest
+        _lru.move_to_end(key)
+        while len(_lru) > settings.AXIOM_DIGEST_CACHE_SIZE:
+            _lru.popitem(last=False)
+
+def lookup_digest(key):
+    """Digest memorizado para esta identidad física, o None si el archivo cambió / nunca se vio."""
+    digest = _lru_get(key)
+    if digest is not None:
+        return digest
+
+    from .models import FileDigest
+    device, inode, size, mtime_ns = key
+    try:
+        # Savepoint: un fallo aquí no debe dejar rota la transacción de quien llama (ingesta, lote)
+        with transaction.atomic():
+            digest = FileDigest.objects.filter(
+                device=device, inode=inode, size=size, mtime_ns=mtime_ns
+            ).values_list('sha256', flat=True).first()
+    except DatabaseError:
+        logger.warning("Digest cache: tabla no disponible, se usa solo la caché en memoria.")
+        return None
+
+    if digest is not None:
+        _lru_put(key, digest)
+    return digest
+
+def remember_digest(key, digest, file_path=''):
+    """Registra el digest; un inodo solo tiene una entrada vigente (la anterior queda obsoleta)."""
+    _lru_put(key, digest)
+
+    from .models import FileDigest
+    device, inode, size, mtime_ns = key
+    try:
+        with transaction.atomic():
+            FileDigest.objects.update_or_create(
+                device=device, inode=inode,
+                defaults={'size': size, 'mtime_ns': mtime_ns, 'sha256': digest, 'path': str(file_path)[-500:]}
+            )
+    except DatabaseError:
+        logger.warning("Digest cache: no se pudo persistir el digest de %s", file_path)
+
+def clear_memory_cache():
+    with _lru_lock:
+        _lru.clear()
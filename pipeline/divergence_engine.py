@@ -1,8 +1,89 @@
 import logging
-from django.core.cache import cache
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .metrics import observe_stage_timings
 
 logger = logging.getLogger(__name__)
 
+# Ventana deslizante atómica en Redis: cada componente tiene una lista de eventos (1/0)
+# y un contador de éxitos en un hash compartido. Todo ocurre dentro del script, así que
+# procesos concurrentes nunca pisan los eventos de otros.
+# KEYS: [hash de contadores, lista de eventos de cada componente...]
+# ARGV: [ventana, índice_componente, valor, índice_componente, valor, ...]
+PSI_REPORT_LUA = """
+local window = tonumber(ARGV[1])
+for i = 2, #ARGV, 2 do
+    local idx = tonumber(ARGV[i])
+    local value = tonumber(ARGV[i + 1])
+    local comp = KEYS[idx + 1]
+    redis.call('LPUSH', comp, value)
+    redis.call('HINCRBY', KEYS[1], comp .. ':ok', value)
+    if redis.call('LLEN', comp) > window then
+        redis.call('HINCRBY', KEYS[1], comp .. ':ok', -tonumber(redis.call('RPOP', comp)))
+    end
+    redis.call('HSET', KEYS[1], comp .. ':n', redis.call('LLEN', comp))
+end
+return 1
+"""
+
+# Fallback sin Redis (desarrollo / tests con locmem): mismo modelo, protegido por un lock.
+# Es local al proceso, igual que la caché locmem que reemplaza.
+_local_lock = threading.Lock()
+_local_windows = {}
+_local_ok = {}
+
+# Histogramas de latencia: buckets logarítmicos (4 por octava, ~19% de error relativo),
+# sumables entre procesos y entre ventanas de tiempo.
+LATENCY_BUCKETS_PER_OCTAVE = 4
+# Resoluciones: (nombre, segundos por bucket, retención en segundos). Los buckets
+# por minuto caducan pronto; los horarios son el histórico de baja resolución.
+LATENCY_RESOLUTIONS = (('m', 60, 2 * 3600), ('h', 3600, 8 * 24 * 3600))
+LATENCY_STEP = {name: step for name, step, _ in LATENCY_RESOLUTIONS}
+LATENCY_RETENTION = {name: retention for name, _, retention in LATENCY_RESOLUTIONS}
+_local_latency = {}
+
+def latency_bucket(seconds):
+    ms = max(seconds * 1000.0, 0.01)
+    return int(math.floor(math.log2(ms) * LATENCY_BUCKETS_PER_OCTAVE))
+
+def latency_bucket_ms(index):
+    """Valor representativo (centro geométrico) de un bucket, en milisegundos."""
+    return 2 ** ((index + 0.5) / LATENCY_BUCKETS_PER_OCTAVE)
+
+def histogram_percentile(buckets, q):
+    total = sum(buckets.values())
+    if not total:
+        return None
+    threshold = q * total
+    running = 0
+    for index in sorted(buckets):
+        running += buckets[index]
+        if running >= threshold:
+            return latency_bucket_ms(index)
+    return latency_bucket_ms(max(buckets))
+
+_redis_state = {'resolved': False, 'client': None, 'script': None}
+_redis_lock = threading.Lock()
+
+def _redis_script():
+    """Cliente Redis crudo de django_redis (o None si la caché no es Redis)."""
+    if not _redis_state['resolved']:
+        with _redis_lock:
+            if not _redis_state['resolved']:
+                try:
+                    from django_redis import get_redis_connection
+                    client = get_redis_connection('default')
+                    _redis_state['client'] = client
+                    _redis_state['script'] = client.register_script(PSI_REPORT_LUA)
+                except (ImportError, NotImplementedError):
+                    pass
+                _redis_state['resolved'] = True
+    return _redis_state['client'], _redis_state['script']
+
 class PipelineStabilityIndex:
     """
     Motor de Divergencia (SRE Entropy Monitor).
@@ -11,7 +92,7 @@ class PipelineStabilityIndex:
     """
     IDEAL_STATE = 0.000000
     WINDOW_SIZE = 50 # Analizamos los últimos 50 eventos para permitir que el sistema "sane"
-    CACHE_KEY = "axiom_psi_data"
+    CACHE_KEY = "axiom_psi"
 
     def __init__(self):
         # Pesos: Suman 1.0 (100% del sistema)
@@ -21,40 +102,193 @@ class PipelineStabilityIndex:
             'ffmpeg': 0.15,    # Si falla, no hay proxies, pero los originales se salvan
             'integrity': 0.10  # Fallos de Checksum/SSOT
         }
+        self.components = list(self.weights.keys())
+        # Etapas cronometradas (latencia + throughput)
+        self.stages = ['hash', 'probe', 'transcode', 'thumbnail', 'db_save']
+
+    def _events_key(self, component):
+        return f"{self.CACHE_KEY}:events:{component}"
 
-    def _get_history(self):
-        """Recupera el historial de éxitos (1) y fallos (0) de Redis."""
-        return cache.get(self.CACHE_KEY, {k: [] for k in self.weights.keys()})
+    def _counters(self):
+        """Devuelve {componente: (éxitos, eventos)} sin transferir el historial."""
+        client, _ = _redis_script()
+        if client is None:
+            with _local_lock:
+                return {c: (_local_ok.get(c, 0), len(_local_windows.get(c, ()))) for c in self.components}
+
+        try:
+            raw = client.hgetall(f"{self.CACHE_KEY}:counters")
+        except Exception as e:
+            logger.warning(f"PSI Telemetry: Redis no disponible ({e})")
+            raw = {}
+        raw = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in raw.items()}
+        return {
+            c: (raw.get(f"{self._events_key(c)}:ok", 0), raw.get(f"{self._events_key(c)}:n", 0))
+            for c in self.components
+        }
 
     def report_status(self, component, success):
         """Registra un evento asíncrono y desplaza la ventana estadística."""
-        if component not in self.weights:
+        self.report_many([(component, success)])
+
+    def report_many(self, events):
+        """
+        Registra varios eventos [(componente, éxito), ...] en un solo viaje a Redis.
+        La ventana de cada componente se actualiza de forma atómica.
+        """
+        events = [(c, 1 if ok else 0) for c, ok in events if c in self.weights]
+        if not events:
             return
 
-        history = self._get_history()
-        val = 1 if success else 0
-        
-        history[component].append(val)
-        if len(history[component]) > self.WINDOW_SIZE:
-            history[component].pop(0)
+        client, script = _redis_script()
+        if client is None:
+            with _local_lock:
+                for comp, val in events:
+                    window = _local_windows.setdefault(comp, deque())
+                    window.append(val)
+                    _local_ok[comp] = _local_ok.get(comp, 0) + val
+                    if len(window) > self.WINDOW_SIZE:
+                        _local_ok[comp] -= window.popleft()
+        else:
+            args = [self.WINDOW_SIZE]
+            for comp, val in events:
+                args += [self.components.index(comp) + 1, val]
+            keys = [f"{self.CACHE_KEY}:counters"] + [self._events_key(c) for c in self.components]
+            try:
+                script(keys=keys, args=args)
+            except Exception as e:
+                # La telemetría nunca debe tumbar una ingesta
+                logger.warning(f"PSI Telemetry: evento perdido, Redis no disponible ({e})")
+                return
 
-        cache.set(self.CACHE_KEY, history, timeout=None)
-        logger.info(f"PSI Telemetry: {component} {'✅ OK' if success else '❌ FAIL'}")
+        for comp, val in events:
+            logger.info(f"PSI Telemetry: {comp} {'✅ OK' if val else '❌ FAIL'}")
+
+    # --- Latencia y Throughput por etapa ---
+
+    def _latency_key(self, stage, resolution, bucket_start):
+        return f"{self.CACHE_KEY}:latency:{stage}:{resolution}:{bucket_start}"
+
+    def report_timing(self, stage, seconds, nbytes=None):
+        """Registra la duración de una etapa (y los bytes procesados, para MB/s)."""
+        self.report_timings([(stage, seconds, nbytes)])
+
+    def report_timings(self, timings):
+        """Varias mediciones [(etapa, segundos, bytes|None), ...] en un solo viaje a Redis."""
+        timings = [t for t in timings if t[0] in self.stages]
+        if not timings:
+            return
+        # Mismas mediciones hacia Prometheus (histograma por proceso, sumado en /metrics)
+        observe_stage_timings(timings)
+
+        now = int(time.time())
+        client, _ = _redis_script()
+        if client is None:
+            with _local_lock:
+                for stage, seconds, nbytes in timings:
+                    for resolution, step, retention in LATENCY_RESOLUTIONS:
+                        key = (stage, resolution, now - now % step)
+                        hist = _local_latency.setdefault(key, {'buckets': {}, 'bytes': 0, 'bytes_secs': 0.0})
+                        index = latency_bucket(seconds)
+                        hist['buckets'][index] = hist['buckets'].get(index, 0) + 1
+                        if nbytes:
+                            hist['bytes'] += nbytes
+                            hist['bytes_secs'] += seconds
+                # Almacenamiento acotado: descartamos los buckets fuera de retención
+                expired = [k for k in _local_latency if k[2] < now - LATENCY_RETENTION[k[1]]]
+                for key in expired:
+                    del _local_latency[key]
+            return
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for stage, seconds, nbytes in timings:
+                for resolution, step, retention in LATENCY_RESOLUTIONS:
+                    key = self._latency_key(stage, resolution, now - now % step)
+                    pipe.hincrby(key, f"b{latency_bucket(seconds)}", 1)
+                    if nbytes:
+                        pipe.hincrby(key, 'bytes', int(nbytes))
+                        pipe.hincrbyfloat(key, 'bytes_secs', seconds)
+                    pipe.expire(key, retention)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"PSI Telemetry: medición perdida, Redis no disponible ({e})")
+
+    @contextmanager
+    def track(self, stage, nbytes=None):
+        """Cronometra un bloque: `with engine.track('hash', nbytes=size): ...` (solo si no falla)."""
+        start = time.perf_counter()
+        yield
+        self.report_timing(stage, time.perf_counter() - start, nbytes)
+
+    def get_latency(self, resolution='m', span=15):
+        """
+        p50/p95/p99 (ms) y MB/s por etapa sobre los últimos `span` buckets de la
+        resolución dada ('m' = minutos, 'h' = horas). Los buckets se suman (mergeables).
+        """
+        step = LATENCY_STEP[resolution]
+        now = int(time.time())
+        starts = [now - now % step - i * step for i in range(span)]
+
+        raw = {stage: [] for stage in self.stages}
+        client, _ = _redis_script()
+        if client is None:
+            with _local_lock:
+                for stage in self.stages:
+                    for start in starts:
+                        hist = _local_latency.get((stage, resolution, start))
+                        if hist:
+                            raw[stage].append((dict(hist['buckets']), hist['bytes'], hist['bytes_secs']))
+        else:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for stage in self.stages:
+                    for start in starts:
+                        pipe.hgetall(self._latency_key(stage, resolution, start))
+                results = iter(pipe.execute())
+            except Exception as e:
+                logger.warning(f"PSI Telemetry: Redis no disponible ({e})")
+                results = iter(())
+            for stage in self.stages:
+                for _ in starts:
+                    fields = next(results, None) or {}
+                    fields = {(k.decode() if isinstance(k, bytes) else k): v for k, v in fields.items()}
+                    buckets = {int(k[1:]): int(v) for k, v in fields.items() if k.startswith('b')}
+                    raw[stage].append((buckets, int(fields.get('bytes', 0)), float(fields.get('bytes_secs', 0))))
+
+        report = {}
+        for stage, parts in raw.items():
+            merged, total_bytes, total_secs = {}, 0, 0.0
+            for buckets, nbytes, secs in parts:
+                for index, count in buckets.items():
+                    merged[index] = merged.get(index, 0) + count
+                total_bytes += nbytes
+                total_secs += secs
+
+            p50, p95, p99 = (histogram_percentile(merged, q) for q in (0.50, 0.95, 0.99))
+            report[stage] = {
+                'count': sum(merged.values()),
+                'p50_ms': round(p50, 1) if p50 else None,
+                'p95_ms': round(p95, 1) if p95 else None,
+                'p99_ms': round(p99, 1) if p99 else None,
+                'mb_per_s': round(total_bytes / total_secs / (1024 * 1024), 1) if total_secs else None,
+            }
+        return report
 
     def get_diagnostics(self):
         """
         Calcula la entropía/divergencia real.
         Fórmula: Entropía Total = Σ((1.0 - Salud_Componente) * Peso_Componente)
         """
-        history = self._get_history()
+        counters = self._counters()
         component_report = {}
         total_entropy = 0.0
 
         for comp, weight in self.weights.items():
-            events = history.get(comp, [])
+            ok, count = counters[comp]
             
             # Si no hay eventos aún, asumimos que el componente está sano (1.0)
-            health = sum(events) / len(events) if events else 1.0
+            health = ok / count if count else 1.0
             
             # La entropía es el porcentaje de fallos multiplicado por el peso del componente
             component_entropy = (1.0 - health) * weight
@@ -63,7 +297,7 @@ class PipelineStabilityIndex:
             component_report[comp] = {
                 'health_pct': round(health * 100, 2),
                 'status': self._get_label(health),
-                'events_count': len(events)
+                'events_count': count
             }
 
         # La divergencia final es simplemente la entropía sumada al estado ideal (0.0)
@@ -74,6 +308,7 @@ class PipelineStabilityIndex:
             'status': self._get_global_label(total_entropy),
             'world_line': "0.000000 (Alpha Line)" if total_entropy == 0 else f"{divergence_score:.6f} (Attractor Field)",
             'components': component_report,
+            'stages': self.get_latency(),
             'is_stable': total_entropy < 0.05
         }
 
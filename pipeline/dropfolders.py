@@ -0,0 +1,304 @@
+# Drop folders de AXIOM: los proveedores dejan archivos en un share y el watcher
+# los publica sin intervención, por la misma ruta que la publicación por lotes.
+# - Reglas (AXIOM_DROPFOLDERS) asignan ruta -> proyecto / asset / departamento.
+# - Un archivo se ingiere cuando deja de crecer durante AXIOM_DROPFOLDER_SETTLE_SECONDS.
+# - El estado vive en la DB (DropFolderEntry / DropFolderDirectory): un reinicio sobre
+#   un share de 100k archivos solo lista los directorios cuyo mtime cambió.
+# - Lo rechazado o sin destino se reintenta con espera creciente (AXIOM_DROPFOLDER_RETRY_*).
+
+import fnmatch
+import logging
+import os
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import DropFolderDirectory, DropFolderEntry, Project, Version
+from .publishing import publish_batch
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # Sin watchdog (requirements.txt) el watcher funciona solo por polling
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Campos que cambian cuando un archivo vuelve a PENDING (nueva entrega o sigue creciendo)
+RESET_FIELDS = ['size', 'mtime_ns', 'changed_at', 'status', 'version', 'error', 'attempts', 'retry_at']
+
+class DropFolderRule:
+    """
+    Una carpeta vigilada. `pattern` es una regex sobre la ruta relativa a la carpeta con
+    grupos opcionales `project`, `asset` y `department`; lo que no capture sale de los
+    valores fijos de la regla (o del nombre del archivo, en el caso del asset).
+    """
+
+    def __init__(self, config):
+        self.root = os.path.realpath(config['path'])
+        self.pattern = re.compile(config['pattern']) if config.get('pattern') else None
+        self.project = config.get('project')
+        self.asset = config.get('asset')
+        self.department = config.get('department', Version.Department.GENERIC)
+        self.username = config.get('user')
+
+    def contains(self, path):
+        return os.path.commonpath([self.root, path]) == self.root
+
+    def match(self, path):
+        """Destino de un archivo: {'project', 'asset_name', 'department'} o None si no aplica."""
+        relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+        groups = {}
+        if self.pattern:
+            found = self.pattern.search(relative)
+            if not found:
+                return None
+            groups = {key: value for key, value in found.groupdict().items() if value}
+
+        project = groups.get('project', self.project)
+        if not project:
+            return None
+        return {
+            'project': project,
+            'asset_name': groups.get('asset', self.asset) or os.path.splitext(os.path.basename(path))[0],
+            'department': groups.get('department', self.department),
+        }
+
+    def resolve(self, path):
+        """resolve_path de publish_batch: solo archivos reales dentro de esta carpeta."""
+        path = os.path.realpath(path)
+        if not self.contains(path):
+            raise ValueError("La ruta sale del drop folder.")
+        if not os.path.isfile(path):
+            raise ValueError("El archivo ya no existe en el drop folder.")
+        return path
+
+class _DirtyDirectories(FileSystemEventHandler):
+    """Handler de watchdog: solo anota qué directorios cambiaron; el escaneo lo hace el bucle."""
+
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        for path in (event.src_path, getattr(event, 'dest_path', None)):
+            if path:
+                self.watcher.mark_dirty(path if event.is_directory else os.path.dirname(path))
+
+class DropFolderWatcher:
+
+    def __init__(self, rules, settle_seconds=None, ignore=None):
+        self.rules = rules
+        self.settle = timedelta(seconds=settle_seconds if settle_seconds is not None
+                                else settings.AXIOM_DROPFOLDER_SETTLE_SECONDS)
+        self.ignore = tuple(ignore if ignore is not None else settings.AXIOM_DROPFOLDER_IGNORE)
+        self.retry_seconds = settings.AXIOM_DROPFOLDER_RETRY_SECONDS
+        self.retry_max_seconds = settings.AXIOM_DROPFOLDER_RETRY_MAX_SECONDS
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+    @classmethod
+    def from_settings(cls):
+        return cls([DropFolderRule(config) for config in settings.AXIOM_DROPFOLDERS])
+
+    # --- 1. Eventos (inotify vía watchdog) ---
+    def start_observer(self):
+        """Arranca watchdog si está instalado. Devuelve el observer o None (modo polling)."""
+        if Observer is None:
+            return None
+        observer = Observer()
+        handler = _DirtyDirectories(self)
+        for rule in self.rules:
+            observer.schedule(handler, rule.root, recursive=True)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def mark_dirty(self, directory):
+        with self._dirty_lock:
+            self._dirty.add(os.path.realpath(directory))
+        self.wakeup.set()
+
+    def pop_dirty(self):
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    # --- 2. Escaneo incremental ---
+    def scan(self, directories=None):
+        """
+        Recorre las carpetas (todas o solo `directories`). Los directorios cuyo mtime no
+        cambió solo se recorren para bajar a sus subdirectorios: sus archivos no se listan
+        ni se les hace stat(). Devuelve el número de archivos nuevos registrados.
+        """
+        roots = directories or [rule.root for rule in self.rules]
+        known = dict(DropFolderDirectory.objects.values_list('path', 'mtime_ns'))
+        registered = 0
+
+        stack = [root for root in roots if os.path.isdir(root)]
+        while stack:
+            directory = stack.pop()
+            try:
+                # El stat va ANTES del listado: si algo llega durante el listado, el
+                # siguiente escaneo verá un mtime distinto y volverá a listar
+                mtime_ns = os.stat(directory).st_mtime_ns
+                changed = known.get(directory) != mtime_ns
+                files = []
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif changed and entry.is_file(follow_symlinks=False) and not self.is_ignored(entry.name):
+                            files.append(entry)
+            except OSError as e:
+                logger.warning(f"Drop folder: no se pudo leer {directory} ({e})")
+                continue
+
+            if changed:
+                registered += self._register_files(directory, files)
+                DropFolderDirectory.objects.update_or_create(path=directory, defaults={'mtime_ns': mtime_ns})
+        return registered
+
+    def is_ignored(self, name):
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignore)
+
+    def _register_files(self, directory, entries):
+        """Sincroniza DropFolderEntry con el listado de un directorio que cambió."""
+        now = timezone.now()
+        current = {}
+        for entry in entries:
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            current[entry.name] = (stat.st_size, stat.st_mtime_ns)
+
+        stored = {entry.name: entry for entry in DropFolderEntry.objects.filter(directory=directory)}
+        new, reset = [], []
+        for name, (size, mtime_ns) in current.items():
+            entry = stored.get(name)
+            if entry is None:
+                new.append(DropFolderEntry(directory=directory, name=name, size=size, mtime_ns=mtime_ns, changed_at=now))
+            elif entry.status != DropFolderEntry.EntryStatus.PENDING and (entry.size, entry.mtime_ns) != (size, mtime_ns):
+                # Misma ruta, archivo distinto: una nueva entrega del proveedor
+                self._redelivered(entry, size, mtime_ns, now)
+                reset.append(entry)
+
+        DropFolderEntry.objects.bulk_create(new, ignore_conflicts=True)
+        DropFolderEntry.objects.bulk_update(reset, RESET_FIELDS)
+        # Pendientes que el proveedor retiró antes de que los ingiriéramos
+        vanished = [name for name, entry in stored.items()
+                    if name not in current and entry.status == DropFolderEntry.EntryStatus.PENDING]
+        if vanished:
+            DropFolderEntry.objects.filter(directory=directory, name__in=vanished).delete()
+        return len(new) + len(reset)
+
+    # --- 3. Estabilidad + ingesta ---
+    def ingest_stable(self):
+        """
+        Revisa los archivos pendientes y los reintentos vencidos: si cambiaron se reinicia
+        su cuenta atrás; si llevan `settle` sin cambiar se publican, agrupados por proyecto
+        y usuario. Devuelve (aceptados, rechazados).
+        """
+        now = timezone.now()
+        due = Q(status=DropFolderEntry.EntryStatus.PENDING) | Q(
+            status__in=(DropFolderEntry.EntryStatus.REJECTED, DropFolderEntry.EntryStatus.UNMAPPED),
+            retry_at__lte=now,
+        )
+        stable, touched = [], []
+        for entry in DropFolderEntry.objects.filter(due):
+            try:
+                stat = os.stat(entry.path)
+            except FileNotFoundError:
+                entry.delete()
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns):
+                self._redelivered(entry, stat.st_size, stat.st_mtime_ns, now)
+                touched.append(entry)
+            elif entry.status != DropFolderEntry.EntryStatus.PENDING or entry.changed_at <= now - self.settle:
+                stable.append(entry)
+        DropFolderEntry.objects.bulk_update(touched, RESET_FIELDS)
+        if not stable:
+            return 0, 0
+
+        batches, unmapped, orphaned = self._group_by_destination(stable)
+        for entry in unmapped:
+            self._defer(entry, DropFolderEntry.EntryStatus.UNMAPPED, "Ninguna regla asigna este archivo a un proyecto.", now)
+        for entry, error in orphaned:
+            self._defer(entry, DropFolderEntry.EntryStatus.REJECTED, error, now)
+
+        accepted = rejected = 0
+        for (rule, project, user), group in batches.items():
+            items = [{'asset_name': target['asset_name'], 'department': target['department'], 'path': entry.path}
+                     for entry, target in group]
+            results = publish_batch(project, user, items, resolve_path=rule.resolve)
+            for (entry, _), result in zip(group, results):
+                if result['status'] == 'accepted':
+                    entry.status, entry.version_id, entry.error = DropFolderEntry.EntryStatus.INGESTED, result['version_id'], ''
+                    entry.retry_at = None
+                    accepted += 1
+                else:
+                    self._defer(entry, DropFolderEntry.EntryStatus.REJECTED, result.get('error', ''), now)
+                    rejected += 1
+                    logger.warning(f"Drop folder: {entry.path} rechazado ({entry.error}), intento {entry.attempts}")
+
+        DropFolderEntry.objects.bulk_update(stable, ['status', 'version', 'error', 'attempts', 'retry_at'])
+        return accepted, rejected + len(orphaned)
+
+    def _defer(self, entry, status, error, now):
+        """Rechazo no definitivo: se reintenta con espera creciente (proyecto o usuario creados después)."""
+        entry.status, entry.error = status, error
+        entry.attempts += 1
+        delay = min(self.retry_seconds * 2 ** min(entry.attempts - 1, 32), self.retry_max_seconds)
+        entry.retry_at = now + timedelta(seconds=delay)
+
+    @staticmethod
+    def _redelivered(entry, size, mtime_ns, now):
+        """Misma ruta, archivo distinto: vuelve a PENDING y su cuenta atrás empieza de cero."""
+        entry.size, entry.mtime_ns, entry.changed_at = size, mtime_ns, now
+        entry.status, entry.version, entry.error = DropFolderEntry.EntryStatus.PENDING, None, ''
+        entry.attempts, entry.retry_at = 0, None
+
+    def _group_by_destination(self, entries):
+        """
+        {(regla, proyecto, usuario): [(entrada, destino), ...]}, las entradas sin destino y
+        las que tienen destino pero cuya regla no apunta a un usuario activo [(entrada, error)].
+        """
+        projects, users = {}, {}
+        batches, unmapped, orphaned = {}, [], []
+        for entry in entries:
+            rule = max((rule for rule in self.rules if rule.contains(entry.directory)),
+                       key=lambda rule: len(rule.root), default=None)
+            target = rule.match(entry.path) if rule else None
+            project = self._project(target['project'], projects) if target else None
+            if project is None:
+                unmapped.append(entry)
+                continue
+            if not rule.username:
+                orphaned.append((entry, f"La regla de {rule.root} no define 'user'."))
+                continue
+            if rule.username not in users:
+                users[rule.username] = User.objects.filter(username=rule.username, is_active=True).first()
+            if users[rule.username] is None:
+                orphaned.append((entry, f"El usuario '{rule.username}' no existe o está inactivo."))
+                continue
+            batches.setdefault((rule, project, users[rule.username]), []).append((entry, target))
+        return batches, unmapped, orphaned
+
+    def _project(self, reference, cache):
+        """Proyecto por id o por título (los títulos de carpeta usan '_' en lugar de espacios)."""
+        if reference not in cache:
+            queryset = Project.objects.all()
+            if str(reference).isdigit():
+                cache[reference] = queryset.filter(pk=int(reference)).first()
+            else:
+                title = str(reference)
+                cache[reference] = (queryset.filter(title=title).first() or
+                                    queryset.filter(title=title.replace('_', ' ')).first())
+        return cache[reference]
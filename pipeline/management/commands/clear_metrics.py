@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from pipeline.metrics import MULTIPROC_DIR, clear_stale_files
+
+
+class Command(BaseCommand):
+    help = ("Borra los archivos de métricas multiproceso que dejaron procesos anteriores de este "
+            "contenedor. Se ejecuta al arrancar web y workers, antes de escribir ninguna métrica.")
+
+    def handle(self, *args, **options):
+        if not MULTIPROC_DIR:
+            self.stdout.write("PROMETHEUS_MULTIPROC_DIR no está definido: nada que limpiar.")
+            return
+        removed = clear_stale_files()
+        self.stdout.write(self.style.SUCCESS(f"📈 Métricas: {removed} archivos de procesos anteriores eliminados."))
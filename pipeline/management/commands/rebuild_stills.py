@@ -0,0 +1,68 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django.utils.text import slugify
+
+from pipeline.models import Version
+from pipeline.stills import STILL_EXTENSIONS, render_still_batch
+
+
+class Command(BaseCommand):
+    help = "Regenera los thumbnails de stills en un pool de procesos con tope de memoria por trabajo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Procesos del pool (por defecto AXIOM_STILLS_WORKERS).")
+        parser.add_argument('--project', type=int, default=None,
+                            help="Solo las versiones de este proyecto (id).")
+        parser.add_argument('--missing', action='store_true',
+                            help="Solo las versiones que aún no tienen thumbnail.")
+
+    def handle(self, *args, **options):
+        queryset = Version.objects.exclude(file='').filter(frame_start__isnull=True).select_related('asset__project').only(
+            'id', 'file', 'version_number', 'thumbnail', 'extra_metadata', 'asset__name', 'asset__project__title'
+        )
+        if options['project']:
+            queryset = queryset.filter(asset__project_id=options['project'])
+        if options['missing']:
+            queryset = queryset.filter(thumbnail='')
+
+        jobs = []
+        for version in queryset.iterator():
+            base_name, ext = os.path.splitext(os.path.basename(version.file.name))
+            if ext.lower() not in STILL_EXTENSIONS:
+                continue
+            # Misma ruta que process_version_task
+            base_db_path = (f"assets/{slugify(version.asset.project.title)}/"
+                            f"{slugify(version.asset.name)}/v{version.version_number:03d}")
+            thumb_db_path = f"{base_db_path}/{base_name}_thumb.jpg"
+            os.makedirs(os.path.join(settings.MEDIA_ROOT, base_db_path), exist_ok=True)
+            jobs.append({
+                'version_id': version.id,
+                'input_path': version.file.path,
+                'thumb_path': os.path.join(settings.MEDIA_ROOT, thumb_db_path),
+                'thumb_db_path': thumb_db_path,
+            })
+
+        if not jobs:
+            self.stdout.write("🖼️ No hay stills que procesar.")
+            return
+
+        done = failed = 0
+        for job, info, error in render_still_batch(jobs, workers=options['workers']):
+            if error:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"   ❌ Versión {job['version_id']}: {error}"))
+                continue
+            version = Version.objects.only('extra_metadata').get(pk=job['version_id'])
+            version.extra_metadata['still'] = info
+            Version.objects.filter(pk=job['version_id']).update(
+                thumbnail=job['thumb_db_path'], proxy_file_path=job['thumb_db_path'],
+                extra_metadata=version.extra_metadata, updated_at=timezone.now(),
+            )
+            done += 1
+
+        summary = f"{done} thumbnails regenerados | {failed} fallos"
+        self.stdout.write(self.style.ERROR(summary) if failed else self.style.SUCCESS(f"✅ {summary}"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from pipeline.scrub import run_scrub
+
+
+class Command(BaseCommand):
+    help = "Re-hashea los originales y los compara con su SHA-256 (reanuda la pasada en curso)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Procesos de hashing (por defecto AXIOM_SCRUB_WORKERS).")
+        parser.add_argument('--max-mbps', type=float, default=None,
+                            help="Tope global de lectura en MB/s (0 = sin límite; por defecto AXIOM_SCRUB_MAX_MBPS).")
+        parser.add_argument('--budget', type=float, default=None,
+                            help="Segundos máximos de esta ejecución (la pasada se reanuda en la siguiente).")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Número máximo de archivos en esta ejecución.")
+        parser.add_argument('--restart', action='store_true',
+                            help="Cierra la pasada en curso y empieza una nueva.")
+
+    def handle(self, *args, **options):
+        run = run_scrub(
+            workers=options['workers'], max_mbps=options['max_mbps'], budget=options['budget'],
+            limit=options['limit'], restart=options['restart'], stdout=self.stdout,
+        )
+        summary = f"{run.files_checked} archivos | {run.bytes_checked / 1024 ** 3:.1f} GB | {len(run.failures)} fallos"
+        if run.failures:
+            self.stdout.write(self.style.ERROR(f"🧬 Scrub con fallos: {summary}"))
+            for failure in run.failures[-20:]:
+                self.stdout.write(f"   ❌ Versión {failure['version']}: {failure['status']} ({failure['path']})")
+        elif run.status == run.RunStatus.COMPLETED:
+            self.stdout.write(self.style.SUCCESS(f"✅ Pasada completa: {summary}"))
+        else:
+            self.stdout.write(f"⏸️ Pasada en curso (se reanudará): {summary}")
@@ -0,0 +1,81 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from pipeline.dropfolders import DropFolderWatcher
+
+logger = logging.getLogger('pipeline.dropfolders')
+
+class Command(BaseCommand):
+    help = "Vigila los drop folders (AXIOM_DROPFOLDERS) y publica los archivos cuando dejan de crecer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Un escaneo + una ingesta y salir (para cron).")
+        parser.add_argument('--poll', action='store_true',
+                            help="No usar inotify/watchdog aunque esté instalado.")
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Segundos entre escaneos completos (por defecto AXIOM_DROPFOLDER_POLL_SECONDS).")
+
+    def handle(self, *args, **options):
+        watcher = DropFolderWatcher.from_settings()
+        if not watcher.rules:
+            # Sin carpetas configuradas el servicio termina limpio (docker-compose / start_axiom.sh lo lanzan siempre)
+            self.stdout.write("💤 AXIOM_DROPFOLDERS está vacío: no hay carpetas que vigilar.")
+            return
+        for rule in watcher.rules:
+            self.stdout.write(f"📂 Vigilando {rule.root}")
+            if not rule.username:
+                self.stderr.write(f"⚠️ La regla de {rule.root} no define 'user': sus archivos se rechazarán.")
+
+        if options['once']:
+            self.run_cycle(watcher, full_scan=True)
+            return
+
+        observer = None if options['poll'] else watcher.start_observer()
+        self.stdout.write("👁️ Modo inotify (watchdog)." if observer else "⏱️ Modo polling.")
+
+        interval = options['interval'] or settings.AXIOM_DROPFOLDER_POLL_SECONDS
+        # Con eventos, el escaneo completo es solo una red de seguridad (shares NFS/SMB no emiten inotify)
+        tick = min(interval, max(1.0, watcher.settle.total_seconds() / 2))
+        next_full_scan = 0.0
+        try:
+            while True:
+                full_scan = time.monotonic() >= next_full_scan
+                if full_scan:
+                    next_full_scan = time.monotonic() + interval
+                try:
+                    self.run_cycle(watcher, full_scan=full_scan)
+                except Exception as e:
+                    # Un share caído o la DB reiniciándose no deben tumbar el watcher
+                    logger.exception("Drop folder: ciclo fallido")
+                    self.stderr.write(f"🛑 Ciclo fallido, se reintenta en {tick:.0f}s: {e}")
+                    next_full_scan = 0.0
+                watcher.wakeup.wait(tick)
+                watcher.wakeup.clear()
+        except KeyboardInterrupt:
+            self.stdout.write("🛑 Watcher detenido.")
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+
+    def run_cycle(self, watcher, full_scan):
+        # Proceso de larga vida: conexiones caídas o vencidas se reabren en cada ciclo
+        close_old_connections()
+        dirty = watcher.pop_dirty()
+        if full_scan:
+            registered = watcher.scan()
+        elif dirty:
+            registered = watcher.scan(sorted(dirty))
+        else:
+            registered = 0
+        if registered:
+            self.stdout.write(f"🆕 {registered} archivo(s) nuevos en espera de estabilidad.")
+
+        accepted, rejected = watcher.ingest_stable()
+        if accepted or rejected:
+            self.stdout.write(self.style.SUCCESS(f"📥 Publicados: {accepted} | Rechazados: {rejected}"))
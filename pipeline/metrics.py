@@ -0,0 +1,146 @@
+# Métricas Prometheus de AXIOM (endpoint /metrics).
+# Web y workers de Celery escriben en PROMETHEUS_MULTIPROC_DIR; el endpoint suma
+# los archivos de todos los procesos y añade al vuelo el estado de DB, colas y PSI.
+
+import glob
+import hmac
+import ipaddress
+import logging
+import os
+import socket
+
+from django.conf import settings
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess, values,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+def metrics_process_id():
+    """
+    Identificador de proceso para los archivos multiproceso. Incluye el hostname:
+    los contenedores comparten el directorio y cada uno numera sus PIDs desde 1.
+    """
+    return f"{socket.gethostname().replace('_', '-')}-{os.getpid()}"
+
+if MULTIPROC_DIR:
+    # Debe configurarse antes de crear cualquier métrica
+    values.ValueClass = values.MultiProcessValue(process_identifier=metrics_process_id)
+
+# Buckets en segundos: de un hash pequeño a un encode de varias horas
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 10800)
+
+UPLOADS = Counter('axiom_uploads', 'Versiones recibidas por la API', ['mode'])
+UPLOAD_BYTES = Counter('axiom_upload_bytes', 'Bytes recibidos por la API', ['mode'])
+STAGE_SECONDS = Histogram(
+    'axiom_stage_duration_seconds', 'Duración por etapa (hash, probe, transcode, thumbnail, db_save)',
+    ['stage'], buckets=STAGE_BUCKETS
+)
+STAGE_BYTES = Counter('axiom_stage_bytes', 'Bytes procesados por etapa', ['stage'])
+
+def observe_upload(mode, nbytes):
+    UPLOADS.labels(mode=mode).inc()
+    if nbytes:
+        UPLOAD_BYTES.labels(mode=mode).inc(nbytes)
+
+def observe_stage_timings(timings):
+    """Recibe las mediciones del motor de divergencia [(etapa, segundos, bytes|None), ...]."""
+    for stage, seconds, nbytes in timings:
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+        if nbytes:
+            STAGE_BYTES.labels(stage=stage).inc(nbytes)
+
+class PipelineCollector:
+    """Estado que se consulta en cada scrape: versiones por estado, colas de Celery y PSI."""
+
+    def collect(self):
+        from django.db.models import Count
+        from .divergence_engine import PipelineStabilityIndex
+        from .models import Version
+
+        versions = GaugeMetricFamily(
+            'axiom_versions', 'Versiones por transcoding_status', labels=['transcoding_status']
+        )
+        counts = dict(
+            Version.objects.order_by().values_list('transcoding_status').annotate(n=Count('id'))
+        )
+        for status in Version.TranscodingStatus.values:
+            versions.add_metric([status], counts.get(status, 0))
+        yield versions
+
+        depth = GaugeMetricFamily('axiom_celery_queue_depth', 'Mensajes pendientes por cola', labels=['queue'])
+        for name, pending in self._queue_depths():
+            depth.add_metric([name], pending)
+        yield depth
+
+        diagnostics = PipelineStabilityIndex().get_diagnostics()
+        health = GaugeMetricFamily('axiom_psi_component_health', 'Salud PSI por componente (0-1)', labels=['component'])
+        for component, report in diagnostics['components'].items():
+            health.add_metric([component], report['health_pct'] / 100)
+        yield health
+        yield GaugeMetricFamily('axiom_psi_score', 'Divergencia global (0 = Línea Alpha)', value=float(diagnostics['psi_score']))
+
+    def _queue_depths(self):
+        from AXIOM.celery import app
+
+        depths = []
+        try:
+            with app.connection_for_read() as conn:
+                conn.ensure_connection(max_retries=1)
+                channel = conn.default_channel
+                for queue in settings.CELERY_TASK_QUEUES:
+                    try:
+                        pending = channel.queue_declare(queue=queue.name, passive=True).message_count
+                    except Exception:
+                        pending = 0  # Redis no crea la lista hasta el primer mensaje
+                    depths.append((queue.name, pending))
+        except Exception as e:
+            logger.warning(f"Métricas: broker no disponible ({e})")
+        return depths
+
+def scrape_allowed(request):
+    """
+    /metrics expone proyectos, colas y salud interna: solo el token de Prometheus
+    (AXIOM_METRICS_TOKEN) o una IP de AXIOM_METRICS_ALLOWED_IPS (REMOTE_ADDR, sin cabeceras de proxy).
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if settings.AXIOM_METRICS_TOKEN and scheme.lower() == 'bearer':
+        return hmac.compare_digest(token.strip(), settings.AXIOM_METRICS_TOKEN)
+    try:
+        client = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(client in ipaddress.ip_network(network, strict=False) for network in settings.AXIOM_METRICS_ALLOWED_IPS)
+
+def render_metrics():
+    """Devuelve (cuerpo, content type) en formato de exposición de texto."""
+    registry = CollectorRegistry()
+    if MULTIPROC_DIR:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        # Un solo proceso (runserver / tests): métricas del registro global
+        registry.register(REGISTRY)
+    registry.register(PipelineCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead():
+    """Limpia los gauges 'live' del proceso que termina (worker_process_shutdown)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(metrics_process_id())
+
+def clear_stale_files():
+    """
+    Borra los archivos multiproceso de procesos anteriores de este host (mismo contenedor
+    reiniciado). Los de otros contenedores siguen vivos y no se tocan. Devuelve cuántos borró.
+    """
+    if not MULTIPROC_DIR:
+        return 0
+    host = socket.gethostname().replace('_', '-')
+    stale = glob.glob(os.path.join(glob.escape(MULTIPROC_DIR), f"*_{glob.escape(host)}-*.db"))
+    for path in stale:
+        os.remove(path)
+    return len(stale)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0015_uploadsession_uploadchunk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='version',
+            name='transcoding_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('INGESTING', 'Ingesting'), ('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('ERROR', 'Error')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0016_alter_version_transcoding_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='proxy_ladder',
+            field=models.JSONField(blank=True, default=list, help_text='Alturas de la escalera HLS, ej. [360, 720, 1080]'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='hls_playlist_path',
+            field=models.FileField(blank=True, help_text='Master playlist HLS (escalera adaptativa).', max_length=1000, null=True, upload_to=''),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0017_project_proxy_ladder_version_hls_playlist_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.BigIntegerField()),
+                ('path', models.CharField(max_length=100)),
+                ('link_method', models.CharField(default='hardlink', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_verified_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+    ]
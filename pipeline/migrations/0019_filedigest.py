@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0018_contentblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FileDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device', models.BigIntegerField()),
+                ('inode', models.BigIntegerField()),
+                ('size', models.BigIntegerField()),
+                ('mtime_ns', models.BigIntegerField()),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('path', models.CharField(blank=True, max_length=500)),
+                ('verified_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('device', 'inode')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0019_filedigest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='qc_errors',
+            field=models.JSONField(blank=True, default=list, help_text='Códigos de QC fallidos.'),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='qc_passed',
+            field=models.BooleanField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='version',
+            index=models.Index(fields=['department', 'qc_passed'], name='version_dept_qc_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:51
+
+from django.db import migrations
+from django.db.models import BooleanField, Case, F, Q, Value, When
+
+# Reglas de QC congeladas tal como estaban al crear qc_passed / qc_errors (migración 0020).
+# No importar pipeline.qc: un cambio de regla posterior cambiaría lo que hace esta migración.
+FPS_TOLERANCE = 0.01
+QC_CODES = ('missing_tech', 'fps_mismatch', 'resolution_mismatch', 'missing_checksum')
+
+
+def qc_rule_conditions():
+    is_video = Q(asset__category='VIDEO')
+    missing_tech = is_video & (
+        Q(fps__isnull=True) | Q(fps=0) | Q(resolution_width__isnull=True) | Q(resolution_width=0)
+    )
+    target_fps = F('asset__project__target_fps')
+    fps_mismatch = is_video & ~missing_tech & (
+        Q(fps__gt=target_fps + FPS_TOLERANCE) | Q(fps__lt=target_fps - FPS_TOLERANCE)
+    )
+    resolution_mismatch = is_video & ~missing_tech & (
+        ~Q(resolution_width=F('asset__project__target_width')) |
+        Q(resolution_height__isnull=True) |
+        ~Q(resolution_height=F('asset__project__target_height'))
+    )
+    missing_checksum = ~missing_tech & (
+        Q(asset__checksum_sha256__isnull=True) | Q(asset__checksum_sha256='')
+    )
+    return dict(zip(QC_CODES, (missing_tech, fps_mismatch, resolution_mismatch, missing_checksum)))
+
+
+def backfill_version_qc(apps, schema_editor):
+    # Por conjuntos: un SELECT de combinaciones de fallos y un UPDATE por combinación
+    Version = apps.get_model('pipeline', 'Version')
+    rules = qc_rule_conditions()
+    flag = lambda condition: Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+    combinations = Version.objects.order_by().annotate(
+        **{f'qc_{code}': flag(rules[code]) for code in QC_CODES}
+    ).values_list(*[f'qc_{code}' for code in QC_CODES]).distinct()
+
+    for combination in list(combinations):
+        codes = [code for code, failed in zip(QC_CODES, combination) if failed]
+        condition = Q()
+        for code, failed in zip(QC_CODES, combination):
+            condition &= rules[code] if failed else ~rules[code]
+        Version.objects.filter(condition).update(qc_passed=not codes, qc_errors=codes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0020_version_qc_passed_qc_errors'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_version_qc, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 00:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_version_counters(apps, schema_editor):
+    # Un contador por (asset, depto) existente, apuntando a su versión más alta
+    Version = apps.get_model('pipeline', 'Version')
+    VersionCounter = apps.get_model('pipeline', 'VersionCounter')
+    latest = {}
+    for pk, asset_id, department, number in Version.objects.order_by('version_number').values_list(
+        'pk', 'asset_id', 'department', 'version_number'
+    ):
+        if number is not None:
+            latest[(asset_id, department)] = (pk, number)
+    VersionCounter.objects.bulk_create([
+        VersionCounter(asset_id=asset_id, department=department, last_number=number, latest_version_id=pk)
+        for (asset_id, department), (pk, number) in latest.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0022_version_updated_at_api_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(choices=[('ED', 'Editorial'), ('LAY', 'Layout'), ('ANIM', 'Animation'), ('FX', 'Effects'), ('LGT', 'Lighting'), ('COMP', 'Compositing'), ('ART', 'Art/Concept'), ('GEN', 'Generic/Asset')], max_length=4)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='version_counters', to='pipeline.asset')),
+                ('latest_version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pipeline.version')),
+            ],
+            options={
+                'unique_together': {('asset', 'department')},
+            },
+        ),
+        migrations.RunPython(backfill_version_counters, migrations.RunPython.noop),
+    ]
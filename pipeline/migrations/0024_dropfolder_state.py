@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0023_versioncounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DropFolderDirectory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1000, unique=True)),
+                ('mtime_ns', models.BigIntegerField()),
+                ('scanned_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DropFolderEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('directory', models.CharField(db_index=True, max_length=1000)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('mtime_ns', models.BigIntegerField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('INGESTED', 'Ingested'), ('REJECTED', 'Rejected'), ('UNMAPPED', 'Unmapped')], db_index=True, default='PENDING', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('version', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pipeline.version')),
+            ],
+            options={
+                'verbose_name_plural': 'Drop folder entries',
+                'unique_together': {('directory', 'name')},
+            },
+        ),
+    ]
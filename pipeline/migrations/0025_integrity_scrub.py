@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0024_dropfolder_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrubRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('cutoff', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('COMPLETED', 'Completed')], default='RUNNING', max_length=10)),
+                ('files_checked', models.PositiveIntegerField(default=0)),
+                ('bytes_checked', models.BigIntegerField(default=0)),
+                ('failures', models.JSONField(blank=True, default=list)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='last_verified_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
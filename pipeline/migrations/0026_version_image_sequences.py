@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0025_integrity_scrub'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='frame_end',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='frame_start',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='frames_missing',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='frames_short',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0026_version_image_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='sprite_index',
+            field=models.FileField(blank=True, max_length=1000, null=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='sprite_sheet',
+            field=models.FileField(blank=True, max_length=1000, null=True, upload_to=''),
+        ),
+    ]
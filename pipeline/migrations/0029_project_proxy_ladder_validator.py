@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:41
+
+import pipeline.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0028_upload_session_expired'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='proxy_ladder',
+            field=models.JSONField(blank=True, default=list, help_text='Alturas de la escalera HLS, ej. [360, 720, 1080]', validators=[pipeline.models.validate_proxy_ladder]),
+        ),
+    ]
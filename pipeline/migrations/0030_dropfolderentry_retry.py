@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0029_project_proxy_ladder_validator'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dropfolderentry',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dropfolderentry',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
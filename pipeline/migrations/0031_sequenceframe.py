@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:51
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Fórmulas congeladas del ADN de secuencia: la anterior (solo digests) y la nueva (frame:digest)
+def legacy_digest(manifest):
+    return hashlib.sha256(''.join(digest for _, _, digest in manifest).encode()).hexdigest()
+
+
+def framed_digest(manifest):
+    return hashlib.sha256(''.join(f"{frame}:{digest};" for frame, _, digest in manifest).encode()).hexdigest()
+
+
+def _rewrite_checksum(apps, version, checksum):
+    # El Asset guarda el ADN de su última ingesta: se actualiza si era el de esta Versión
+    Asset = apps.get_model('pipeline', 'Asset')
+    Asset.objects.filter(pk=version.asset_id, checksum_sha256=version.checksum_sha256).update(
+        checksum_sha256=checksum, updated_at=timezone.now()
+    )
+    version.checksum_sha256 = checksum
+
+
+def move_frame_manifests(apps, schema_editor):
+    Version = apps.get_model('pipeline', 'Version')
+    SequenceFrame = apps.get_model('pipeline', 'SequenceFrame')
+    for version in Version.objects.filter(extra_metadata__has_key='frame_manifest').iterator():
+        manifest = version.extra_metadata.pop('frame_manifest') or []
+        SequenceFrame.objects.bulk_create(
+            [SequenceFrame(version_id=version.pk, frame=frame, size=size, checksum_sha256=digest) for frame, size, digest in manifest],
+            batch_size=1000
+        )
+        if version.checksum_sha256 == legacy_digest(manifest):
+            _rewrite_checksum(apps, version, framed_digest(manifest))
+        Version.objects.filter(pk=version.pk).update(
+            extra_metadata=version.extra_metadata, checksum_sha256=version.checksum_sha256, updated_at=timezone.now()
+        )
+
+
+def restore_frame_manifests(apps, schema_editor):
+    Version = apps.get_model('pipeline', 'Version')
+    SequenceFrame = apps.get_model('pipeline', 'SequenceFrame')
+    for version in Version.objects.filter(frames__isnull=False).distinct().iterator():
+        manifest = [list(row) for row in SequenceFrame.objects.filter(version_id=version.pk).order_by('frame').values_list('frame', 'size', 'checksum_sha256')]
+        version.extra_metadata['frame_manifest'] = manifest
+        if version.checksum_sha256 == framed_digest(manifest):
+            _rewrite_checksum(apps, version, legacy_digest(manifest))
+        Version.objects.filter(pk=version.pk).update(
+            extra_metadata=version.extra_metadata, checksum_sha256=version.checksum_sha256, updated_at=timezone.now()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0030_dropfolderentry_retry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceFrame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frame', models.PositiveIntegerField()),
+                ('size', models.BigIntegerField()),
+                ('checksum_sha256', models.CharField(max_length=64)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='frames', to='pipeline.version')),
+            ],
+            options={
+                'ordering': ['frame'],
+                'unique_together': {('version', 'frame')},
+            },
+        ),
+        migrations.RunPython(move_frame_manifests, restore_frame_manifests),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipeline', '0031_sequenceframe'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('OPEN', 'Open'), ('ASSEMBLING', 'Assembling'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed'), ('EXPIRED', 'Expired')], default='OPEN', max_length=20),
+        ),
+    ]
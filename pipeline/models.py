@@ -11,7 +11,10 @@ from django.db.models import Max
 from django.db import transaction
 
 # Importamos las utilidades de procesamiento y el motor de estabilidad
-from .utils import calculate_sha256, asset_version_path, get_video_metadata
+from .utils import (
+    calculate_sha256, calculate_sha256_with_manifest, asset_version_path,
+    get_video_metadata, get_upload_checksum, get_upload_manifest, remember_file_digest,
+)
 from .divergence_engine import PipelineStabilityIndex
 
 # Inicializamos el motor a nivel de módulo
@@ -34,22 +37,51 @@ class Profile(models.Model):
     #    return self.name
 
 # --- 3. Proyecto (Contenedor Principal) ---
+def validate_proxy_ladder(value):
+    """Escalera HLS: lista de alturas pares, sin repetir, dentro de los límites de AXIOM_HLS_*."""
+    if not isinstance(value, list):
+        raise ValidationError(_("La escalera debe ser una lista de alturas, ej. [360, 720, 1080]."))
+    if len(value) > settings.AXIOM_HLS_MAX_RUNGS:
+        raise ValidationError(_("Máximo {n} peldaños.").format(n=settings.AXIOM_HLS_MAX_RUNGS))
+    for height in value:
+        if isinstance(height, bool) or not isinstance(height, int):
+            raise ValidationError(_("Altura inválida: {h!r} (se espera un entero).").format(h=height))
+        if not settings.AXIOM_HLS_MIN_HEIGHT <= height <= settings.AXIOM_HLS_MAX_HEIGHT or height % 2:
+            raise ValidationError(_("Altura inválida: {h} (par, entre {lo} y {hi}).").format(
+                h=height, lo=settings.AXIOM_HLS_MIN_HEIGHT, hi=settings.AXIOM_HLS_MAX_HEIGHT))
+    if len(set(value)) != len(value):
+        raise ValidationError(_("La escalera tiene alturas repetidas."))
+
 class Project(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     
     # Parámetros de Control de Calidad (QC)
     target_fps = models.FloatField(default=24.0)
     target_width = models.PositiveIntegerField(default=1920)
     target_height = models.PositiveIntegerField(default=1080)
+
+    # Escalera de proxies adaptativos (HLS/fMP4), ej. [360, 720, 1080].
+    # Vacía = solo el proxy MP4 de 720p.
+    proxy_ladder = models.JSONField(
+        default=list, blank=True, validators=[validate_proxy_ladder],
+        help_text="Alturas de la escalera HLS, ej. [360, 720, 1080]"
+    )
     
     #license = models.ForeignKey(License, on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self):
         return self.title
 
+    def hls_ladder(self):
+        """Escalera validada y ordenada (ValidationError si la guardada no es válida)."""
+        ladder = self.proxy_ladder or []
+        validate_proxy_ladder(ladder)
+        return sorted(ladder)
+
 # --- 4. Asset (Entidad Lógica) ---
 class Asset(models.Model): 
     # Añadimos categorías para ser agnósticos al formato
@@ -97,19 +129,11 @@ def get_version_path(instance, filename):
     dept = instance.department if instance.department else "gen"
     
     # 2. Manejo de la versión
-    v_num = instance.version_number
-    if v_num is None:
-        try:
-            # Usamos instance.__class__ para evitar avisos de registro doble
-            last_v = instance.__class__.objects.filter(
-                asset=instance.asset, 
-                department=instance.department
-            ).order_by('version_number').last()
-            v_num = (last_v.version_number + 1) if last_v else 1
-        except:
-            v_num = 1
+    # El número se reserva una sola vez en el contador (VersionCounter); aquí solo se lee
+    if instance.version_number is None:
+        instance.assign_version_number()
     
-    version_str = f"v{v_num:03d}"
+    version_str = f"v{instance.version_number:03d}"
     
     # 3. Nomenclatura Automática (Determinismo de datos)
     ext = os.path.splitext(filename)[1]
@@ -156,6 +180,7 @@ class Version(models.Model):
 
     class TranscodingStatus(models.TextChoices):
         PENDING = 'PENDING', _('Pending')
+        INGESTING = 'INGESTING', _('Ingesting')
         PROCESSING = 'PROCESSING', _('Processing')
         COMPLETED = 'COMPLETED', _('Completed')
         ERROR = 'ERROR', _('Error') 
@@ -199,6 +224,17 @@ class Version(models.Model):
     
     extra_metadata = models.JSONField(default=dict, blank=True)
 
+    # Secuencias de imágenes: `file` guarda el patrón (shot.%04d.exr) y esto el rango.
+    # Nulo = archivo único. Los frames faltantes / cortos se cuentan en la ingesta (QC).
+    frame_start = models.PositiveIntegerField(null=True, blank=True)
+    frame_end = models.PositiveIntegerField(null=True, blank=True)
+    frames_missing = models.PositiveIntegerField(default=0)
+    frames_short = models.PositiveIntegerField(default=0)
+
+    # QC materializado (ver pipeline/qc.py). None = aún sin evaluar (ej. ingesta en curso)
+    qc_passed = models.BooleanField(null=True, blank=True, db_index=True)
+    qc_errors = models.JSONField(default=list, blank=True, help_text="Códigos de QC fallidos.")
+
     asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='versions', verbose_name=_("Asset"))
     version_number = models.PositiveIntegerField(blank=True, null=True) 
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -209,9 +245,15 @@ class Version(models.Model):
 
     file = models.FileField(_("Original File"), upload_to=get_version_path, max_length=1000) 
     proxy_file_path = models.FileField(max_length=1000, blank=True, null=True)
+    hls_playlist_path = models.FileField(max_length=1000, blank=True, null=True, help_text="Master playlist HLS (escalera adaptativa).")
     thumbnail = models.ImageField(upload_to='thumbnails/', max_length=1000, blank=True, null=True)
+    # Scrub instantáneo en revisión: N frames en una imagen + índice JSON (frame -> tile)
+    sprite_sheet = models.FileField(max_length=1000, blank=True, null=True)
+    sprite_index = models.FileField(max_length=1000, blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True) 
+    # Validador de caché HTTP (ETag / Last-Modified). Los .update() masivos lo actualizan a mano.
+    updated_at = models.DateTimeField(auto_now=True)
     
     checksum_sha256 = models.CharField(
         max_length=64, 
@@ -220,50 +262,120 @@ class Version(models.Model):
         db_index=True, # Añade esto para que las búsquedas sean instantáneas
         help_text="ADN único de esta entrega específica."
     )
+    # Último scrub de integridad del original (nulo = nunca verificado: prioridad máxima)
+    last_verified_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     class Meta:
         verbose_name = _("Version")
         verbose_name_plural = _("Versions")
         unique_together = ('asset', 'version_number', 'department') # Añade 'department' aquí
         ordering = ['-version_number']
+        indexes = [
+            # "Todas las versiones de COMP que fallan QC" = filtro indexado
+            models.Index(fields=['department', 'qc_passed'], name='version_dept_qc_idx'),
+            # Paginación por cursor (keyset) de la API de lectura
+            models.Index(fields=['created_at', 'id'], name='version_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.asset.name} - v{self.version_number}"
 
+    @property
+    def is_sequence(self):
+        return self.frame_start is not None
+
+    @property
+    def frame_count(self):
+        return self.frame_end - self.frame_start + 1 if self.is_sequence else None
+
     # --- Lógica de Negocio y Sensores de Estabilidad ---
 
-    def ingest_and_verify(self, file_path):
-        """Extrae ADN del archivo de forma agnóstica para cumplir con el SSOT."""
+    def ingest_and_verify(self, file_path, force_verify=None):
+        """
+        Extrae ADN del archivo de forma agnóstica para cumplir con el SSOT.
+        force_verify=True relee el original aunque la subida ya trajera su hash
+        (por defecto AXIOM_INGEST_FORCE_VERIFY).
+        """
+        if force_verify is None:
+            force_verify = settings.AXIOM_INGEST_FORCE_VERIFY
+        # Eventos PSI de esta ingesta: se envían juntos en un solo viaje a Redis
+        telemetry = []
         try:
             # 1. Sensor de Integridad (Universal)
             # Esto se ejecuta para TODO archivo, cumpliendo con la "Higiene de Datos"
-            generated_hash = calculate_sha256(file_path)
-            
+            # Si el hash ya se calculó con los bytes de la subida (upload handler, sesión
+            # por bloques, PUT en streaming), no volvemos a leer el archivo: se memoriza
+            # para su inodo definitivo y así tampoco lo releen la caché ni el CAS.
+            # Si hay que leer el archivo, aprovechamos la misma lectura para el manifiesto por bloques.
+            expected_hash = self.checksum_sha256
+            if self.is_sequence:
+                # El ADN de una secuencia sale siempre de sus frames en disco (filas SequenceFrame
+                # y QC de frames); ingest_version_task ya los hashea sobre esta misma instancia
+                from .sequences import ingest_frames
+                if getattr(self, '_frames_ingested', False):
+                    generated_hash = self.checksum_sha256
+                else:
+                    generated_hash = ingest_frames(self)
+            elif expected_hash and not force_verify:
+                generated_hash = expected_hash
+                remember_file_digest(file_path, expected_hash)
+            elif 'chunk_manifest' in self.extra_metadata:
+                generated_hash = calculate_sha256(file_path, force_verify=force_verify)
+            else:
+                generated_hash, self.extra_metadata['chunk_manifest'] = calculate_sha256_with_manifest(file_path)
+
+            if expected_hash and expected_hash != generated_hash:
+                # El archivo en disco no es el que se subió (copia truncada, disco, carrera...)
+                self.extra_metadata['ingest_error'] = (
+                    f"El archivo en disco ({generated_hash[:12]}) no coincide con el hash de la subida ({expected_hash[:12]})."
+                )
+                Version.objects.filter(pk=self.pk).update(extra_metadata=self.extra_metadata, updated_at=timezone.now())
+                engine.report_many(telemetry + [('integrity', False)])
+                return False
+
             # Verificamos si el hash coincide con lo que el sistema espera (SSOT)
             is_integrity_ok = not (self.asset.checksum_sha256 and self.asset.checksum_sha256 != generated_hash)
-            engine.report_status('integrity', success=is_integrity_ok) 
+            telemetry.append(('integrity', is_integrity_ok))
             
             if not Asset.objects.filter(checksum_sha256=generated_hash).exclude(id=self.asset.id).exists():
-                self.asset.checksum_sha256 = generated_hash
-                self.asset.save()
+                asset_checksum_changed = self.asset.checksum_sha256 != generated_hash
+                if asset_checksum_changed:
+                    self.asset.checksum_sha256 = generated_hash
+                    self.asset.save()
             else:
+                engine.report_many(telemetry)
                 return False # Evitamos el crash y salimos pacíficamente
+
+            # 1.b Almacén direccionado por contenido: el original vive una sola vez en cas/
+            # (las secuencias no pasan por el CAS: su ADN no es el hash de un archivo)
+            if settings.AXIOM_CAS_ENABLED and is_integrity_ok and not self.is_sequence:
+                self.store_original_in_cas(file_path, generated_hash)
             
             # El Asset (entidad lógica) guarda la "verdad" del contenido
             #self.asset.checksum_sha256 = generated_hash
             #self.asset.save()
             
             # 2. Captura de datos físicos básicos (Agnóstico)
-            if os.path.exists(file_path):
+            if self.filesize is None and os.path.exists(file_path):
                 self.filesize = os.path.getsize(file_path)
             
             # Preparamos la lista de campos a actualizar para optimizar el guardado
             fields_to_update = ['filesize', 'extra_metadata']
+            if self.is_sequence:
+                fields_to_update += ['frames_missing', 'frames_short']
             
             # 3. Sensor de Metadatos (Específico vs Genérico)
             # Solo intentamos extraer data de video si la categoría es VIDEO
-            if self.asset.category == Asset.AssetCategory.VIDEO:
-                meta = get_video_metadata(file_path)
+            if self.is_sequence or self.asset.category == Asset.AssetCategory.VIDEO:
+                probe_path = file_path
+                if self.is_sequence:
+                    from .sequences import first_frame_path
+                    probe_path = first_frame_path(self)
+                meta = get_video_metadata(probe_path) if probe_path else {}
+                if meta and self.is_sequence:
+                    # ffprobe vio un solo frame: la cadencia es la del proyecto
+                    meta['fps'] = self.asset.project.target_fps
+                    meta['duration'] = round(self.frame_count / meta['fps'], 3)
                 if meta:
                     self.resolution_width = meta.get('width')
                     self.resolution_height = meta.get('height')
@@ -279,14 +391,14 @@ class Version(models.Model):
                         'resolution_width', 'resolution_height', 
                         'fps', 'duration', 'color_space', 'timecode_start'
                     ])
-                    engine.report_status('storage', success=True)
+                    telemetry.append(('storage', True))
                 else:
                     # Si es video pero falla la extracción (ej. archivo corrupto)
-                    engine.report_status('storage', success=False)
+                    telemetry.append(('storage', False))
             else:
                 # Si es un activo 3D, Código o Audio, marcamos éxito basándonos en la integridad
                 self.extra_metadata['ingest_type'] = 'agnostic_transfer'
-                engine.report_status('storage', success=True)
+                telemetry.append(('storage', True))
 
             # 4. Guardado atómico de la versión
             #self.save(update_fields=fields_to_update) 
@@ -298,7 +410,17 @@ class Version(models.Model):
                 #)
                 # Nota: Usamos self.uuid porque es el identificador único que definiste
             
-            self.save(update_fields=fields_to_update)
+            # 4.b QC materializado: metadatos técnicos nuevos = QC nuevo
+            fields_to_update += self.refresh_qc()
+
+            with engine.track('db_save'):
+                self.save(update_fields=fields_to_update)
+            engine.report_many(telemetry)
+
+            # El checksum del Asset también cuenta en el QC de sus otras versiones
+            if asset_checksum_changed:
+                from .qc import recompute_qc
+                recompute_qc(Version.objects.filter(asset=self.asset).exclude(pk=self.pk))
             return True
 
         except Exception as e:
@@ -306,49 +428,41 @@ class Version(models.Model):
             print("🛑 ERROR CRÍTICO EN INGESTA:")
             traceback.print_exc()  # Esto desnudará el error en tu terminal
             
-            engine.report_status('database', success=False)
+            engine.report_many(telemetry + [('database', False)])
             return False
 
+    def store_original_in_cas(self, file_path, digest):
+        """Enlaza el original con su blob CAS (lo crea si es la primera vez que vemos ese hash)."""
+        from .storage import store_in_cas
+
+        blob_path, method = store_in_cas(file_path, digest)
+        if blob_path is None:
+            return None
+
+        ContentBlob.objects.get_or_create(
+            sha256=digest,
+            defaults={'size': os.path.getsize(file_path), 'path': blob_path, 'link_method': method}
+        )
+        self.extra_metadata['cas_blob'] = blob_path
+        return blob_path
+
+    def refresh_qc(self):
+        """Recalcula el QC materializado en memoria (el llamador decide cómo guardarlo)."""
+        from .qc import evaluate_qc
+        self.qc_errors = evaluate_qc(self)
+        self.qc_passed = not self.qc_errors
+        return ['qc_passed', 'qc_errors']
+
     def check_qc(self):
         """
         Validación de Calidad (QC) diferenciada.
         Asegura que cada activo cumpla con los estándares del proyecto según su tipo.
+        Las reglas viven en pipeline/qc.py (también en versión SQL para los listados).
         """
-        project = self.asset.project
-        errors = []
-        
-        # --- BLOQUE 1: QC PARA VIDEO ---
-        # Solo ejecutamos estas validaciones si el activo es de categoría VIDEO
-        if self.asset.category == Asset.AssetCategory.VIDEO:
-            # Validación de metadatos mínimos extraídos por FFprobe
-            if not self.fps or not self.resolution_width:
-                errors.append(_("Error de Ingesta: No se detectaron parámetros técnicos de video."))
-                return errors
-
-            # Validación de FPS contra el Target del Proyecto
-            if abs(self.fps - project.target_fps) > 0.01:
-                errors.append(f"FPS: {self.fps} (Esperado: {project.target_fps})")
-            
-            # Validación de Resolución contra el Target del Proyecto
-            if (self.resolution_width != project.target_width or 
-                self.resolution_height != project.target_height):
-                errors.append(f"Resolución: {self.resolution_width}x{self.resolution_height} (Esperada: {project.target_width}x{project.target_height})")
-
-        # --- BLOQUE 2: QC PARA CÓDIGO (Ejemplo de expansión) ---
-        elif self.asset.category == Asset.AssetCategory.CODE:
-            # Ejemplo: Validar que no sea un archivo vacío
-            if self.filesize and self.filesize == 0:
-                errors.append(_("Error: El archivo de script está vacío."))
-        
-        # --- BLOQUE 3: QC GENÉRICO (Integridad SSOT) ---
-        # Independientemente del tipo, si no hay Checksum, no hay Verdad Única
-        if not self.asset.checksum_sha256:
-            errors.append(_("Error de Integridad: El activo no posee un hash SHA-256 validado."))
-
-        return errors
+        from .qc import evaluate_qc, qc_messages
+        return qc_messages(self, evaluate_qc(self))
 
     def clean(self):
-        import hashlib
         super().clean() # Paso 0: Siempre llamar al padre
 
         # --- 1. BLOQUE DE QC (Tu original: Calidad Artística/Técnica) ---
@@ -361,13 +475,28 @@ class Version(models.Model):
 
         # --- 2. BLOQUE DE INTEGRIDAD (Tu original + Propuesta 2) ---
         if self.file and not self.pk: 
+            # Ingesta asíncrona: el hash y los duplicados se resuelven en Celery
+            # (ingest_version_task). Aquí solo recogemos el hash si ya salió gratis
+            # del upload handler; nunca leemos el archivo en el hilo web.
+            if self.transcoding_status == self.TranscodingStatus.INGESTING:
+                if not self.checksum_sha256 and not self.file._committed:
+                    self.checksum_sha256, upload_size = get_upload_checksum(self.file, compute=False)
+                    if upload_size is not None:
+                        self.filesize = upload_size
+                    self.attach_upload_manifest()
+                return
+
             # A. Cálculo del Hash (Agnóstico)
-            self.file.seek(0)
-            sha256_hash = hashlib.sha256()
-            for chunk in self.file.chunks():
-                sha256_hash.update(chunk)
-            nuevo_hash = sha256_hash.hexdigest()
-            self.file.seek(0)
+            # El upload handler ya hasheó los bytes mientras llegaban; aquí solo
+            # recogemos el resultado (o lo calculamos una única vez si no existe).
+            # Si el servidor ya conoce el hash (ej. subida por bloques ensamblada), se respeta.
+            if self.checksum_sha256:
+                nuevo_hash = self.checksum_sha256
+            else:
+                nuevo_hash, upload_size = get_upload_checksum(self.file)
+                if upload_size is not None:
+                    self.filesize = upload_size
+                self.attach_upload_manifest()
 
             # B. Persistencia (Guardamos el hash para esta versión específica)
             self.checksum_sha256 = nuevo_hash
@@ -376,51 +505,77 @@ class Version(models.Model):
             # Mantenemos esto porque tu método save() lo usa para actualizar el Asset padre
             self._temp_hash = nuevo_hash
 
-            # --- D. VALIDACIÓN GLOBAL (SSOT - Tu original) ---
-            # ¿Este archivo ya pertenece a otro Asset distinto?
-            asset_duplicado = Asset.objects.filter(checksum_sha256=nuevo_hash).exclude(id=self.asset.id).first()
-            if asset_duplicado:
-                raise ValidationError({
-                    'file': _(f"Error: Este archivo ya pertenece al Asset: '{asset_duplicado.name}'.")
-                })
-
-            # --- E. VALIDACIÓN DE REDUNDANCIA (Evolución de Datos) ---
-            # Aquí es donde la Propuesta 2 mejora tu original:
-            # En lugar de solo mirar el Asset padre, miramos TODAS las versiones previas.
-            existe_en_historial = Version.objects.filter(
-                asset=self.asset,
-                checksum_sha256=nuevo_hash
-            ).exists()
-
-            if existe_en_historial:
-                raise ValidationError({
-                    'file': _("Error de Redundancia Histórica: Este contenido ya existe en una versión anterior de este Asset. "
-                             "AXIOM exige evolución de datos en cada entrega.")
-                })
+            # D + E. Reglas SSOT (duplicados globales y redundancia histórica)
+            self.verify_integrity(nuevo_hash)
+
+    def attach_upload_manifest(self):
+        """Guarda el manifiesto por bloques que el upload handler calculó al recibir el archivo."""
+        manifest = get_upload_manifest(self.file)
+        if manifest and 'chunk_manifest' not in self.extra_metadata:
+            self.extra_metadata['chunk_manifest'] = manifest
+
+    def verify_integrity(self, digest):
+        """
+        Reglas SSOT sobre un hash: lanza ValidationError si el contenido ya pertenece
+        a otro Asset o ya existe en el historial de este Asset.
+        """
+        # --- D. VALIDACIÓN GLOBAL (SSOT - Tu original) ---
+        # ¿Este archivo ya pertenece a otro Asset distinto?
+        asset_duplicado = Asset.objects.filter(checksum_sha256=digest).exclude(id=self.asset.id).first()
+        if asset_duplicado:
+            raise ValidationError({
+                'file': _(f"Error: Este archivo ya pertenece al Asset: '{asset_duplicado.name}'.")
+            })
+
+        # --- E. VALIDACIÓN DE REDUNDANCIA (Evolución de Datos) ---
+        # Aquí es donde la Propuesta 2 mejora tu original:
+        # En lugar de solo mirar el Asset padre, miramos TODAS las versiones previas.
+        historial = Version.objects.filter(
+            asset=self.asset,
+            checksum_sha256=digest
+        )
+        if self.pk:
+            historial = historial.exclude(pk=self.pk)
+
+        if historial.exists():
+            raise ValidationError({
+                'file': _("Error de Redundancia Histórica: Este contenido ya existe en una versión anterior de este Asset. "
+                         "AXIOM exige evolución de datos en cada entrega.")
+            })
+
+    def assign_version_number(self):
+        """
+        Resuelve el linaje de una versión nueva: número consecutivo y versión padre.
+        Se puede invocar antes del save() cuando la ruta física se necesita por adelantado
+        (ej. ensamblado de subidas por bloques). Es idempotente: reserva una sola vez.
+        """
+        if getattr(self, '_lineage_assigned', False):
+            return
+
+        # Reserva atómica en el contador del (asset, depto): sin escanear versiones
+        number, parent_id = VersionCounter.reserve(self.asset, self.department, self.version_number)
+        self.version_number = number
+        
+        # AUTOMATIZACIÓN DEL PADRE: 
+        # La última versión registrada del asset/depto se convierte en el padre de esta.
+        if parent_id:
+            self.parent_version_id = parent_id
+
+        self._lineage_assigned = True
 
     def save(self, *args, **kwargs):
         # 1. Si es una versión nueva (no tiene Primary Key)
-        if not self.pk:
-            # Buscamos la ÚLTIMA instancia física (el objeto) para este asset y depto
-            last_instance = self.__class__.objects.filter(
-                asset=self.asset, 
-                department=self.department
-            ).order_by('version_number').last()
-            
-            # Asignación automática del número si no viene de otro lado
-            if self.version_number is None:
-                self.version_number = (last_instance.version_number + 1) if last_instance else 1
-            
-            # AUTOMATIZACIÓN DEL PADRE: 
-            # Si existe una instancia previa, se convierte automáticamente en el padre de esta.
-            if last_instance:
-                self.parent_version = last_instance
+        if not self.pk and not getattr(self, '_lineage_assigned', False):
+            self.assign_version_number()
             
         # 2. Ejecutamos la validación completa (Aquí es donde truena si el HASH falla)
         self.full_clean()
         
         # 3. Guardado final
+        is_new = self.pk is None
         super().save(*args, **kwargs) 
+        if is_new:
+            VersionCounter.register_latest(self)
         # --- ÚLTIMO PASO: Actualizar el Asset ---
         # Si calculamos un hash en el clean, lo guardamos en el Asset padre
         if hasattr(self, '_temp_hash'):
@@ -512,4 +667,411 @@ class SystemHealth(models.Model):
         verbose_name_plural = "System Health"
 
     def __str__(self):
-        return f"Health Status: {self.last_diagnostic.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"Health Status: {self.last_diagnostic.strftime('%Y-%m-%d %H:%M')}"
+
+
+# --- 7. Subidas por Bloques (Resumibles) ---
+class UploadSession(models.Model):
+    """
+    Sesión de subida por bloques. Los bloques se escriben en su offset dentro de un
+    único archivo de staging (en el mismo volumen que MEDIA_ROOT), así al finalizar
+    basta un rename para moverlo a su ruta definitiva, sin una segunda copia.
+    """
+    class SessionStatus(models.TextChoices):
+        OPEN = 'OPEN', _('Open')
+        ASSEMBLING = 'ASSEMBLING', _('Assembling')  # "complete" en curso: hash y rename fuera del candado
+        COMPLETED = 'COMPLETED', _('Completed')
+        FAILED = 'FAILED', _('Failed')
+        EXPIRED = 'EXPIRED', _('Expired')
+
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='upload_sessions')
+    asset_name = models.CharField(max_length=255)
+    department = models.CharField(max_length=4, choices=Version.Department.choices, default=Version.Department.GENERIC)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # Hash completo declarado por el cliente (opcional, se contrasta al finalizar)
+    expected_sha256 = models.CharField(max_length=64, blank=True, null=True)
+
+    status = models.CharField(max_length=20, choices=SessionStatus.choices, default=SessionStatus.OPEN)
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    version = models.ForeignKey(Version, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.uuid} ({self.filename})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    @property
+    def staging_path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', f"{self.uuid}.part")
+
+    def chunk_path(self, index):
+        """
+        Archivo temporal de un bloque mientras se valida (junto al staging: mismo volumen).
+        Único por petición: dos reintentos simultáneos del mismo bloque no se pisan.
+        """
+        return f"{self.staging_path}.{index}.{uuid.uuid4().hex[:8]}.chunk"
+
+    def chunk_bounds(self, index):
+        """Devuelve (offset, longitud esperada) del bloque `index`."""
+        offset = index * self.chunk_size
+        return offset, max(0, min(self.chunk_size, self.total_size - offset))
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    checksum_sha256 = models.CharField(max_length=64)
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('session', 'index')
+        ordering = ['index']
+
+    def __str__(self):
+        return f"{self.session.uuid} #{self.index}"
+
+
+# --- 8. Almacén Direccionado por Contenido (CAS) ---
+class ContentBlob(models.Model):
+    """
+    Un original físico, guardado una sola vez en MEDIA_ROOT/cas/ab/cd/<sha256>.
+    Las rutas legibles de cada proyecto (get_version_path) son hard links / reflinks
+    a este blob, así que compartir un plate entre proyectos no cuesta bytes ni copias.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.BigIntegerField()
+    path = models.CharField(max_length=100)  # Relativa a MEDIA_ROOT
+    link_method = models.CharField(max_length=10, default='hardlink')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Los scrubs de integridad verifican cada blob una vez, no cada ruta enlazada
+    last_verified_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.size} bytes)"
+
+
+# --- 9. Caché de Digests (SHA-256 por identidad física) ---
+class FileDigest(models.Model):
+    """
+    Último SHA-256 conocido de un inodo. Si (device, inode, size, mtime_ns) no cambió,
+    el contenido tampoco: re-ingestas y reprocesos no vuelven a leer el archivo.
+    """
+    device = models.BigIntegerField()
+    inode = models.BigIntegerField()
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, db_index=True)
+    path = models.CharField(max_length=500, blank=True)
+    verified_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('device', 'inode')
+
+    def __str__(self):
+        return f"{self.path or self.inode} → {self.sha256[:12]}"
+
+
+# --- 10. Contador de Versiones (Asignación O(1) y sin carreras) ---
+class VersionCounter(models.Model):
+    """
+    Último número reservado por (asset, departamento) y la versión más reciente guardada.
+    Las publicaciones paralelas del mismo asset se serializan sobre esta fila
+    (select_for_update) en lugar de chocar con el unique_together de Version.
+    Un número reservado cuya subida falla se pierde (puede quedar un hueco, nunca un duplicado).
+    El padre que da la reserva es provisional: el definitivo lo fija link_lineage() al guardar.
+    """
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='version_counters')
+    department = models.CharField(max_length=4, choices=Version.Department.choices)
+    last_number = models.PositiveIntegerField(default=0)
+    latest_version = models.ForeignKey(
+        Version, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+
+    class Meta:
+        unique_together = ('asset', 'department')
+
+    def __str__(self):
+        return f"{self.asset.name} [{self.department}] → v{self.last_number:03d}"
+
+    @classmethod
+    def reserve(cls, asset, department, number=None):
+        """
+        Reserva el siguiente número (o registra `number` si viene dado).
+        Devuelve (número, id de la versión padre provisional).
+        """
+        with transaction.atomic():
+            counter = cls._locked(asset, department)
+            if number is None:
+                number = counter.last_number + 1
+            if number > counter.last_number:
+                counter.last_number = number
+                counter.save(update_fields=['last_number'])
+
+            parent_id = counter.latest_version_id
+            if parent_id is None and number > 1:
+                # La última versión fue borrada: buscamos la anterior (caso raro)
+                parent_id = Version.objects.filter(
+                    asset=asset, department=department, version_number__lt=number
+                ).order_by('-version_number').values_list('pk', flat=True).first()
+        return number, parent_id
+
+    @classmethod
+    def reserve_many(cls, requests):
+        """
+        Reserva bloques de números consecutivos para varios pares en una sola pasada
+        (publicación por lotes). `requests` = {(asset_id, depto): cantidad}.
+        Devuelve {(asset_id, depto): (primer número, id de la versión padre)}.
+        """
+        with transaction.atomic():
+            cls._seed_missing(requests.keys())
+            # Orden fijo de bloqueo: dos lotes simultáneos nunca se bloquean en cruz
+            counters = {
+                (counter.asset_id, counter.department): counter
+                for counter in cls.objects.select_for_update().filter(cls._pairs(requests)).order_by('pk')
+            }
+            reserved = {}
+            for key, count in requests.items():
+                counter = counters[key]
+                reserved[key] = (counter.last_number + 1, counter.latest_version_id)
+                counter.last_number += count
+            cls.objects.bulk_update([counters[key] for key in requests], ['last_number'])
+        return reserved
+
+    @classmethod
+    def register_latest(cls, version):
+        """Tras guardar una versión: fija su linaje y pasa a ser la más reciente si su número es el mayor."""
+        with transaction.atomic():
+            cls._locked(version.asset, version.department)
+            cls.link_lineage([version])
+            cls.objects.filter(asset_id=version.asset_id, department=version.department).filter(
+                models.Q(latest_version__isnull=True) |
+                models.Q(latest_version__version_number__lt=version.version_number)
+            ).update(latest_version=version)
+
+    @classmethod
+    def register_latest_many(cls, versions):
+        """register_latest() por conjuntos: una lectura bloqueante y un bulk_update."""
+        newest = {}
+        for version in versions:
+            key = (version.asset_id, version.department)
+            if key not in newest or version.version_number > newest[key].version_number:
+                newest[key] = version
+
+        changed = []
+        for counter in cls.objects.select_for_update(of=('self',)).select_related('latest_version').filter(
+            cls._pairs(newest)
+        ).order_by('pk'):
+            version = newest.get((counter.asset_id, counter.department))
+            if version and (counter.latest_version is None or
+                            counter.latest_version.version_number < version.version_number):
+                counter.latest_version = version
+                changed.append(counter)
+        cls.link_lineage(versions)
+        cls.objects.bulk_update(changed, ['latest_version'])
+
+    @staticmethod
+    def link_lineage(versions):
+        """
+        Padres definitivos de versiones recién guardadas. Se llama con el contador del par
+        bloqueado, así que ve todo lo que otras publicaciones ya guardaron:
+        - el padre es la versión guardada inmediatamente anterior en número (dos reservas
+          simultáneas reciben el mismo padre provisional);
+        - la siguiente versión ya guardada, si se adelantó, pasa a colgar de esta.
+        """
+        bounds = {}
+        for version in versions:
+            key = (version.asset_id, version.department)
+            low, high = bounds.get(key, (version.version_number, version.version_number))
+            bounds[key] = (min(low, version.version_number), max(high, version.version_number))
+
+        # Tres consultas para todo el lote: las versiones desde el número más bajo de cada par
+        # y la anterior a ese número (el número y luego su id)
+        def pairs(lookup):
+            condition = models.Q(pk__in=[])
+            for (asset_id, department), (low, _) in bounds.items():
+                condition |= models.Q(asset_id=asset_id, department=department, **{lookup: low})
+            return Version.objects.filter(condition)
+
+        rows = {}
+        for pk, asset_id, department, number, parent_id in pairs('version_number__gte').order_by(
+            'version_number'
+        ).values_list('pk', 'asset_id', 'department', 'version_number', 'parent_version_id'):
+            rows.setdefault((asset_id, department), []).append((pk, number, parent_id))
+
+        previous = pairs('version_number__lt').values('asset_id', 'department').annotate(number=models.Max('version_number'))
+        condition = models.Q(pk__in=[])
+        for row in previous:
+            condition |= models.Q(asset_id=row['asset_id'], department=row['department'], version_number=row['number'])
+        before = {(asset_id, department): pk for pk, asset_id, department in
+                  Version.objects.filter(condition).values_list('pk', 'asset_id', 'department')}
+
+        fixed, now = {}, timezone.now()
+        for key, (_, high) in bounds.items():
+            expected = before.get(key)
+            for pk, number, parent_id in rows.get(key, []):
+                if parent_id != expected:
+                    fixed[pk] = expected
+                if number > high:
+                    break  # La siguiente ya guardada es la última que puede cambiar
+                expected = pk
+        if fixed:
+            Version.objects.bulk_update(
+                [Version(pk=pk, parent_version_id=parent_id, updated_at=now) for pk, parent_id in fixed.items()],
+                ['parent_version', 'updated_at']
+            )
+
+        for version in versions:
+            if version.pk in fixed:
+                version.parent_version_id = fixed[version.pk]
+
+    @staticmethod
+    def _pairs(keys):
+        """Filtro de exactamente esos pares (asset, depto): el resto de departamentos no se bloquea."""
+        condition = models.Q(pk__in=[])
+        for asset_id, department in keys:
+            condition |= models.Q(asset_id=asset_id, department=department)
+        return condition
+
+    @classmethod
+    def _seed_missing(cls, keys):
+        """Crea (en bloque) los contadores que aún no existen, partiendo de las versiones ya guardadas."""
+        keys = set(keys)
+        asset_ids = {asset_id for asset_id, _ in keys}
+        missing = keys - set(cls.objects.filter(asset_id__in=asset_ids).values_list('asset_id', 'department'))
+        if not missing:
+            return
+
+        latest = {}
+        for pk, asset_id, department, number in Version.objects.filter(
+            asset_id__in={asset_id for asset_id, _ in missing}, version_number__isnull=False
+        ).order_by('version_number').values_list('pk', 'asset_id', 'department', 'version_number'):
+            latest[(asset_id, department)] = (pk, number)
+
+        seeds = []
+        for asset_id, department in missing:
+            pk, number = latest.get((asset_id, department), (None, 0))
+            seeds.append(cls(asset_id=asset_id, department=department, last_number=number, latest_version_id=pk))
+        cls.objects.bulk_create(seeds, ignore_conflicts=True)
+
+    @classmethod
+    def _locked(cls, asset, department):
+        counter, created = cls.objects.select_for_update().get_or_create(
+            asset=asset, department=department
+        )
+        if created:
+            # Primer uso del par (asset, depto): partimos de lo que ya existe en disco/DB
+            latest = Version.objects.filter(
+                asset=asset, department=department
+            ).order_by('-version_number').first()
+            if latest:
+                counter.last_number = latest.version_number
+                counter.latest_version = latest
+                counter.save(update_fields=['last_number', 'latest_version'])
+        return counter
+
+
+# --- 11. Drop Folders (Ingesta sin intervención) ---
+class DropFolderEntry(models.Model):
+    """
+    Estado de cada archivo visto en un drop folder. Sobrevive a reinicios del watcher:
+    lo ya ingerido no se vuelve a mirar, lo pendiente conserva su historial de tamaño
+    para la comprobación de estabilidad, y lo rechazado o sin destino se reintenta en
+    `retry_at` (ej. el proyecto o el usuario se crean después).
+    """
+    class EntryStatus(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')          # Visto, esperando a que deje de crecer
+        INGESTED = 'INGESTED', _('Ingested')
+        REJECTED = 'REJECTED', _('Rejected')
+        UNMAPPED = 'UNMAPPED', _('Unmapped')       # Ninguna regla lo asigna a un proyecto
+
+    directory = models.CharField(max_length=1000, db_index=True)
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    status = models.CharField(max_length=10, choices=EntryStatus.choices, default=EntryStatus.PENDING, db_index=True)
+    version = models.ForeignKey(Version, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True)
+
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    # Último momento en que cambió el tamaño o el mtime (base de la estabilidad)
+    changed_at = models.DateTimeField(default=timezone.now)
+    # Reintentos de REJECTED / UNMAPPED (espera creciente entre intentos)
+    attempts = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        unique_together = ('directory', 'name')
+        verbose_name_plural = "Drop folder entries"
+
+    def __str__(self):
+        return f"{os.path.join(self.directory, self.name)} [{self.status}]"
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.name)
+
+
+class DropFolderDirectory(models.Model):
+    """mtime de cada directorio escaneado: si no cambió, su lista de archivos tampoco."""
+    path = models.CharField(max_length=1000, unique=True)
+    mtime_ns = models.BigIntegerField()
+    scanned_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
+
+
+# --- 12. Scrub de Integridad (Checkpoint) ---
+class ScrubRun(models.Model):
+    """
+    Una pasada completa de verificación de originales. El avance real vive en
+    Version.last_verified_at (lo verificado sale de la cola); esta fila acumula
+    contadores y permite reanudar la misma pasada tras un reinicio.
+    """
+    class RunStatus(models.TextChoices):
+        RUNNING = 'RUNNING', _('Running')
+        COMPLETED = 'COMPLETED', _('Completed')
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    # Versiones verificadas antes de este instante entran en la pasada
+    cutoff = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=RunStatus.choices, default=RunStatus.RUNNING)
+
+    files_checked = models.PositiveIntegerField(default=0)
+    bytes_checked = models.BigIntegerField(default=0)
+    failures = models.JSONField(default=list, blank=True)  # [{'version': id, 'status': ..., 'path': ...}]
+
+    def __str__(self):
+        return f"Scrub {self.started_at:%Y-%m-%d %H:%M} [{self.status}] {self.files_checked} archivos"
+
+
+
+# --- 13. Frames de Secuencias (ADN por frame) ---
+class SequenceFrame(models.Model):
+    """
+    Un frame de una Versión de secuencia. El manifiesto vive aquí y no en extra_metadata:
+    una secuencia larga son decenas de miles de filas que la API y el admin no deben arrastrar.
+    El scrub re-hashea cada frame contra su fila.
+    """
+    version = models.ForeignKey(Version, on_delete=models.CASCADE, related_name='frames')
+    frame = models.PositiveIntegerField()
+    size = models.BigIntegerField()
+    checksum_sha256 = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ('version', 'frame')
+        ordering = ['frame']
+
+    def __str__(self):
+        return f"{self.version} #{self.frame}"
@@ -0,0 +1,412 @@
+# Publicación por lotes de AXIOM: cientos de Versiones en una sola petición.
+# Cada paso trabaja por conjuntos (assets, duplicados SSOT, números de versión e INSERT)
+# y la ingesta pesada (hash/ffprobe/transcode) se reparte en un único group de Celery.
+
+import json
+import logging
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import default_storage
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from .models import Asset, Version, VersionCounter, get_version_path
+from .sequences import parse_pattern, printf_pattern, scan_frames
+from .tasks import enqueue_ingest
+
+logger = logging.getLogger(__name__)
+
+# Motivo de cada rechazo del lote. Solo los que no son culpa del cliente llegan al PSI
+# (un manifiesto mal escrito no dice nada de la salud del pipeline).
+REJECT_INVALID = 'invalid'      # Elemento mal formado / ruta fuera del staging
+REJECT_DUPLICATE = 'duplicate'  # Reglas SSOT (sensor integrity)
+REJECT_STORAGE = 'storage'      # No se pudo mover el archivo
+REJECT_DATABASE = 'database'    # El INSERT del lote falló
+PSI_SENSOR_BY_REASON = {REJECT_DUPLICATE: 'integrity', REJECT_STORAGE: 'storage', REJECT_DATABASE: 'database'}
+
+class DuplicateContent(ValueError):
+    """Rechazo por las reglas SSOT (el resto de ValueError son peticiones inválidas)."""
+
+def get_category_from_extension(filename):
+    """Detecta la categoría del archivo basado en su extensión."""
+    ext = os.path.splitext(filename)[1].lower()
+    mapping = {
+        '.mp4': Asset.AssetCategory.VIDEO, '.mov': Asset.AssetCategory.VIDEO,
+        '.obj': Asset.AssetCategory.MODEL_3D, '.fbx': Asset.AssetCategory.MODEL_3D,
+        '.usd': Asset.AssetCategory.MODEL_3D, '.abc': Asset.AssetCategory.MODEL_3D,
+        '.py': Asset.AssetCategory.CODE, '.json': Asset.AssetCategory.CODE,
+    }
+    return mapping.get(ext, Asset.AssetCategory.OTHER)
+
+def read_batch_manifest(data):
+    """
+    Lista de elementos del lote. Acepta JSON ({"items": [...]}) o multipart con un
+    campo `manifest` (el mismo JSON como texto) y los archivos en sus propios campos.
+    Cada elemento: {"asset_name", "department", "file": <campo multipart> | "path": <ruta en staging>, "sha256"}.
+    """
+    manifest = data.get('manifest', data)
+    if isinstance(manifest, str):
+        try:
+            manifest = json.loads(manifest)
+        except json.JSONDecodeError:
+            raise ValueError("El campo 'manifest' no es JSON válido.")
+
+    items = manifest.get('items') if isinstance(manifest, dict) else manifest
+    if not isinstance(items, list) or not items:
+        raise ValueError("El lote no contiene elementos ('items').")
+    if len(items) > settings.AXIOM_BATCH_MAX_ITEMS:
+        raise ValueError(f"Máximo {settings.AXIOM_BATCH_MAX_ITEMS} elementos por lote.")
+    return items
+
+def resolve_staged_path(relative_path):
+    """Ruta absoluta de un archivo pre-subido; nunca fuera de AXIOM_STAGING_ROOT."""
+    root = os.path.realpath(settings.AXIOM_STAGING_ROOT)
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError("La ruta sale del área de staging.")
+    if not os.path.isfile(path):
+        raise ValueError("El archivo no existe en staging.")
+    return path
+
+def resolve_staged_dir(relative_path):
+    """Directorio de staging (para secuencias); nunca fuera de AXIOM_STAGING_ROOT."""
+    root = os.path.realpath(settings.AXIOM_STAGING_ROOT)
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError("La ruta sale del área de staging.")
+    if not os.path.isdir(path):
+        raise ValueError("El directorio de la secuencia no existe en staging.")
+    return path
+
+def _prepare_item(item, files, used_fields, resolve_path):
+    """Valida un elemento del manifiesto. Devuelve el candidato normalizado o lanza ValueError."""
+    if not isinstance(item, dict):
+        raise ValueError("Elemento mal formado.")
+    asset_name = item.get('asset_name')
+    department = item.get('department', Version.Department.GENERIC)
+    if not asset_name:
+        raise ValueError("Falta 'asset_name'.")
+    if department not in Version.Department.values:
+        raise ValueError(f"Departamento desconocido: {department}")
+
+    candidate = {'asset_name': asset_name, 'department': department, 'sha256': None, 'manifest': None}
+
+    if item.get('file'):
+        field = item['file']
+        upload = files.get(field)
+        if upload is None:
+            raise ValueError(f"No se recibió el archivo '{field}'.")
+        if field in used_fields:
+            raise ValueError(f"El archivo '{field}' aparece dos veces en el lote.")
+        used_fields.add(field)
+        # El upload handler ya hasheó los bytes al recibirlos: ese digest es confiable
+        candidate.update(
+            upload=upload, filename=upload.name, size=upload.size,
+            sha256=getattr(upload, 'sha256_checksum', None), manifest=getattr(upload, 'chunk_manifest', None),
+        )
+    elif item.get('path'):
+        path = resolve_path(item['path'])
+        candidate.update(staged_path=path, filename=os.path.basename(path), size=os.path.getsize(path))
+    else:
+        raise ValueError("Cada elemento necesita 'file' o 'path'.")
+
+    # Hash declarado por el cliente: sirve para descartar duplicados ya, y el worker lo contrasta
+    declared = (item.get('sha256') or '').lower() or None
+    if declared and candidate['sha256'] and declared != candidate['sha256']:
+        raise ValueError("El hash del archivo no coincide con el declarado.")
+    candidate['declared_sha256'] = declared if not candidate['sha256'] else None
+    return candidate
+
+def _resolve_assets(project, candidates):
+    """{nombre: Asset} del proyecto; los que faltan se crean con un solo INSERT."""
+    names = {c['asset_name'] for c in candidates}
+    assets = {asset.name: asset for asset in Asset.objects.filter(project=project, name__in=names)}
+
+    missing = {}
+    for c in candidates:
+        if c['asset_name'] not in assets:
+            missing.setdefault(c['asset_name'], c.get('category') or get_category_from_extension(c['filename']))
+    if missing:
+        Asset.objects.bulk_create(
+            [Asset(project=project, name=name, category=category) for name, category in missing.items()],
+            ignore_conflicts=True  # Otro lote pudo crearlo entre la lectura y el INSERT
+        )
+        assets.update({asset.name: asset for asset in Asset.objects.filter(project=project, name__in=missing)})
+
+    for asset in assets.values():
+        asset.project = project  # get_version_path no vuelve a consultar el proyecto
+    return assets
+
+def _integrity_errors(candidates):
+    """
+    Reglas SSOT de verify_integrity() para todo el lote: una consulta IN por regla
+    sobre todos los checksums conocidos, más duplicados dentro del propio lote.
+    Devuelve {posición del candidato: mensaje}.
+    """
+    digest_of = {i: c['sha256'] or c['declared_sha256'] for i, c in enumerate(candidates)}
+    digests = {d for d in digest_of.values() if d}
+    if not digests:
+        return {}
+
+    owners = {
+        checksum: (asset_id, name)
+        for checksum, asset_id, name in Asset.objects.filter(
+            checksum_sha256__in=digests
+        ).values_list('checksum_sha256', 'id', 'name')
+    }
+    history = set(Version.objects.filter(checksum_sha256__in=digests).values_list('asset_id', 'checksum_sha256'))
+
+    errors, seen = {}, set()
+    for i, c in enumerate(candidates):
+        digest = digest_of[i]
+        if not digest:
+            continue
+        asset_id = c['asset'].id
+        owner = owners.get(digest)
+        if owner and owner[0] != asset_id:
+            errors[i] = f"Este archivo ya pertenece al Asset: '{owner[1]}'."
+        elif (asset_id, digest) in history:
+            errors[i] = "Redundancia histórica: este contenido ya existe en una versión anterior de este Asset."
+        elif digest in seen:
+            errors[i] = "Contenido duplicado dentro del mismo lote."
+        seen.add(digest)
+    return errors
+
+def _move_into_place(candidate, relative_path):
+    """Lleva el archivo a su ruta definitiva (rename si es el mismo volumen, nunca dos copias)."""
+    final_path = default_storage.path(relative_path)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+
+    if 'staged_path' in candidate:
+        file_move_safe(candidate['staged_path'], final_path)
+        return
+    upload = candidate['upload']
+    if hasattr(upload, 'temporary_file_path'):
+        file_move_safe(upload.temporary_file_path(), final_path)
+    else:
+        with open(final_path, 'wb') as destination:
+            for chunk in upload.chunks():
+                destination.write(chunk)
+
+def _undo_move(candidate, relative_path):
+    """Deshace _move_into_place si el INSERT del lote falla."""
+    final_path = default_storage.path(relative_path)
+    try:
+        if 'staged_path' in candidate:
+            file_move_safe(final_path, candidate['staged_path'])
+        else:
+            os.remove(final_path)
+    except OSError as e:
+        logger.error(f"Lote: no se pudo revertir {final_path}: {e}")
+
+def publish_batch(project, user, items, files=None, resolve_path=resolve_staged_path):
+    """
+    Publica un lote de elementos en el proyecto. La ingesta siempre es asíncrona
+    (INGESTING + ingest_version_task), sin importar AXIOM_ASYNC_INGEST: hashear cientos
+    de archivos en el hilo web no es opción.
+    `resolve_path` valida las rutas de los elementos 'path' (por defecto: dentro del staging).
+    Devuelve un resultado por elemento, en el orden del manifiesto.
+    """
+    files = files or {}
+    results = [{'index': i, 'asset_name': None, 'status': 'rejected'} for i in range(len(items))]
+
+    # 1. Validación individual (sin tocar la DB)
+    candidates, used_fields = [], set()
+    for i, item in enumerate(items):
+        results[i]['asset_name'] = item.get('asset_name') if isinstance(item, dict) else None
+        try:
+            candidate = _prepare_item(item, files, used_fields, resolve_path)
+        except (ValueError, OSError) as e:
+            results[i].update(error=str(e), reason=REJECT_INVALID)
+            continue
+        candidate['index'] = i
+        candidates.append(candidate)
+
+    if not candidates:
+        return results
+
+    # 2. Assets en bloque
+    assets = _resolve_assets(project, candidates)
+    for c in candidates:
+        c['asset'] = assets[c['asset_name']]
+
+    # 3. Duplicados SSOT en bloque
+    errors = _integrity_errors(candidates)
+    for position, message in errors.items():
+        results[candidates[position]['index']].update(error=message, reason=REJECT_DUPLICATE)
+    candidates = [c for position, c in enumerate(candidates) if position not in errors]
+    if not candidates:
+        return results
+
+    # 4. Números de versión en bloque (un bloqueo por par asset/depto)
+    reserved = VersionCounter.reserve_many(Counter((c['asset'].id, c['department']) for c in candidates))
+    next_number = {key: first for key, (first, _) in reserved.items()}
+
+    # 5. Rutas finales + movimiento de archivos
+    versions, placed = [], []
+    for c in candidates:
+        key = (c['asset'].id, c['department'])
+        version = Version(
+            asset=c['asset'],
+            department=c['department'],
+            uploaded_by=user,
+            version_number=next_number[key],
+            checksum_sha256=c['sha256'],
+            filesize=c['size'],
+            transcoding_status=Version.TranscodingStatus.INGESTING,
+        )
+        version._lineage_assigned = True
+        next_number[key] += 1
+        if c['manifest']:
+            version.extra_metadata['chunk_manifest'] = c['manifest']
+        if c['declared_sha256']:
+            version.extra_metadata['declared_sha256'] = c['declared_sha256']
+
+        relative_path = default_storage.get_available_name(get_version_path(version, c['filename']))
+        try:
+            _move_into_place(c, relative_path)
+        except OSError as e:
+            results[c['index']].update(error=f"No se pudo mover el archivo: {e}", reason=REJECT_STORAGE)
+            continue
+        version.file.name = relative_path
+        versions.append(version)
+        placed.append((c, relative_path))
+
+    if not versions:
+        return results
+
+    # 6. INSERT en bloque + linaje + contadores, todo o nada
+    try:
+        with transaction.atomic():
+            Version.objects.bulk_create(versions)
+
+            previous = {}
+            for version in versions:
+                key = (version.asset_id, version.department)
+                version.parent_version_id = previous.get(key, reserved[key][1])
+                previous[key] = version.pk
+            Version.objects.bulk_update(versions, ['parent_version'])
+            VersionCounter.register_latest_many(versions)
+
+            version_ids = [version.pk for version in versions]
+            transaction.on_commit(lambda: enqueue_ingest(version_ids))
+    except DatabaseError as e:
+        logger.error(f"Lote rechazado en la DB: {e}")
+        for c, relative_path in placed:
+            _undo_move(c, relative_path)
+            results[c['index']].update(error=f"Error de base de datos: {e}", reason=REJECT_DATABASE)
+        return results
+
+    for (c, _), version in zip(placed, versions):
+        results[c['index']].update(
+            status='accepted', version_id=version.pk, version_number=version.version_number, filesize=version.filesize
+        )
+    return results
+
+# --- Secuencias de imágenes (una Versión por rango de frames) ---
+
+def _frame_bound(item, key, default):
+    value = item.get(key)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{key}' debe ser un número de frame.")
+    if value < 0:
+        raise ValueError(f"'{key}' no puede ser negativo.")
+    return value
+
+def publish_sequence(project, user, item, resolve_dir=resolve_staged_dir):
+    """
+    Publica una secuencia pre-subida en staging como una sola Versión.
+    `item` = {"asset_name", "department", "path": "shot010/comp/shot_comp.%04d.exr",
+    "frame_start", "frame_end", "sha256"} (rango y hash opcionales: por defecto el rango
+    de frames presentes). Los frames se mueven (rename) junto al resto de versiones y la
+    ingesta (hash por frame, QC de huecos) corre en Celery. Lanza ValueError si se rechaza.
+    """
+    asset_name = item.get('asset_name')
+    department = item.get('department', Version.Department.GENERIC)
+    if not asset_name:
+        raise ValueError("Falta 'asset_name'.")
+    if department not in Version.Department.values:
+        raise ValueError(f"Departamento desconocido: {department}")
+    if not item.get('path'):
+        raise ValueError("Falta 'path' (patrón de la secuencia en staging).")
+
+    directory, pattern = os.path.split(item['path'])
+    prefix, padding, suffix = parse_pattern(pattern)
+    source_dir = resolve_dir(directory)
+    present = scan_frames(source_dir, pattern)
+    if not present:
+        raise ValueError("No se encontró ningún frame de la secuencia.")
+
+    frame_start = _frame_bound(item, 'frame_start', min(present))
+    frame_end = _frame_bound(item, 'frame_end', max(present))
+    if frame_end < frame_start:
+        raise ValueError("'frame_end' es anterior a 'frame_start'.")
+    if frame_end - frame_start + 1 > settings.AXIOM_SEQUENCE_MAX_FRAMES:
+        raise ValueError(f"Máximo {settings.AXIOM_SEQUENCE_MAX_FRAMES} frames por secuencia.")
+    frames = {frame: name for frame, name in present.items() if frame_start <= frame <= frame_end}
+    if not frames:
+        raise ValueError("Ningún frame cae dentro del rango pedido.")
+
+    declared = (item.get('sha256') or '').lower() or None
+    candidate = {
+        'asset_name': asset_name, 'filename': pattern, 'category': Asset.AssetCategory.VIDEO,
+        'sha256': None, 'declared_sha256': declared,
+    }
+    candidate['asset'] = _resolve_assets(project, [candidate])[asset_name]
+    error = _integrity_errors([candidate]).get(0)
+    if error:
+        raise DuplicateContent(error)
+
+    version = Version(
+        asset=candidate['asset'],
+        department=department,
+        uploaded_by=user,
+        frame_start=frame_start,
+        frame_end=frame_end,
+        transcoding_status=Version.TranscodingStatus.INGESTING,
+    )
+    if declared:
+        version.extra_metadata['declared_sha256'] = declared
+    version.assign_version_number()
+
+    # Misma nomenclatura que un archivo único, con el token de frame antes de la extensión
+    stem, ext = os.path.splitext(get_version_path(version, pattern))
+    relative_pattern = printf_pattern(f"{stem}.", padding or 4, ext)
+    final_pattern = default_storage.path(relative_pattern)
+    os.makedirs(os.path.dirname(final_pattern), exist_ok=True)
+
+    moved = []
+    try:
+        for frame, name in sorted(frames.items()):
+            file_move_safe(os.path.join(source_dir, name), final_pattern % frame)
+            moved.append(frame)
+        version.file.name = relative_pattern
+        with transaction.atomic():
+            version.save()  # La señal encola ingest_version_task al confirmar
+    except (OSError, DatabaseError, ValidationError) as e:
+        logger.error(f"Secuencia rechazada ({item['path']}): {e}")
+        for frame in moved:
+            try:
+                file_move_safe(final_pattern % frame, os.path.join(source_dir, frames[frame]))
+            except OSError as undo_error:
+                logger.error(f"Secuencia: no se pudo revertir el frame {frame}: {undo_error}")
+        if isinstance(e, ValidationError):
+            raise ValueError(" ".join(e.messages))
+        raise ValueError(f"No se pudo publicar la secuencia: {e}")
+
+    return {
+        'status': 'accepted',
+        'asset_name': asset_name,
+        'version_id': version.pk,
+        'version_number': version.version_number,
+        'frame_start': frame_start,
+        'frame_end': frame_end,
+        'frames_received': len(frames),
+    }
@@ -0,0 +1,147 @@
+# Reglas de QC de AXIOM en dos formas equivalentes:
+#  - evaluate_qc(): sobre una instancia (check_qc, clean, ingesta)
+#  - annotate_qc(): las mismas reglas como anotaciones SQL (listados del admin sin N+1)
+# Cualquier cambio de regla debe hacerse en ambas.
+
+from django.db.models import BooleanField, Case, F, Q, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+# Códigos de error (estables: se pueden guardar y filtrar)
+QC_MISSING_TECH = 'missing_tech'
+QC_FPS_MISMATCH = 'fps_mismatch'
+QC_RESOLUTION_MISMATCH = 'resolution_mismatch'
+QC_MISSING_CHECKSUM = 'missing_checksum'
+QC_FRAMES_MISSING = 'frames_missing'
+QC_FRAMES_SHORT = 'frames_short'
+
+QC_CODES = (
+    QC_MISSING_TECH, QC_FPS_MISMATCH, QC_RESOLUTION_MISMATCH, QC_MISSING_CHECKSUM,
+    QC_FRAMES_MISSING, QC_FRAMES_SHORT,
+)
+FPS_TOLERANCE = 0.01
+
+def evaluate_qc(version):
+    """Códigos de QC fallidos de una Versión (lista vacía = PASS)."""
+    from .models import Asset
+
+    project = version.asset.project
+    codes = []
+
+    # --- BLOQUE 1: QC PARA VIDEO ---
+    if version.asset.category == Asset.AssetCategory.VIDEO:
+        # Sin metadatos técnicos no tiene sentido seguir evaluando
+        if not version.fps or not version.resolution_width:
+            return [QC_MISSING_TECH]
+        if abs(version.fps - project.target_fps) > FPS_TOLERANCE:
+            codes.append(QC_FPS_MISMATCH)
+        if (version.resolution_width != project.target_width or
+                version.resolution_height != project.target_height):
+            codes.append(QC_RESOLUTION_MISMATCH)
+
+    # --- BLOQUE 2: QC PARA CÓDIGO ---
+    # (La regla de "script vacío" de check_qc nunca se cumple: `filesize and filesize == 0`.)
+
+    # --- BLOQUE 3: QC GENÉRICO (Integridad SSOT) ---
+    if not version.asset.checksum_sha256:
+        codes.append(QC_MISSING_CHECKSUM)
+
+    # --- BLOQUE 4: QC DE SECUENCIAS (huecos y frames cortados) ---
+    if version.frames_missing:
+        codes.append(QC_FRAMES_MISSING)
+    if version.frames_short:
+        codes.append(QC_FRAMES_SHORT)
+
+    return codes
+
+def qc_rule_conditions():
+    """Reglas de QC como condiciones Q sobre Version, con la misma semántica que evaluate_qc()."""
+    from .models import Asset
+
+    is_video = Q(asset__category=Asset.AssetCategory.VIDEO)
+    missing_tech = is_video & (
+        Q(fps__isnull=True) | Q(fps=0) | Q(resolution_width__isnull=True) | Q(resolution_width=0)
+    )
+    target_fps = F('asset__project__target_fps')
+    fps_mismatch = is_video & ~missing_tech & (
+        Q(fps__gt=target_fps + FPS_TOLERANCE) | Q(fps__lt=target_fps - FPS_TOLERANCE)
+    )
+    resolution_mismatch = is_video & ~missing_tech & (
+        ~Q(resolution_width=F('asset__project__target_width')) |
+        Q(resolution_height__isnull=True) |
+        ~Q(resolution_height=F('asset__project__target_height'))
+    )
+    # Si faltan metadatos de video, evaluate_qc sale antes de revisar el checksum
+    missing_checksum = ~missing_tech & (
+        Q(asset__checksum_sha256__isnull=True) | Q(asset__checksum_sha256='')
+    )
+    frames_missing = ~missing_tech & Q(frames_missing__gt=0)
+    frames_short = ~missing_tech & Q(frames_short__gt=0)
+    return {
+        QC_MISSING_TECH: missing_tech,
+        QC_FPS_MISMATCH: fps_mismatch,
+        QC_RESOLUTION_MISMATCH: resolution_mismatch,
+        QC_MISSING_CHECKSUM: missing_checksum,
+        QC_FRAMES_MISSING: frames_missing,
+        QC_FRAMES_SHORT: frames_short,
+    }
+
+def _flag(condition):
+    return Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+def annotate_qc(queryset):
+    """Añade qc_<código> (bool) y qc_ok a cada fila, calculados en la misma consulta."""
+    rules = qc_rule_conditions()
+    any_failure = Q()
+    for condition in rules.values():
+        any_failure |= condition
+    annotations = {f'qc_{code}': _flag(condition) for code, condition in rules.items()}
+    annotations['qc_ok'] = Case(When(any_failure, then=Value(False)), default=Value(True), output_field=BooleanField())
+    return queryset.annotate(**annotations)
+
+def annotated_qc_codes(version):
+    """Códigos de QC fallidos leídos de las anotaciones (sin consultas extra)."""
+    return [code for code in QC_CODES if getattr(version, f'qc_{code}')]
+
+def qc_messages(version, codes):
+    """Mensajes legibles de cada código (usa los targets del proyecto ya cargado)."""
+    project = version.asset.project
+    messages = {
+        QC_MISSING_TECH: lambda: _("Error de Ingesta: No se detectaron parámetros técnicos de video."),
+        QC_FPS_MISMATCH: lambda: f"FPS: {version.fps} (Esperado: {project.target_fps})",
+        QC_RESOLUTION_MISMATCH: lambda: (
+            f"Resolución: {version.resolution_width}x{version.resolution_height} "
+            f"(Esperada: {project.target_width}x{project.target_height})"
+        ),
+        QC_MISSING_CHECKSUM: lambda: _("Error de Integridad: El activo no posee un hash SHA-256 validado."),
+        QC_FRAMES_MISSING: lambda: (
+            f"Secuencia: {version.frames_missing} frames faltantes "
+            f"({version.extra_metadata.get('frames_missing', '')})"
+        ),
+        QC_FRAMES_SHORT: lambda: (
+            f"Secuencia: {version.frames_short} frames cortados "
+            f"({version.extra_metadata.get('frames_short', '')})"
+        ),
+    }
+    return [messages[code]() for code in codes]
+
+def recompute_qc(queryset):
+    """
+    Re-evaluación por conjuntos del QC materializado (qc_passed / qc_errors).
+    Un SELECT agrupa las combinaciones de fallos presentes y cada combinación se
+    escribe con un único UPDATE filtrado por las mismas reglas (sin iterar filas en Python).
+    """
+    rules = qc_rule_conditions()
+    flags = [f'qc_{code}' for code in QC_CODES]
+    combinations = annotate_qc(queryset.order_by()).values_list(*flags).distinct()
+
+    updated = 0
+    # Toca updated_at (ETag de la API)
+    now = timezone.now()
+    for combination in list(combinations):
+        codes = [code for code, failed in zip(QC_CODES, combination) if failed]
+        condition = Q()
+        for code, failed in zip(QC_CODES, combination):
+            condition &= rules[code] if failed else ~rules[code]
+        updated += queryset.filter(condition).update(qc_passed=not codes, qc_errors=codes, updated_at=now)
+    return updated
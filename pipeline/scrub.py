@@ -0,0 +1,240 @@
+# Scrub de integridad de AXIOM: re-hashea los originales y los compara con su ADN
+# (Version.checksum_sha256). Pensado para cientos de TB sin frenar a producción:
+# - pool de procesos con tope global de ancho de banda y lectura sin page cache,
+# - cola priorizada por last_verified_at (nunca verificados primero),
+# - el avance se guarda por archivo: un reinicio continúa la misma pasada (ScrubRun),
+# - las secuencias se verifican frame a frame contra SequenceFrame.
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .divergence_engine import PipelineStabilityIndex
+from .hashing import hash_file_paced, verify_manifest
+from .models import ContentBlob, ScrubRun, Version
+from .sequences import compact_ranges, load_manifest, sequence_digest
+
+logger = logging.getLogger(__name__)
+
+SCRUB_OK = 'ok'
+SCRUB_MISMATCH = 'mismatch'
+SCRUB_MISSING = 'missing'
+SCRUB_ERROR = 'error'
+SCRUB_DEFERRED = 'deferred'  # Cortado por el presupuesto: sigue en la cola
+
+def _worker_init():
+    # El IO ya va limitado por hash_file_paced; además cedemos CPU a producción
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+def scrub_file(path, expected, max_bytes_per_sec=None, deadline=None, cancel=None):
+    """Corre en el pool. Devuelve (estado, sha256 real, bytes leídos, error)."""
+    try:
+        actual, size = hash_file_paced(path, max_bytes_per_sec, deadline, cancel)
+    except TimeoutError as e:
+        return SCRUB_DEFERRED, None, 0, str(e)
+    except FileNotFoundError:
+        return SCRUB_MISSING, None, 0, "El original no existe en disco."
+    except OSError as e:
+        return SCRUB_ERROR, None, 0, str(e)
+    return (SCRUB_OK if actual == expected else SCRUB_MISMATCH), actual, size, ''
+
+def scrub_sequence(pattern_path, manifest, expected, max_bytes_per_sec=None, deadline=None, cancel=None):
+    """
+    Corre en el pool. Cada frame contra su digest en SequenceFrame y el ADN recalculado
+    contra el de la Versión. El error nombra los frames dañados / ausentes.
+    """
+    read, bad, missing, total = [], [], [], 0
+    for frame, _, digest in manifest:
+        try:
+            actual, size = hash_file_paced(pattern_path % frame, max_bytes_per_sec, deadline, cancel)
+        except TimeoutError as e:
+            return SCRUB_DEFERRED, None, 0, str(e)
+        except FileNotFoundError:
+            missing.append(frame)
+            continue
+        except OSError as e:
+            return SCRUB_ERROR, None, total, f"Frame {frame}: {e}"
+        total += size
+        read.append([frame, size, actual])
+        if actual != digest:
+            bad.append(frame)
+
+    actual = sequence_digest(read)
+    problems = []
+    if bad:
+        problems.append(f"Frames que no coinciden: {compact_ranges(bad)}")
+    if missing:
+        problems.append(f"Frames ausentes: {compact_ranges(missing)}")
+    if bad or (not missing and actual != expected):
+        return SCRUB_MISMATCH, actual, total, '; '.join(problems) or "El manifiesto por frame no coincide con el ADN."
+    if missing:
+        return SCRUB_MISSING, None, total, '; '.join(problems)
+    return SCRUB_OK, actual, total, ''
+
+def scrub_queue(cutoff):
+    """Originales pendientes en la pasada: nunca verificados primero, luego los más antiguos."""
+    return Version.objects.filter(
+        Q(last_verified_at__isnull=True) | Q(last_verified_at__lt=cutoff),
+        checksum_sha256__isnull=False,
+    ).exclude(file='').exclude(
+        transcoding_status=Version.TranscodingStatus.INGESTING
+    ).order_by(F('last_verified_at').asc(nulls_first=True), 'id')
+
+def current_run(restart=False):
+    """Pasada en curso (se reanuda) o una nueva si no hay ninguna / se pide reiniciar."""
+    run = ScrubRun.objects.filter(status=ScrubRun.RunStatus.RUNNING).order_by('-started_at').first()
+    if run and not restart:
+        return run
+    if run:
+        _finish(run)
+    return ScrubRun.objects.create(
+        cutoff=timezone.now() - timedelta(days=settings.AXIOM_SCRUB_INTERVAL_DAYS)
+    )
+
+def _finish(run):
+    run.status = ScrubRun.RunStatus.COMPLETED
+    run.finished_at = timezone.now()
+    run.save(update_fields=['status', 'finished_at'])
+
+def _executor(workers):
+    # Los workers prefork de Celery son procesos daemon y no pueden tener hijos:
+    # ahí usamos hilos (hashlib suelta el GIL con bloques grandes)
+    if multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=_worker_init)
+
+def _record_failure(version_id, status, actual, error, path):
+    """Deja el detalle del fallo en la Versión (con los bloques dañados si hay manifiesto)."""
+    version = Version.objects.filter(pk=version_id).only('extra_metadata').first()
+    if version is None:
+        return
+    detail = {'status': status, 'actual_sha256': actual, 'error': error, 'at': timezone.now().isoformat()}
+    manifest = version.extra_metadata.get('chunk_manifest')
+    if status == SCRUB_MISMATCH and manifest:
+        # Segunda lectura solo en el caso raro de fallo: localiza las regiones dañadas
+        detail['bad_chunks'] = verify_manifest(path, manifest)
+    version.extra_metadata['scrub_error'] = detail
+    Version.objects.filter(pk=version_id).update(extra_metadata=version.extra_metadata)
+
+def _clear_failures(version_ids):
+    """Originales que vuelven a estar bien (ej. restaurados de backup)."""
+    for version in Version.objects.filter(pk__in=version_ids, extra_metadata__has_key='scrub_error').only('extra_metadata'):
+        version.extra_metadata.pop('scrub_error', None)
+        Version.objects.filter(pk=version.pk).update(extra_metadata=version.extra_metadata)
+
+def _checkpoint(run, job, status, actual, size, error, engine):
+    """Guarda el resultado de un archivo en cuanto termina: un corte no repite lo ya leído."""
+    with transaction.atomic():
+        now = timezone.now()
+        Version.objects.filter(pk__in=job['ids']).update(last_verified_at=now)
+        if status == SCRUB_OK:
+            if job['blob']:
+                ContentBlob.objects.filter(sha256=job['digest']).update(last_verified_at=now)
+            _clear_failures(job['ids'])
+        else:
+            for version_id in job['ids']:
+                _record_failure(version_id, status, actual, error, job['path'])
+                run.failures.append({'version': version_id, 'status': status, 'path': job['path']})
+        run.files_checked += len(job['ids'])
+        run.bytes_checked += size
+        run.save(update_fields=['files_checked', 'bytes_checked', 'failures'])
+
+    # El sensor de integridad solo recibe corrupciones; un original ausente o ilegible es de storage
+    if status == SCRUB_MISMATCH:
+        engine.report_status('integrity', success=False)
+    elif status != SCRUB_OK:
+        engine.report_status('storage', success=False)
+
+def run_scrub(workers=None, max_mbps=None, budget=None, limit=None, restart=False, stdout=None):
+    """
+    Verifica originales hasta vaciar la cola, agotar `budget` (segundos) o `limit` (archivos).
+    `max_mbps` es el tope global de lectura (MB/s) repartido entre los workers.
+    El presupuesto también corta los archivos en curso (quedan en la cola para la siguiente).
+    Devuelve el ScrubRun actualizado.
+    """
+    workers = workers or settings.AXIOM_SCRUB_WORKERS
+    max_mbps = settings.AXIOM_SCRUB_MAX_MBPS if max_mbps is None else max_mbps
+    per_worker_rate = (max_mbps * 1024 * 1024 / workers) if max_mbps else None
+    started = time.monotonic()
+    deadline = time.time() + budget if budget else None
+    engine = PipelineStabilityIndex()
+
+    run = current_run(restart)
+    checked = 0
+
+    def exhausted():
+        return (limit and checked >= limit) or (budget and time.monotonic() - started >= budget)
+
+    pool = _executor(workers)
+    # Con hilos (Celery) un SoftTimeLimitExceeded puede además cortar las lecturas en curso
+    cancel = threading.Event() if isinstance(pool, ThreadPoolExecutor) else None
+    try:
+        while not exhausted():
+            batch = list(scrub_queue(run.cutoff).values_list(
+                'id', 'file', 'checksum_sha256', 'extra_metadata__cas_blob', 'frame_start'
+            )[:settings.AXIOM_SCRUB_BATCH])
+            if not batch:
+                _finish(run)
+                break
+
+            # Versiones que comparten blob CAS = mismo inodo: se leen una sola vez
+            jobs = {}
+            manifests = load_manifest([row[0] for row in batch if row[4] is not None])
+            for version_id, name, digest, blob, frame_start in batch:
+                key = blob or name
+                jobs.setdefault(key, {
+                    'path': default_storage.path(name), 'digest': digest, 'blob': blob, 'ids': [],
+                    'frames': manifests.get(version_id),
+                })
+                jobs[key]['ids'].append(version_id)
+
+            pending, in_flight = iter(jobs.values()), {}
+            while True:
+                while len(in_flight) < workers * 2 and not exhausted():
+                    job = next(pending, None)
+                    if job is None:
+                        break
+                    if job['frames'] is not None:
+                        future = pool.submit(scrub_sequence, job['path'], job['frames'], job['digest'], per_worker_rate, deadline, cancel)
+                    else:
+                        future = pool.submit(scrub_file, job['path'], job['digest'], per_worker_rate, deadline, cancel)
+                    in_flight[future] = job
+                    checked += len(job['ids'])
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    status, actual, size, error = future.result()
+                    if status == SCRUB_DEFERRED:
+                        continue
+                    if status != SCRUB_OK:
+                        logger.error(f"🧬 Scrub: {job['path']} -> {status} {error}")
+                    _checkpoint(run, job, status, actual, size, error, engine)
+
+            if stdout:
+                stdout.write(f"🔎 {run.files_checked} archivos | {run.bytes_checked / 1024 ** 3:.1f} GB | {len(run.failures)} fallos")
+    except SoftTimeLimitExceeded:
+        # Lo ya verificado está guardado; lo que estaba en vuelo vuelve a la cola
+        logger.warning(f"🧬 Scrub interrumpido por el límite de tiempo tras {run.files_checked} archivos.")
+        if cancel:
+            cancel.set()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return run
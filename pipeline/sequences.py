@@ -0,0 +1,268 @@
+# Secuencias de imágenes de AXIOM (renders `shot_comp.%04d.exr`).
+# Una Versión de secuencia guarda en `file` el patrón printf de sus frames y en
+# frame_start / frame_end el rango. Cada frame se hashea por separado (en paralelo),
+# su digest queda en SequenceFrame y el ADN de la secuencia es el SHA-256 de los pares
+# (frame, digest) en orden.
+
+import hashlib
+import os
+import re
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+
+from .hashing import hash_file
+from .models import SequenceFrame
+
+# '%04d', '%d', '####' o '@@@@' (convenciones de Nuke / Houdini / RV)
+FRAME_TOKEN = re.compile(r'%0?(\d*)d|(#+)|(@+)')
+
+def parse_pattern(pattern):
+    """
+    Separa un patrón de secuencia en (prefijo, padding, sufijo).
+    Lanza ValueError si no contiene exactamente un token de frame.
+    """
+    tokens = list(FRAME_TOKEN.finditer(pattern))
+    if len(tokens) != 1:
+        raise ValueError("El patrón de la secuencia necesita un único token de frame (%04d o ####).")
+    token = tokens[0]
+    printf, hashes, ats = token.groups()
+    padding = int(printf or 0) if printf is not None else len(hashes or ats)
+    return pattern[:token.start()], padding, pattern[token.end():]
+
+def printf_pattern(prefix, padding, suffix):
+    return f"{prefix}%0{padding}d{suffix}" if padding else f"{prefix}%d{suffix}"
+
+def sequence_stem(pattern):
+    """Nombre base sin token de frame ni extensión: 'shot_comp.%04d.exr' -> 'shot_comp'."""
+    prefix, _, _ = parse_pattern(os.path.basename(pattern))
+    return prefix.rstrip('._-') or 'sequence'
+
+def scan_frames(directory, pattern):
+    """{frame: nombre de archivo} de los frames de `pattern` (solo el basename) presentes en `directory`."""
+    prefix, padding, suffix = parse_pattern(pattern)
+    digits = rf"\d{{{padding},}}" if padding else r"\d+"
+    matcher = re.compile(rf"{re.escape(prefix)}({digits}){re.escape(suffix)}")
+    frames = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            found = matcher.fullmatch(entry.name)
+            if found and entry.is_file():
+                frames[int(found.group(1))] = entry.name
+    return frames
+
+# --- 1. ADN de la secuencia ---
+
+def _hash_frame(path):
+    try:
+        return os.path.getsize(path), hash_file(path)
+    except FileNotFoundError:
+        return None
+
+def hash_frames(pattern_path, frame_start, frame_end, workers=None):
+    """
+    Hashea todos los frames del rango en paralelo (hilos: hashlib suelta el GIL y los
+    workers de Celery no pueden abrir procesos). Devuelve (manifiesto, frames faltantes);
+    el manifiesto es una lista [frame, tamaño, sha256] en orden.
+    """
+    workers = workers or settings.AXIOM_HASH_WORKERS
+    frames = range(frame_start, frame_end + 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_hash_frame, (pattern_path % frame for frame in frames))
+        manifest, missing = [], []
+        for frame, result in zip(frames, results):
+            if result is None:
+                missing.append(frame)
+            else:
+                manifest.append([frame, result[0], result[1]])
+    return manifest, missing
+
+def sequence_digest(manifest):
+    """
+    SHA-256 de los pares frame:digest en orden. El número de frame entra en el ADN:
+    la misma imagen en otro rango (o dos frames intercambiados) es otra secuencia.
+    """
+    return hashlib.sha256(''.join(f"{frame}:{digest};" for frame, _, digest in manifest).encode()).hexdigest()
+
+# --- 2. Frames cortados ---
+
+EXR_MAGIC = b'\x76\x2f\x31\x01'
+EXR_TILED, EXR_DEEP, EXR_MULTIPART = 0x200, 0x800, 0x1000
+
+def _read_cstring(fp, limit=256):
+    value = bytearray()
+    while len(value) < limit:
+        char = fp.read(1)
+        if not char:
+            return None
+        if char == b'\0':
+            return bytes(value)
+        value += char
+    return None
+
+def _exr_complete(path):
+    """
+    Un EXR cortado a medias conserva la cabecera: la tabla de offsets apunta a bloques
+    que no están en disco. (FFmpeg lo decodifica sin error rellenando con ceros.)
+    """
+    with open(path, 'rb') as fp:
+        size = os.fstat(fp.fileno()).st_size
+        head = fp.read(8)
+        if len(head) < 8 or head[:4] != EXR_MAGIC:
+            return False
+        flags = int.from_bytes(head[4:], 'little')
+        if flags & (EXR_DEEP | EXR_MULTIPART):
+            return None
+        # Cabecera: nombre\0 tipo\0 tamaño(int32) valor ... y un \0 final
+        while True:
+            name = _read_cstring(fp)
+            if name is None:
+                return False
+            if not name:
+                break
+            length = fp.read(4) if _read_cstring(fp) is not None else b''
+            if len(length) < 4:
+                return False
+            fp.seek(int.from_bytes(length, 'little'), os.SEEK_CUR)
+        table_start = fp.tell()
+
+        # El primer bloque va justo después de la tabla: de ahí sale el número de bloques
+        first = fp.read(8)
+        if len(first) < 8:
+            return False
+        chunks, remainder = divmod(int.from_bytes(first, 'little') - table_start, 8)
+        if chunks < 1 or remainder:
+            return False
+        fp.seek(table_start)
+        table = fp.read(chunks * 8)
+        if len(table) < chunks * 8:
+            return False
+        offsets = [int.from_bytes(table[i:i + 8], 'little') for i in range(0, len(table), 8)]
+        if min(offsets) < table_start + len(table):
+            return False  # Offsets sin escribir: el render no terminó
+
+        # Último bloque: coordenadas (y, o 4 enteros si es tiled) + tamaño + datos
+        coordinates = 16 if flags & EXR_TILED else 4
+        fp.seek(max(offsets) + coordinates)
+        data_size = fp.read(4)
+        if len(data_size) < 4:
+            return False
+        return max(offsets) + coordinates + 4 + int.from_bytes(data_size, 'little') <= size
+
+def frame_is_complete(path):
+    """
+    ¿El frame está entero? EXR: estructura (tabla de offsets); el resto: FFmpeg lo
+    decodifica sin errores. None si no se puede comprobar.
+    """
+    try:
+        if path.lower().endswith('.exr'):
+            return _exr_complete(path)
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-i', path, '-f', 'null', '-'],
+            capture_output=True, text=True, timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.returncode == 0 and not result.stderr.strip()
+
+def short_frames(pattern_path, manifest, ratio=None):
+    """
+    Frames vacíos o cortados a medias. El tamaño solo elige candidatos: un frame negro
+    o de color sólido comprime a casi nada y es legítimo, así que cada candidato se
+    comprueba (frame_is_complete). Si no se puede comprobar, se marca para revisión.
+    """
+    ratio = settings.AXIOM_SEQUENCE_SHORT_FRAME_RATIO if ratio is None else ratio
+    if not manifest:
+        return []
+    threshold = statistics.median(size for _, size, _ in manifest) * ratio
+    return [
+        frame for frame, size, _ in manifest
+        if size == 0 or (size < threshold and frame_is_complete(pattern_path % frame) is not True)
+    ]
+
+# --- 3. Ingesta (manifiesto por frame + QC) ---
+
+def compact_ranges(frames):
+    """[1001, 1002, 1003, 1010] -> '1001-1003,1010' (legible en el admin y en la API)."""
+    ranges = []
+    for frame in sorted(frames):
+        if ranges and frame == ranges[-1][1] + 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return ','.join(f"{a}-{b}" if a != b else str(a) for a, b in ranges)
+
+def store_frames(version, manifest):
+    """Reemplaza el manifiesto por frame de la Versión (una re-ingesta no deja filas viejas)."""
+    with transaction.atomic():
+        SequenceFrame.objects.filter(version=version).delete()
+        SequenceFrame.objects.bulk_create(
+            [SequenceFrame(version=version, frame=frame, size=size, checksum_sha256=digest) for frame, size, digest in manifest],
+            batch_size=1000
+        )
+
+def load_manifest(version_ids):
+    """{version_id: [[frame, tamaño, sha256], ...]} en orden de frame (una consulta para todo el lote)."""
+    manifests = {version_id: [] for version_id in version_ids}
+    rows = SequenceFrame.objects.filter(version_id__in=version_ids).order_by('version_id', 'frame')
+    for version_id, frame, size, digest in rows.values_list('version_id', 'frame', 'size', 'checksum_sha256'):
+        manifests[version_id].append([frame, size, digest])
+    return manifests
+
+def ingest_frames(version):
+    """
+    Hashea los frames de una Versión de secuencia (ya guardada), guarda su manifiesto en
+    SequenceFrame y deja en memoria su ADN, tamaño total y conteos de QC
+    (frames_missing / frames_short). Devuelve el digest.
+    """
+    manifest, missing = hash_frames(version.file.path, version.frame_start, version.frame_end)
+    short = short_frames(version.file.path, manifest)
+    store_frames(version, manifest)
+
+    version.checksum_sha256 = sequence_digest(manifest)
+    version.filesize = sum(size for _, size, _ in manifest)
+    version.frames_missing = len(missing)
+    version.frames_short = len(short)
+    version.extra_metadata['frames_missing'] = compact_ranges(missing)
+    version.extra_metadata['frames_short'] = compact_ranges(short)
+    version._frames_ingested = True
+    return version.checksum_sha256
+
+# --- 4. Entrada de FFmpeg ---
+
+def first_frame_path(version):
+    """Primer frame existente (para ffprobe); None si no hay ninguno."""
+    first = version.frames.values_list('frame', flat=True).first()
+    if first is not None:
+        return version.file.path % first
+    return None
+
+def ffmpeg_input(version, fps, work_dir):
+    """
+    (args de entrada, ruta de entrada) para decodificar la secuencia directamente.
+    Completa: demuxer image2 con -start_number. Con huecos, image2 se detendría en el
+    primero: se usa una lista concat que sostiene el frame anterior (como RV / Nuke).
+    """
+    pattern_path = version.file.path
+    input_args = []
+    if pattern_path.lower().endswith('.exr'):
+        # Los EXR son lineales: sin esto el proxy sale oscuro
+        input_args += ['-apply_trc', 'iec61966_2_1']
+
+    if not version.frames_missing:
+        return input_args + ['-framerate', str(fps), '-start_number', str(version.frame_start)], pattern_path
+
+    present = set(version.frames.values_list('frame', flat=True))
+    list_path = os.path.join(work_dir, f"{sequence_stem(pattern_path)}_frames.ffconcat")
+    held = None
+    with open(list_path, 'w') as listing:
+        listing.write("ffconcat version 1.0\n")
+        for frame in range(version.frame_start, version.frame_end + 1):
+            if frame in present:
+                held = pattern_path % frame
+            if held:
+                listing.write(f"file '{held}'\nduration {1 / fps:.6f}\n")
+    return input_args + ['-f', 'concat', '-safe', '0'], list_path
@@ -1,21 +1,39 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Version, Project, Asset, User
+from .models import Version, Project, Asset, User, UploadSession
 
-class ProjectSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets: `?fields=id,version_number,transcoding_status` limita la respuesta
+    a esos campos (los nombres desconocidos se ignoran). Sin el parámetro, todos.
+    """
+    fields_query_param = 'fields'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested = request.query_params.get(self.fields_query_param) if request else None
+        if not requested:
+            return
+        keep = {name.strip() for name in requested.split(',') if name.strip()}
+        for name in set(self.fields) - keep:
+            self.fields.pop(name)
+
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Project
         fields = '__all__'
 
-class AssetSerializer(serializers.ModelSerializer):
+class AssetSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Mostramos el nombre del proyecto en lugar de solo el ID
     project_title = serializers.ReadOnlyField(source='project.title')
 
     class Meta:
         model = Asset
-        fields = ['id', 'name', 'category', 'project', 'project_title', 'checksum_sha256']
-        read_only_fields = ['checksum_sha256']
+        fields = ['id', 'name', 'category', 'project', 'project_title', 'checksum_sha256', 'created_at', 'updated_at']
+        read_only_fields = ['checksum_sha256', 'created_at', 'updated_at']
 
-class VersionSerializer(serializers.ModelSerializer):
+class VersionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # Metadata técnica (ReadOnly porque la extrae tu lógica de FFmpeg/ingest)
     asset_name = serializers.ReadOnlyField(source='asset.name')
     
@@ -25,13 +43,17 @@ class VersionSerializer(serializers.ModelSerializer):
             'id', 'asset', 'asset_name', 'department', 'version_number', 
             'file', 'uploaded_by', 'approval_status',
             'resolution_width', 'resolution_height', 'fps', 'duration',
-            'filesize', 'transcoding_status', 'created_at'
+            'filesize', 'transcoding_status', 'qc_passed', 'qc_errors',
+            'frame_start', 'frame_end', 'frames_missing', 'frames_short',
+            'checksum_sha256', 'proxy_file_path', 'hls_playlist_path', 'thumbnail', 'sprite_sheet', 'sprite_index',
+            'created_at', 'updated_at'
         ]
         # Estos campos los llena tu modelo automáticamente o el worker
         read_only_fields = [
             'id', 'version_number', 'filesize', 'resolution_width', 
             'resolution_height', 'fps', 'duration', 'transcoding_status', 
-            'created_at'
+            'qc_passed', 'qc_errors', 'frame_start', 'frame_end', 'frames_missing', 'frames_short',
+            'checksum_sha256', 'proxy_file_path', 'hls_playlist_path', 'thumbnail', 'sprite_sheet', 'sprite_index', 'created_at', 'updated_at'
         ]
 
     def validate(self, data):
@@ -48,4 +70,54 @@ class VersionSerializer(serializers.ModelSerializer):
             raise e
         except Exception as e:
             raise serializers.ValidationError(str(e))
-        return data
\ No newline at end of file
+        return data
+
+class VersionStatusSerializer(serializers.ModelSerializer):
+    """Vista ligera para sondear el avance de la ingesta asíncrona."""
+    asset_name = serializers.ReadOnlyField(source='asset.name')
+    ingest_error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Version
+        fields = [
+            'id', 'uuid', 'asset', 'asset_name', 'department', 'version_number',
+            'transcoding_status', 'checksum_sha256', 'filesize', 'ingest_error',
+            'frame_start', 'frame_end', 'frames_missing', 'frames_short',
+            'proxy_file_path', 'hls_playlist_path', 'thumbnail', 'sprite_sheet', 'sprite_index', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_ingest_error(self, obj):
+        return obj.extra_metadata.get('ingest_error')
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Estado de una subida por bloques (lo que el cliente necesita para reanudar)."""
+    session_id = serializers.UUIDField(source='uuid', read_only=True)
+    total_chunks = serializers.ReadOnlyField()
+    received_chunks = serializers.SerializerMethodField()
+    chunk_url = serializers.SerializerMethodField()
+    complete_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'session_id', 'asset_name', 'department', 'filename', 'total_size',
+            'chunk_size', 'total_chunks', 'received_chunks', 'status', 'version',
+            'chunk_url', 'complete_url', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def _absolute(self, url):
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_received_chunks(self, obj):
+        return list(obj.chunks.values_list('index', flat=True))
+
+    def get_chunk_url(self, obj):
+        # Plantilla: el cliente sustituye {index} por el número de bloque
+        url = reverse('upload-chunk', kwargs={'session_id': obj.uuid, 'index': 0})
+        return self._absolute(url).replace('/chunks/0/', '/chunks/{index}/')
+
+    def get_complete_url(self, obj):
+        return self._absolute(reverse('upload-complete', kwargs={'session_id': obj.uuid}))
@@ -1,9 +1,11 @@
-import os
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
-from .models import Version, Asset
-# Actualizamos el nombre de la tarea importada
-from .tasks import process_version_task 
+from .models import Project, Version
+from .tasks import enqueue_ingest, run_ingest_pipeline, recompute_project_qc_task
+
+# Campos del Proyecto que cambian el resultado del QC de sus versiones
+QC_TARGET_FIELDS = ('target_fps', 'target_width', 'target_height')
 
 @receiver(post_save, sender=Version)
 def axiom_processing_trigger(sender, instance, created, **kwargs):
@@ -12,42 +14,34 @@ def axiom_processing_trigger(sender, instance, created, **kwargs):
     """
     # 1. Filtro de seguridad: Solo si es nuevo, tiene archivo y no se ha disparado
     if created and instance.file and not getattr(instance, '_is_processing_triggered', False):
-        
-        archivo_fisico = instance.file.path
-        
-        # 2. INGESTA RÁPIDA (Cálculo de ADN / SHA-256 y Metadatos iniciales)
-        ingesta_ok = instance.ingest_and_verify(archivo_fisico)
-        
-        if ingesta_ok:
-            instance._is_processing_triggered = True # Previene doble ejecución
-            
-            # 3. ENRUTAMIENTO INTELIGENTE
-            # Mandamos a Celery tanto Videos (Footage) como Imágenes (Stills)
-            # para que ambos tengan su thumbnail procesado.
-            needs_processing = [
-                Asset.AssetCategory.VIDEO, 
-                Asset.AssetCategory.IMAGE # <--- Agregamos imágenes al flujo de Celery
-            ]
+        instance._is_processing_triggered = True # Previene doble ejecución
+
+        # 2a. INGESTA ASÍNCRONA: hash, duplicados y ffprobe corren en Celery.
+        # on_commit garantiza que el worker vea la fila ya confirmada en la DB.
+        if instance.transcoding_status == Version.TranscodingStatus.INGESTING:
+            version_id = instance.pk
+            transaction.on_commit(lambda: enqueue_ingest([version_id]))
+            print(f"📥 AXIOM: Ingesta de {instance} delegada a Celery.")
+            return
+
+        # 2b. INGESTA SÍNCRONA (Cálculo de ADN / SHA-256 y Metadatos iniciales)
+        run_ingest_pipeline(instance)
 
-            if instance.asset.category in needs_processing:
-                # Delegamos la tarea (transcodificación o redimensionado)
-                process_version_task.delay(instance.pk)
-                
-                # Actualizamos status a PROCESSING
-                Version.objects.filter(pk=instance.pk).update(transcoding_status='PROCESSING')
-                print(f"🚀 AXIOM: {instance.asset.category} detectado para {instance}. Tarea delegada.")
-            
-            elif instance.asset.category == Asset.AssetCategory.CODE:
-                # Scripts de Blender/Python no requieren procesamiento visual
-                Version.objects.filter(pk=instance.pk).update(transcoding_status='COMPLETED')
-                print(f"⚡ AXIOM: Script registrado. No requiere procesamiento.")
-            
-            else:
-                # Otros formatos (PDFs de guion, Docs, etc.)
-                Version.objects.filter(pk=instance.pk).update(transcoding_status='COMPLETED')
-                print(f"✅ AXIOM: Activo genérico registrado.")
+@receiver(pre_save, sender=Project)
+def detect_qc_target_change(sender, instance, **kwargs):
+    """Marca el proyecto si sus targets de QC cambiaron (comparando con la fila guardada)."""
+    if not instance.pk:
+        return
+    previous = Project.objects.filter(pk=instance.pk).values(*QC_TARGET_FIELDS).first()
+    instance._qc_targets_changed = bool(previous) and any(
+        previous[field] != getattr(instance, field) for field in QC_TARGET_FIELDS
+    )
 
-        else:
-            # Si el SHA-256 falla o el archivo está corrupto
-            Version.objects.filter(pk=instance.pk).update(transcoding_status='ERROR')
-            print(f"⚠️ AXIOM: Divergencia detectada en ingesta inicial.")
\ No newline at end of file
+@receiver(post_save, sender=Project)
+def requalify_project_versions(sender, instance, created, **kwargs):
+    """Nuevos targets = re-evaluación del QC de todo el proyecto, por conjuntos y en Celery."""
+    if getattr(instance, '_qc_targets_changed', False):
+        instance._qc_targets_changed = False
+        project_id = instance.pk
+        transaction.on_commit(lambda: recompute_project_qc_task.delay(project_id))
+        print(f"🎯 AXIOM: Targets de QC de '{instance}' actualizados. Re-evaluación encolada.")
@@ -0,0 +1,250 @@
+# Motor de derivados de stills de AXIOM (thumbnails de texturas / plates / PSD).
+# Nunca decodifica el raster completo si el formato permite evitarlo:
+#  - JPEG: draft() -> el decoder escala 1/2, 1/4 o 1/8 mientras decodifica.
+#  - TIFF: strip a strip (o fila de tiles a fila de tiles), reduciendo cada banda.
+#  - PSD: preview JPEG embebido (image resource 1036).
+# El resto pasa por una decodificación completa solo si cabe en AXIOM_STILLS_MAX_DECODE_BYTES.
+
+import io
+import logging
+import os
+import resource
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+STILL_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tiff', '.tif', '.psd', '.tga')
+THUMB_SIZE = (480, 270)
+JPEG_QUALITY = 85
+PSD_THUMBNAIL_RESOURCE = 1036
+RAW_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Tags TIFF necesarios para leer strips/tiles sin pasar por libtiff
+TIFF_STRIP_OFFSETS = 273
+TIFF_ROWS_PER_STRIP = 278
+TIFF_STRIP_BYTE_COUNTS = 279
+TIFF_PLANAR_CONFIG = 284
+TIFF_PREDICTOR = 317
+TIFF_TILE_WIDTH = 322
+TIFF_TILE_LENGTH = 323
+TIFF_TILE_OFFSETS = 324
+TIFF_TILE_BYTE_COUNTS = 325
+
+class StillTooLarge(Exception):
+    """La decodificación completa superaría el tope de memoria por trabajo."""
+
+# --- 1. Decodificadores acotados por formato ---
+
+# Plates de 16k superan el límite anti "decompression bomb" de Pillow. Dentro del motor el
+# tope real es AXIOM_STILLS_MAX_DECODE_BYTES; fuera de él (avatares, admin...) Pillow
+# conserva su límite. Contador por si varios hilos del mismo proceso renderizan a la vez.
+_pixels_lock = threading.Lock()
+_pixels_users = 0
+_pixels_saved = None
+
+@contextmanager
+def _engine_pixel_limit():
+    global _pixels_users, _pixels_saved
+    with _pixels_lock:
+        if _pixels_users == 0:
+            _pixels_saved, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+        _pixels_users += 1
+    try:
+        yield
+    finally:
+        with _pixels_lock:
+            _pixels_users -= 1
+            if _pixels_users == 0:
+                Image.MAX_IMAGE_PIXELS = _pixels_saved
+
+def _reduction_factor(width, height, size):
+    """Reducción entera que deja al menos 2x el tamaño final (margen para un LANCZOS limpio)."""
+    return max(1, min(width // (size[0] * 2), height // (size[1] * 2)))
+
+def _decode_strip(img, data, width, rows, rawmode):
+    """Una banda de la imagen a partir de los bytes crudos de un strip/tile."""
+    compression = img._compression
+    if compression in ('tiff_adobe_deflate', 'tiff_deflate'):
+        data, compression = zlib.decompress(data), 'raw'
+    decoder = 'packbits' if compression == 'packbits' else 'raw'
+    return Image.frombytes(img.mode, (width, rows), data, decoder, rawmode)
+
+def _tiff_bands(img, fp):
+    """
+    Genera (y, banda) recorriendo el TIFF por strips o por filas de tiles.
+    Devuelve None si el layout no permite leer por partes (cae a la ruta completa).
+    """
+    tags = img.tag_v2
+    if (tags.get(TIFF_PLANAR_CONFIG, 1) != 1 or tags.get(TIFF_PREDICTOR, 1) != 1 or
+            img._compression not in ('raw', 'packbits', 'tiff_adobe_deflate', 'tiff_deflate')):
+        return None
+    rawmode = img.tile[0].args[0] if img.tile else None
+    if not rawmode:
+        return None
+    width, height = img.size
+
+    def read(offset, count):
+        fp.seek(offset)
+        return fp.read(count)
+
+    if TIFF_TILE_OFFSETS in tags:
+        tile_w, tile_h = tags[TIFF_TILE_WIDTH], tags[TIFF_TILE_LENGTH]
+        offsets, counts = tags[TIFF_TILE_OFFSETS], tags[TIFF_TILE_BYTE_COUNTS]
+        across = -(-width // tile_w)
+
+        def bands():
+            for row, y in enumerate(range(0, height, tile_h)):
+                band = Image.new(img.mode, (width, min(tile_h, height - y)))
+                for column in range(across):
+                    index = row * across + column
+                    tile = _decode_strip(img, read(offsets[index], counts[index]), tile_w, tile_h, rawmode)
+                    band.paste(tile, (column * tile_w, 0))
+                yield y, band
+        return bands()
+
+    offsets, counts = tags.get(TIFF_STRIP_OFFSETS), tags.get(TIFF_STRIP_BYTE_COUNTS)
+    if not offsets or not counts:
+        return None
+    rows_per_strip = min(tags.get(TIFF_ROWS_PER_STRIP, height), height)
+
+    def bands():
+        for index, y in enumerate(range(0, height, rows_per_strip)):
+            rows = min(rows_per_strip, height - y)
+            if img._compression != 'raw':
+                yield y, _decode_strip(img, read(offsets[index], counts[index]), width, rows, rawmode)
+                continue
+            # Sin compresión el strip puede ser toda la imagen: se lee por bloques de filas
+            row_bytes = counts[index] // rows
+            chunk = max(1, RAW_CHUNK_BYTES // max(1, row_bytes))
+            for start in range(0, rows, chunk):
+                count = min(chunk, rows - start)
+                data = read(offsets[index] + start * row_bytes, count * row_bytes)
+                yield y + start, _decode_strip(img, data, width, count, rawmode)
+    return bands()
+
+def _reduce_bands(mode, source_size, bands, factor):
+    """
+    Reduce banda a banda hacia un lienzo de source_size / factor. Solo se reducen
+    bloques de filas múltiplos de `factor`; el resto se arrastra a la banda siguiente.
+    """
+    width, height = source_size
+    # reduce() no trabaja en I;16: las bandas de 16 bits se reducen en 'I' (32 bits, solo la banda)
+    wide = mode.startswith('I;16')
+    mode = 'I' if wide else mode
+    canvas = Image.new(mode, (max(1, width // factor), max(1, height // factor)))
+    carry, carry_y = None, 0
+    for y, band in bands:
+        if wide:
+            band = band.convert('I')
+        if carry is not None:
+            merged = Image.new(mode, (width, carry.height + band.height))
+            merged.paste(carry, (0, 0))
+            merged.paste(band, (0, carry.height))
+            band, y = merged, carry_y
+        usable = band.height - band.height % factor
+        if usable:
+            canvas.paste(band.crop((0, 0, width, usable)).reduce(factor), (0, y // factor))
+        carry = band.crop((0, usable, width, band.height)) if usable < band.height else None
+        carry_y = y + usable
+    return canvas
+
+def _psd_preview(img):
+    """Preview JPEG que Photoshop guarda en el resource 1036 (cabecera de 28 bytes + JFIF)."""
+    for resource_id, _, data in getattr(img, 'resources', []):
+        if resource_id == PSD_THUMBNAIL_RESOURCE and len(data) > 28:
+            thumb_format = struct.unpack('>I', data[:4])[0]
+            if thumb_format == 1:  # kJpegRGB
+                preview = Image.open(io.BytesIO(data[28:]))
+                preview.load()
+                return preview
+    return None
+
+def _decoded_bytes(img):
+    bands = len(img.getbands())
+    bytes_per_band = 2 if img.mode.startswith('I;16') else (4 if img.mode in ('I', 'F') else 1)
+    return img.size[0] * img.size[1] * bands * bytes_per_band
+
+def _to_rgb(img):
+    if img.mode.startswith('I;16') or img.mode == 'I':
+        img = img.convert('I').point(lambda value: value * (1 / 256)).convert('L')
+    return img if img.mode == 'RGB' else img.convert('RGB')
+
+# --- 2. API del motor ---
+
+def render_still_thumbnail(input_path, thumb_path, size=THUMB_SIZE, max_decode_bytes=None):
+    """
+    Escribe el thumbnail JPEG de un still con la ruta más barata que admita su formato.
+    Devuelve {'method', 'width', 'height'} (dimensiones del original).
+    """
+    max_decode_bytes = max_decode_bytes or settings.AXIOM_STILLS_MAX_DECODE_BYTES
+
+    with _engine_pixel_limit(), open(input_path, 'rb') as fp:
+        with Image.open(fp) as img:
+            source_size = img.size
+            method = 'full_decode'
+            thumb = None
+
+            if img.format == 'JPEG':
+                # El decoder escala en el propio IDCT: 16k -> 2k sin pasar por 16k
+                img.draft('RGB' if img.mode == 'RGB' else None, (size[0] * 2, size[1] * 2))
+                method = 'jpeg_draft'
+            elif img.format == 'PSD':
+                # El preview de Photoshop ronda los 160 px: thumbnail() no amplía, se queda en ese tamaño
+                thumb = _psd_preview(img)
+                if thumb is not None:
+                    method = 'psd_preview'
+            elif img.format == 'TIFF':
+                bands = _tiff_bands(img, fp)
+                if bands is not None:
+                    thumb = _reduce_bands(img.mode, source_size, bands, _reduction_factor(*source_size, size))
+                    method = 'tiff_strips'
+
+            if thumb is None:
+                # JPEG con draft ya viene reducido; el resto se decodifica entero (si cabe)
+                if method == 'full_decode' and _decoded_bytes(img) > max_decode_bytes:
+                    raise StillTooLarge(
+                        f"{os.path.basename(input_path)}: {source_size[0]}x{source_size[1]} {img.mode} "
+                        f"supera AXIOM_STILLS_MAX_DECODE_BYTES"
+                    )
+                img.load()
+                thumb = img
+
+            thumb.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+            _to_rgb(thumb).save(thumb_path, 'JPEG', quality=JPEG_QUALITY)
+
+    return {'method': method, 'width': source_size[0], 'height': source_size[1]}
+
+# --- 3. Tope de memoria por proceso y lotes fuera de Celery ---
+
+def limit_memory():
+    """
+    Tope de espacio de direcciones por proceso (un OOM mata solo el trabajo).
+    Inicializador del pool de render_still_batch y de cada hijo del worker Celery de stills.
+    """
+    limit = settings.AXIOM_STILLS_MEMORY_LIMIT
+    if limit:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _render_job(job):
+    try:
+        return job, render_still_thumbnail(job['input_path'], job['thumb_path']), None
+    except (MemoryError, StillTooLarge, OSError, ValueError) as e:
+        logger.warning(f"🖼️ Still descartado {job['input_path']}: {e}")
+        return job, None, f"{type(e).__name__}: {e}"
+
+def render_still_batch(jobs, workers=None):
+    """
+    Procesa muchos stills en paralelo. `jobs` = [{'input_path', 'thumb_path', ...}].
+    Cada proceso atiende pocos trabajos y se recicla, así la fragmentación de un
+    TIFF enorme no se arrastra al siguiente. Genera (job, info, error) según terminan.
+    """
+    workers = workers or settings.AXIOM_STILLS_WORKERS
+    with ProcessPoolExecutor(max_workers=workers, initializer=limit_memory, max_tasks_per_child=20) as pool:
+        yield from pool.map(_render_job, jobs)
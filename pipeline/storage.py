@@ -0,0 +1,98 @@
+import errno
+import logging
+import os
+import stat
+import subprocess
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Errores que indican "no se puede hacer hard link aquí" (otro volumen, FS sin soporte, límite de links,
+# protected_hardlinks / permisos): se intenta reflink y, si tampoco, el original se queda como copia propia
+LINK_UNSUPPORTED = (errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP)
+
+def cas_relative_path(digest):
+    """Ruta del blob dentro de MEDIA_ROOT: cas/ab/cd/<sha256>."""
+    return f"cas/{digest[:2]}/{digest[2:4]}/{digest}"
+
+def cas_blob_path(digest):
+    return os.path.join(settings.MEDIA_ROOT, *cas_relative_path(digest).split('/'))
+
+def make_read_only(path):
+    """
+    Quita los permisos de escritura del inodo. Un hard link comparte inodo con el blob y
+    con las rutas de otros proyectos: abrir uno de ellos para escribir corrompería todos.
+    (Renombrar o borrar la ruta sigue siendo posible: eso depende del directorio.)
+    """
+    mode = os.stat(path).st_mode
+    os.chmod(path, stat.S_IMODE(mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+def link_or_reflink(src, dst):
+    """
+    Crea `dst` apuntando a los mismos bytes que `src` sin copiarlos.
+    1) Hard link (mismo inodo, de solo lectura).  2) Reflink copy-on-write (Btrfs/XFS).
+    Devuelve el método usado o None si ninguno es posible en este almacenamiento.
+    Lanza FileExistsError si `dst` ya existe.
+    """
+    try:
+        os.link(src, dst)
+        make_read_only(dst)
+        return 'hardlink'
+    except OSError as e:
+        if e.errno not in LINK_UNSUPPORTED:
+            raise
+
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+    result = subprocess.run(['cp', '--reflink=always', src, dst], capture_output=True)
+    if result.returncode == 0:
+        return 'reflink'
+    return None
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def store_in_cas(file_path, digest):
+    """
+    Registra el original en el almacén direccionado por contenido.
+    - Si el blob no existe: el blob se crea como link del archivo recién ingerido.
+    - Si ya existe: el archivo del proyecto se sustituye por un link al blob
+      (mismo contenido, cero bytes extra y cero tiempo de copia).
+    Devuelve (ruta relativa del blob, método) o (None, None) si el FS no soporta links.
+    """
+    blob_path = cas_blob_path(digest)
+
+    if not os.path.exists(blob_path):
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            method = link_or_reflink(file_path, blob_path)
+        except FileExistsError:
+            # Otra ingesta del mismo contenido creó el blob entre la comprobación y el link
+            method = 'exists'
+        if method is None:
+            logger.warning(f"CAS: {file_path} se queda fuera del almacén (FS sin links).")
+            return None, None
+        if method != 'exists':
+            return cas_relative_path(digest), method
+
+    # Blobs enlazados antes de que los links fueran de solo lectura
+    make_read_only(blob_path)
+    if os.path.samefile(blob_path, file_path):
+        return cas_relative_path(digest), 'hardlink'
+
+    # Mismo hash pero distinto tamaño = blob corrupto: nunca enlazamos sobre él
+    if os.path.getsize(blob_path) != os.path.getsize(file_path):
+        raise ValueError(f"Blob CAS inconsistente para {digest}")
+
+    tmp_path = f"{file_path}.cas-link"
+    _discard(tmp_path)  # Resto de una ingesta interrumpida
+    method = link_or_reflink(blob_path, tmp_path)
+    if method is None:
+        logger.warning(f"CAS: no se pudo enlazar {file_path} al blob existente (FS sin links).")
+        return None, None
+    os.replace(tmp_path, file_path)
+    return cas_relative_path(digest), method
@@ -1,23 +1,198 @@
+import json
 import subprocess
 import os
 import shutil
 import logging
+import time
 import traceback
 from PIL import Image
 
-from celery import shared_task
+from celery import shared_task, group, chord
 from django.conf import settings
-from django.db import connection 
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, OperationalError, connection
+from django.utils import timezone
 from django.utils.text import slugify
-from .models import Version, SystemHealth
+from .models import Version, Asset, SystemHealth
 from .divergence_engine import PipelineStabilityIndex
+from .utils import calculate_sha256_with_manifest, get_video_metadata
+from .stills import STILL_EXTENSIONS, render_still_thumbnail
+from .sequences import ffmpeg_input as sequence_input, ingest_frames, sequence_stem
+from .transcode import (
+    build_footage_command, build_poster_command,
+    build_split_command, build_segment_command, build_concat_command, build_hls_remux_command,
+    build_sprite_command, hls_rung_variant, segment_variant_path, sprite_index, sprite_layout,
+)
 
 logger = logging.getLogger(__name__)
 
+def run_ingest_pipeline(instance):
+    """
+    Ingesta + enrutamiento de una Versión recién creada.
+    Se usa desde la señal (modo síncrono) y desde ingest_version_task (modo asíncrono).
+    """
+    archivo_fisico = instance.file.path
+    
+    # 1. INGESTA RÁPIDA (Cálculo de ADN / SHA-256 y Metadatos iniciales)
+    ingesta_ok = instance.ingest_and_verify(archivo_fisico)
+    
+    if ingesta_ok:
+        # 2. ENRUTAMIENTO INTELIGENTE
+        # Mandamos a Celery tanto Videos (Footage) como Imágenes (Stills)
+        # para que ambos tengan su thumbnail procesado.
+        needs_processing = [
+            Asset.AssetCategory.VIDEO, 
+            Asset.AssetCategory.IMAGE # <--- Agregamos imágenes al flujo de Celery
+        ]
+
+        # Las secuencias de imágenes siempre se codifican como footage (proxy + poster)
+        if instance.asset.category in needs_processing or instance.is_sequence:
+            # Actualizamos status a PROCESSING antes de delegar, para que el worker
+            # nunca pise un COMPLETED con un PROCESSING tardío.
+            Version.objects.filter(pk=instance.pk).update(transcoding_status='PROCESSING', updated_at=timezone.now())
+
+            # Delegamos la tarea (transcodificación o redimensionado).
+            # Los stills van a su propia cola: nunca esperan detrás de un encode largo.
+            if instance.asset.category == Asset.AssetCategory.IMAGE and not instance.is_sequence:
+                process_version_task.apply_async(
+                    args=[instance.pk], queue='stills', **settings.AXIOM_STILLS_TIME_LIMITS
+                )
+            else:
+                process_version_task.apply_async(args=[instance.pk], queue='transcode')
+            print(f"🚀 AXIOM: {instance.asset.category} detectado para {instance}. Tarea delegada.")
+        
+        elif instance.asset.category == Asset.AssetCategory.CODE:
+            # Scripts de Blender/Python no requieren procesamiento visual
+            Version.objects.filter(pk=instance.pk).update(transcoding_status='COMPLETED', updated_at=timezone.now())
+            print(f"⚡ AXIOM: Script registrado. No requiere procesamiento.")
+        
+        else:
+            # Otros formatos (PDFs de guion, Docs, etc.)
+            Version.objects.filter(pk=instance.pk).update(transcoding_status='COMPLETED', updated_at=timezone.now())
+            print(f"✅ AXIOM: Activo genérico registrado.")
+
+    else:
+        # Si el SHA-256 falla o el archivo está corrupto
+        Version.objects.filter(pk=instance.pk).update(transcoding_status='ERROR', updated_at=timezone.now())
+        print(f"⚠️ AXIOM: Divergencia detectada en ingesta inicial.")
+
+    return ingesta_ok
+
+def fail_ingest(version, message):
+    """Cierra una ingesta fallida en ERROR con su motivo (el 202 / status_url nunca queda colgado)."""
+    version.extra_metadata['ingest_error'] = message
+    try:
+        Version.objects.filter(pk=version.pk).update(
+            checksum_sha256=version.checksum_sha256,
+            extra_metadata=version.extra_metadata,
+            transcoding_status=Version.TranscodingStatus.ERROR,
+            updated_at=timezone.now()
+        )
+    except DatabaseError as e:
+        logger.error(f"🛑 No se pudo marcar en ERROR la versión {version.pk}: {e}")
+    logger.warning(f"⚠️ Ingesta rechazada para {version}: {message}")
+    return False
+
+def enqueue_ingest(version_ids):
+    """
+    Encola la ingesta de Versiones ya confirmadas (callback de on_commit). Si el broker no
+    responde, las filas quedan en INGESTING y requeue_stale_ingests_task las recoge.
+    """
+    try:
+        if len(version_ids) == 1:
+            ingest_version_task.delay(version_ids[0])
+        else:
+            group(ingest_version_task.s(pk) for pk in version_ids).apply_async()
+    except Exception as e:
+        logger.error(f"📥 No se pudo encolar la ingesta de {len(version_ids)} versiones (se re-encolarán): {e}")
+        return False
+    return True
+
+@shared_task(bind=True, max_retries=3)
+def ingest_version_task(self, version_id):
+    """
+    Ingesta asíncrona: SHA-256, reglas SSOT y ffprobe fuera del hilo web.
+    La Versión llega en estado INGESTING con el archivo ya persistido.
+    Cualquier fallo termina en ERROR con `ingest_error`; una caída de la DB se reintenta antes.
+    """
+    engine = PipelineStabilityIndex()
+    try:
+        version = Version.objects.select_related('asset__project').get(pk=version_id)
+    except Version.DoesNotExist:
+        # Borrada antes de que llegara el worker: no hay nada que ingerir
+        logger.warning(f"⚠️ Ingesta: la versión {version_id} ya no existe.")
+        return False
+    except OperationalError as e:
+        raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+    if version.transcoding_status != Version.TranscodingStatus.INGESTING:
+        # Entrega duplicada (re-encolado por requeue_stale_ingests_task): ya se ingirió
+        return False
+
+    try:
+        # 1. ADN del archivo (solo si no salió gratis del upload handler)
+        # (misma lectura: SHA-256 completo + manifiesto por bloques en paralelo)
+        # Secuencias: un digest por frame (en paralelo) + ADN combinado de la secuencia
+        if version.is_sequence:
+            # Siempre: filas SequenceFrame, frames_missing / frames_short y ADN desde disco
+            expected = version.checksum_sha256
+            ingest_frames(version)
+            if expected and expected != version.checksum_sha256:
+                raise ValidationError({'file': "Los frames en disco no coinciden con el ADN registrado de la secuencia."})
+        elif not version.checksum_sha256:
+            version.checksum_sha256, manifest = calculate_sha256_with_manifest(version.file.path)
+            version.extra_metadata.setdefault('chunk_manifest', manifest)
+
+        declared = version.extra_metadata.get('declared_sha256')
+        if declared and declared.lower() != version.checksum_sha256:
+            raise ValidationError({'file': "El hash del archivo no coincide con el declarado por el cliente."})
+
+        # 2. Reglas SSOT (duplicados globales y redundancia histórica)
+        version.verify_integrity(version.checksum_sha256)
+
+        Version.objects.filter(pk=version_id).update(
+            checksum_sha256=version.checksum_sha256, extra_metadata=version.extra_metadata,
+            filesize=version.filesize, frames_missing=version.frames_missing, frames_short=version.frames_short,
+            updated_at=timezone.now()
+        )
+
+        # 3. Metadatos (ffprobe) + enrutamiento a transcodificación
+        return run_ingest_pipeline(version)
+
+    except ValidationError as e:
+        engine.report_status('integrity', success=False)
+        return fail_ingest(version, " ".join(str(msg) for msgs in e.message_dict.values() for msg in msgs))
+    except OSError as e:
+        # Original ausente o ilegible
+        engine.report_status('storage', success=False)
+        return fail_ingest(version, f"No se pudo leer el original: {e}")
+    except OperationalError as e:
+        # Caída transitoria de la DB: reintento con backoff; agotados los reintentos, ERROR
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=30 * 2 ** self.request.retries)
+        engine.report_status('database', success=False)
+        return fail_ingest(version, f"Base de datos no disponible: {e}")
+    except Exception as e:
+        logger.exception(f"🛑 Ingesta de {version_id} fallida")
+        engine.report_status('database' if isinstance(e, DatabaseError) else 'integrity', success=False)
+        return fail_ingest(version, f"{type(e).__name__}: {e}")
+
+def source_has_audio(version, input_path):
+    """
+    ¿El original trae audio? Se lee del ffprobe de la ingesta; si no quedó registrado
+    se vuelve a sondear. Nunca se supone: un -map de audio inexistente rompe el HLS.
+    """
+    if version.is_sequence:
+        return False
+    raw_info = version.extra_metadata.get('video_raw_info') or {}
+    if 'has_audio' in raw_info:
+        return raw_info['has_audio']
+    return get_video_metadata(input_path).get('has_audio', False)
+
 @shared_task(bind=True)
-def process_version_task(self, version_id):
+def process_version_task(self, version_id, thumbnail_only=False):
     """
     Tarea central de AXIOM (Procesa Footage y Stills con rutas estrictas).
+    Con thumbnail_only=True solo se regenera el poster frame del footage.
     """
     engine = PipelineStabilityIndex()
     try:
@@ -31,6 +206,8 @@ def process_version_task(self, version_id):
         a_slug = slugify(version.asset.name)
         v_str = f"v{version.version_number:03d}"
         base_name = os.path.splitext(os.path.basename(version.file.name))[0]
+        if version.is_sequence:
+            base_name = sequence_stem(version.file.name)
         
         # 2. Rutas Físicas (Donde FFmpeg/Pillow escribirán los archivos en el disco)
         final_dir = os.path.join(settings.MEDIA_ROOT, 'assets', p_slug, a_slug, v_str)
@@ -40,21 +217,22 @@ def process_version_task(self, version_id):
         # Usamos f-strings puros para evitar problemas con os.path.join y los FileFields
         base_db_path = f"assets/{p_slug}/{a_slug}/{v_str}"
 
+        # Secuencias: FFmpeg lee los frames directamente (sin contenedor intermedio)
+        input_args = []
+        if version.is_sequence:
+            input_args, input_path = sequence_input(version, version.fps or version.asset.project.target_fps, final_dir)
+
         # --- RAMIFICACIÓN DE PROCESAMIENTO ---
-        IMAGE_EXTS = ['.jpg', '.jpeg', '.png', '.tiff', '.psd', '.tga']
-        
-        if ext in IMAGE_EXTS:
+        if ext in STILL_EXTENSIONS and not version.is_sequence:
             # ---> RUTA A: PROCESAMIENTO DE STILLS (Imagen) <---
             logger.info(f"🖼️ Procesando Still: {version.uuid}")
             thumb_filename = f"{base_name}_thumb.jpg"
             thumb_path = os.path.join(final_dir, thumb_filename)
             
-            with Image.open(input_path) as img:
-                img.thumbnail((480, 270)) 
-                # Convertir a RGB por si es PNG para poder guardar como JPEG
-                if img.mode in ('RGBA', 'P'): 
-                    img = img.convert('RGB')
-                img.save(thumb_path, "JPEG", quality=85)
+            # Nunca se decodifica el raster completo si el formato lo evita (ver stills.py)
+            with engine.track('thumbnail', nbytes=version.filesize):
+                still_info = render_still_thumbnail(input_path, thumb_path)
+            version.extra_metadata['still'] = still_info
             
             # Guardamos la ruta estricta en DB
             db_thumb_path = f"{base_db_path}/{thumb_filename}"
@@ -64,6 +242,26 @@ def process_version_task(self, version_id):
             
             engine.report_status('integrity', success=True)
             
+        elif thumbnail_only:
+            # ---> RUTA B': SOLO POSTER FRAME (Footage ya transcodificado) <---
+            # Seek del lado de la entrada: ffmpeg salta directo al keyframe más cercano.
+            logger.info(f"🖼️ Regenerando poster: {version.uuid}")
+            thumb_filename = f"{base_name}_thumb.jpg"
+            thumb_path = os.path.join(final_dir, thumb_filename)
+
+            with engine.track('thumbnail'):
+                result = subprocess.run(
+                    build_poster_command(input_path, thumb_path, version.duration, input_args),
+                    capture_output=True, text=True
+                )
+            if result.returncode != 0:
+                raise Exception(f"FFmpeg Error: {result.stderr}")
+
+            version.thumbnail = f"{base_db_path}/{thumb_filename}"
+            if not version.proxy_file_path:
+                version.transcoding_status = Version.TranscodingStatus.COMPLETED
+            engine.report_status('ffmpeg', success=True)
+
         else:
             # ---> RUTA B: PROCESAMIENTO DE FOOTAGE (Video) <---
             logger.info(f"🎞️ Procesando Footage: {version.uuid}")
@@ -75,41 +273,351 @@ def process_version_task(self, version_id):
 
             dept_label = version.get_department_display().upper()
             watermark = f"AXIOM | {version.asset.name} | {dept_label} | {v_str}"
+
+            # Escalera adaptativa HLS (opcional por proyecto)
+            try:
+                ladder = version.asset.project.hls_ladder()
+            except ValidationError as e:
+                logger.warning(f"📶 Escalera HLS inválida en '{version.asset.project}', se omite: {e}")
+                ladder = []
+            hls_job = None
+            if ladder:
+                hls_dirname = f"{base_name}_hls"
+                hls_dir = os.path.join(final_dir, hls_dirname)
+                shutil.rmtree(hls_dir, ignore_errors=True)
+                os.makedirs(hls_dir)
+                hls_job = {
+                    'ladder': ladder,
+                    'hls_dir': hls_dir,
+                    'hls_db_path': f"{base_db_path}/{hls_dirname}/master.m3u8",
+                    'fps': version.fps,
+                    'has_audio': source_has_audio(version, input_path),
+                    'aspect': (version.resolution_width / version.resolution_height
+                               if version.resolution_width and version.resolution_height else None),
+                }
+
+            # Sprite sheet de scrub (N frames equiespaciados en una sola imagen)
+            sprite = sprite_job(version, final_dir, base_name)
+
+            # Renditions extra configurables (ej. 1080p), en el mismo decode
+            renditions = []
+            for extra in settings.AXIOM_EXTRA_RENDITIONS:
+                renditions.append({
+                    'name': extra['name'],
+                    'height': extra['height'],
+                    'crf': extra.get('crf', 22),
+                    'filename': f"{base_name}_{extra['name']}.mp4",
+                    'path': os.path.join(final_dir, f"{base_name}_{extra['name']}.mp4"),
+                })
+
+            # Footage largo: lo repartimos entre los workers de la granja
+            # (el corte sin re-encodear necesita un contenedor: las secuencias van en un solo encode)
+            if (not version.is_sequence and version.duration and
+                    version.duration >= settings.AXIOM_SEGMENTED_TRANSCODE_MIN_DURATION):
+                launch_segmented_transcode(
+                    version, input_path, watermark,
+                    proxy_path=proxy_path, proxy_db_path=f"{base_db_path}/{proxy_filename}",
+                    thumb_path=thumb_path, thumb_db_path=f"{base_db_path}/{thumb_filename}",
+                    renditions=renditions, hls_job=hls_job, sprite=sprite,
+                )
+                return
             
-            command = [
-                'ffmpeg', '-y', '-i', input_path,
-                '-vf', f"scale=-2:720,drawtext=text='{watermark}':x=10:y=H-45:fontsize=22:fontcolor=white:box=1:boxcolor=black@0.4",
-                '-c:v', 'libx264', '-preset', 'fast', '-crf', '22', 
-                '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
-                '-c:a', 'aac', '-b:a', '128k',
-                proxy_path
-            ]
+            # Un solo decode: proxy + poster frame + renditions salen del mismo ffmpeg
+            command = build_footage_command(
+                input_path, proxy_path, thumb_path, watermark,
+                duration=version.duration, renditions=renditions,
+                ladder=ladder, hls_dir=hls_job and hls_job['hls_dir'],
+                fps=version.fps, has_audio=bool(hls_job and hls_job['has_audio']),
+                aspect=hls_job and hls_job['aspect'],
+                input_args=input_args, sprite=sprite,
+            )
 
+            started = time.perf_counter()
             result = subprocess.run(command, capture_output=True, text=True)
             
             if result.returncode == 0:
-                # Restauramos el comando exacto que funcionaba antes (-update 1)
-                subprocess.run(['ffmpeg', '-y', '-i', input_path, '-ss', '00:00:05', '-vframes', '1', '-update', '1', thumb_path], check=True)
-                
+                engine.report_timing('transcode', time.perf_counter() - started, version.filesize)
                 # Guardamos las rutas estrictas en DB
                 version.proxy_file_path = f"{base_db_path}/{proxy_filename}"
                 version.thumbnail = f"{base_db_path}/{thumb_filename}"
+                if renditions:
+                    version.extra_metadata['renditions'] = {
+                        r['name']: f"{base_db_path}/{r['filename']}" for r in renditions
+                    }
+                if hls_job:
+                    version.hls_playlist_path = hls_job['hls_db_path']
+                if sprite:
+                    finish_sprite(version, sprite, base_db_path)
                 version.transcoding_status = Version.TranscodingStatus.COMPLETED
                 engine.report_status('ffmpeg', success=True)
             else:
                 raise Exception(f"FFmpeg Error: {result.stderr}")
 
         # Guardado final unificado
-        version.save(update_fields=['proxy_file_path', 'thumbnail', 'transcoding_status'])
+        with engine.track('db_save'):
+            version.save(update_fields=[
+                'proxy_file_path', 'hls_playlist_path', 'thumbnail', 'sprite_sheet', 'sprite_index',
+                'transcoding_status', 'extra_metadata',
+            ])
         logger.info(f"✅ Versión {version.uuid} procesada con éxito.")
 
     except Exception as e:
         engine.report_status('ffmpeg', success=False)
         error_stack = traceback.format_exc()
+        if thumbnail_only:
+            # Un poster fallido no invalida una versión ya reproducible: el estado no cambia
+            logger.error(f"🖼️ Regeneración de poster fallida para {version_id}:\n{error_stack}")
+            raise e
         logger.error(f"🛑 Error crítico en Pipeline:\n{error_stack}")
-        Version.objects.filter(pk=version_id).update(transcoding_status=Version.TranscodingStatus.ERROR)
+        Version.objects.filter(pk=version_id).update(transcoding_status=Version.TranscodingStatus.ERROR, updated_at=timezone.now())
         raise e
 
+# --- SPRITE SHEETS DE SCRUB ---
+
+def sprite_job(version, final_dir, base_name):
+    """Parámetros del sprite sheet de una Versión (None si no se conoce su número de frames)."""
+    if version.is_sequence:
+        total_frames = version.frame_count
+    elif version.duration and version.fps:
+        total_frames = round(version.duration * version.fps)
+    else:
+        return None
+    if not total_frames:
+        return None
+
+    columns = settings.AXIOM_SPRITE_COLUMNS
+    interval, tiles, rows = sprite_layout(total_frames, settings.AXIOM_SPRITE_FRAMES, columns)
+    filename = f"{base_name}_sprite.{settings.AXIOM_SPRITE_FORMAT}"
+    return {
+        'path': os.path.join(final_dir, filename), 'filename': filename,
+        'interval': interval, 'tiles': tiles, 'rows': rows, 'columns': columns,
+        'tile_width': settings.AXIOM_SPRITE_TILE_WIDTH,
+    }
+
+def finish_sprite(version, sprite, db_dir):
+    """Escribe el índice JSON junto al sprite y registra ambos en la Versión (sin guardar)."""
+    with Image.open(sprite['path']) as img:
+        width, height = img.size
+    first_frame = version.frame_start if version.is_sequence else 0
+    index = sprite_index(sprite, width // sprite['columns'], height // sprite['rows'], first_frame)
+
+    index_filename = f"{os.path.splitext(sprite['filename'])[0]}.json"
+    with open(os.path.join(os.path.dirname(sprite['path']), index_filename), 'w') as f:
+        json.dump(index, f)
+
+    version.sprite_sheet = f"{db_dir}/{sprite['filename']}"
+    version.sprite_index = f"{db_dir}/{index_filename}"
+    # La rejilla (sin la lista de frames) le basta al admin para el scrub
+    version.extra_metadata['sprite'] = {key: value for key, value in index.items() if key != 'frames'}
+
+# --- TRANSCODIFICACIÓN SEGMENTADA (Footage largo) ---
+
+def launch_segmented_transcode(version, input_path, watermark, proxy_path, proxy_db_path, thumb_path, thumb_db_path,
+                               renditions=(), hls_job=None, sprite=None):
+    """
+    Corta el original en keyframes y reparte los segmentos como un chord de Celery:
+    N encodes en paralelo -> concatenación sin pérdida en el proxy final.
+    Cada segmento se decodifica una vez y produce también las renditions y los peldaños HLS.
+    """
+    # El directorio de trabajo vive en MEDIA_ROOT: todos los workers lo ven (NFS)
+    work_dir = os.path.join(settings.MEDIA_ROOT, 'tmp', 'segments', str(version.uuid))
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+
+    segment_pattern = os.path.join(work_dir, 'src_%05d.mkv')
+    result = subprocess.run(
+        build_split_command(input_path, segment_pattern, settings.AXIOM_SEGMENT_DURATION),
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg Split Error: {result.stderr}")
+
+    segments = sorted(f for f in os.listdir(work_dir) if f.startswith('src_'))
+    logger.info(f"✂️ {version.uuid}: {len(segments)} segmentos de {settings.AXIOM_SEGMENT_DURATION}s")
+
+    header = group(
+        transcode_segment_task.s(
+            os.path.join(work_dir, name),
+            os.path.join(work_dir, name.replace('src_', 'enc_').replace('.mkv', '.mp4')),
+            watermark, renditions=renditions, hls_job=hls_job,
+        )
+        for name in segments
+    )
+    callback = concat_segments_task.s(
+        version.pk, work_dir, input_path, proxy_path, proxy_db_path, thumb_path, thumb_db_path,
+        renditions=renditions, hls_job=hls_job, sprite=sprite
+    ).on_error(segmented_transcode_failed.si(version.pk, work_dir))
+    chord(header)(callback)
+
+@shared_task(bind=True)
+def transcode_segment_task(self, segment_path, output_path, watermark, renditions=(), hls_job=None):
+    """Encode de un segmento (mismo filtro/parámetros que el proxy de un solo job, más sus variantes)."""
+    ladder = hls_job['ladder'] if hls_job else ()
+    result = subprocess.run(
+        build_segment_command(
+            segment_path, output_path, watermark, renditions=renditions, ladder=ladder,
+            fps=hls_job and hls_job['fps'], aspect=hls_job and hls_job.get('aspect'),
+        ),
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg Segment Error: {result.stderr}")
+    return output_path
+
+def concat_variant(work_dir, encoded_segments, variant, source_path, output_path):
+    """Concatena una variante (None = proxy) de todos los segmentos, con el audio del original."""
+    list_path = os.path.join(work_dir, f"concat_{variant or 'proxy'}.txt")
+    with open(list_path, 'w') as f:
+        for segment in sorted(encoded_segments):
+            f.write(f"file '{segment_variant_path(segment, variant) if variant else segment}'\n")
+
+    result = subprocess.run(build_concat_command(list_path, source_path, output_path), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg Concat Error ({variant or 'proxy'}): {result.stderr}")
+
+@shared_task(bind=True)
+def concat_segments_task(self, encoded_segments, version_id, work_dir, source_path,
+                         proxy_path, proxy_db_path, thumb_path, thumb_db_path,
+                         renditions=(), hls_job=None, sprite=None):
+    """
+    Une los segmentos encodeados en el proxy final (y en cada rendition), empaqueta la
+    escalera HLS con remux de los peldaños y genera el poster frame (y el sprite sheet).
+    """
+    engine = PipelineStabilityIndex()
+    version = Version.objects.get(pk=version_id)
+
+    concat_variant(work_dir, encoded_segments, None, source_path, proxy_path)
+    for rendition in renditions:
+        concat_variant(work_dir, encoded_segments, rendition['name'], source_path, rendition['path'])
+
+    # HLS: los peldaños ya vienen encodeados por segmento; solo se concatenan y se remuxan
+    if hls_job:
+        rung_paths = []
+        for height in hls_job['ladder']:
+            rung_path = os.path.join(work_dir, f"{hls_rung_variant(height)}.mp4")
+            concat_variant(work_dir, encoded_segments, hls_rung_variant(height), source_path, rung_path)
+            rung_paths.append(rung_path)
+        result = subprocess.run(
+            build_hls_remux_command(rung_paths, hls_job['hls_dir'], hls_job['ladder'], has_audio=hls_job['has_audio']),
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise Exception(f"FFmpeg HLS Error: {result.stderr}")
+        version.hls_playlist_path = hls_job['hls_db_path']
+
+    # Poster con seek de entrada (no vuelve a decodificar el original completo)
+    result = subprocess.run(build_poster_command(source_path, thumb_path, version.duration), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg Error: {result.stderr}")
+
+    # Sprite desde el proxy de 720p: mismo número de frames y mucho más barato que el original
+    db_dir = os.path.dirname(proxy_db_path)
+    if sprite:
+        result = subprocess.run(build_sprite_command(proxy_path, sprite), capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception(f"FFmpeg Sprite Error: {result.stderr}")
+        finish_sprite(version, sprite, db_dir)
+
+    version.proxy_file_path = proxy_db_path
+    version.thumbnail = thumb_db_path
+    if renditions:
+        version.extra_metadata['renditions'] = {r['name']: f"{db_dir}/{r['filename']}" for r in renditions}
+    version.transcoding_status = Version.TranscodingStatus.COMPLETED
+    version.save(update_fields=[
+        'proxy_file_path', 'hls_playlist_path', 'thumbnail', 'sprite_sheet', 'sprite_index',
+        'transcoding_status', 'extra_metadata',
+    ])
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+    engine.report_status('ffmpeg', success=True)
+    logger.info(f"✅ Versión {version.uuid} procesada con éxito ({len(encoded_segments)} segmentos).")
+
+@shared_task
+def segmented_transcode_failed(version_id, work_dir):
+    """Errback del chord: marca la versión en ERROR y limpia los segmentos."""
+    engine = PipelineStabilityIndex()
+    engine.report_status('ffmpeg', success=False)
+    Version.objects.filter(pk=version_id).update(transcoding_status=Version.TranscodingStatus.ERROR, updated_at=timezone.now())
+    shutil.rmtree(work_dir, ignore_errors=True)
+    logger.error(f"🛑 Transcodificación segmentada fallida para la versión {version_id}")
+
+@shared_task
+def recompute_project_qc_task(project_id):
+    """Re-evalúa el QC materializado de todo un proyecto (tras cambiar sus targets)."""
+    from .qc import recompute_qc
+    updated = recompute_qc(Version.objects.filter(asset__project_id=project_id))
+    logger.info(f"🎯 QC recalculado para el proyecto {project_id}: {updated} versiones.")
+    return updated
+
+@shared_task
+def scrub_media_task():
+    """
+    Avanza la pasada de scrub en curso durante AXIOM_SCRUB_TASK_BUDGET segundos.
+    Los scrubs completos y largos se lanzan con `manage.py scrub_media` (pool de procesos).
+    """
+    from .scrub import run_scrub
+    run = run_scrub(budget=settings.AXIOM_SCRUB_TASK_BUDGET)
+    return f"Scrub: {run.files_checked} archivos | {len(run.failures)} fallos | {run.status}"
+
+@shared_task
+def expire_upload_sessions_task():
+    """
+    Cierra las sesiones de subida por bloques abandonadas (OPEN, o ASSEMBLING cuyo proceso
+    murió, sin actividad durante AXIOM_UPLOAD_SESSION_TTL_HOURS) y libera su archivo de
+    staging y bloques a medio validar.
+    """
+    import glob
+    from datetime import timedelta
+    from .models import UploadSession
+
+    cutoff = timezone.now() - timedelta(hours=settings.AXIOM_UPLOAD_SESSION_TTL_HOURS)
+    pending = [UploadSession.SessionStatus.OPEN, UploadSession.SessionStatus.ASSEMBLING]
+    stale = UploadSession.objects.filter(status__in=pending, updated_at__lt=cutoff)
+    expired = 0
+    for session in stale.iterator():
+        for path in [session.staging_path] + glob.glob(f"{glob.escape(session.staging_path)}.*.chunk"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        # Condicional: un "complete" concurrente gana y la sesión no se toca
+        expired += UploadSession.objects.filter(
+            pk=session.pk, status__in=pending, updated_at__lt=cutoff
+        ).update(status=UploadSession.SessionStatus.EXPIRED, updated_at=timezone.now())
+    return f"Subidas expiradas: {expired}"
+
+@shared_task
+def requeue_stale_ingests_task():
+    """
+    Versiones en INGESTING sin cambios durante AXIOM_INGEST_REQUEUE_SECONDS: su tarea nunca
+    llegó al broker o murió con el worker. Se re-encolan; tras AXIOM_INGEST_REQUEUE_MAX
+    intentos se cierran en ERROR (el status_url nunca queda colgado).
+    """
+    from datetime import timedelta
+
+    cutoff = timezone.now() - timedelta(seconds=settings.AXIOM_INGEST_REQUEUE_SECONDS)
+    stale = Version.objects.filter(
+        transcoding_status=Version.TranscodingStatus.INGESTING, updated_at__lt=cutoff
+    ).only('extra_metadata', 'checksum_sha256')
+
+    requeued, failed = [], 0
+    for version in stale.iterator():
+        attempts = version.extra_metadata.get('ingest_requeued', 0)
+        if attempts >= settings.AXIOM_INGEST_REQUEUE_MAX:
+            fail_ingest(version, f"La ingesta no terminó tras {attempts} re-encolados.")
+            failed += 1
+            continue
+        version.extra_metadata['ingest_requeued'] = attempts + 1
+        # Condicional: si la ingesta terminó entre la lectura y aquí, no se toca
+        if Version.objects.filter(pk=version.pk, transcoding_status=Version.TranscodingStatus.INGESTING).update(
+            extra_metadata=version.extra_metadata, updated_at=timezone.now()
+        ):
+            requeued.append(version.pk)
+
+    if requeued:
+        enqueue_ingest(requeued)
+    return f"Ingestas re-encoladas: {len(requeued)} | cerradas en ERROR: {failed}"
+
 @shared_task
 def run_system_diagnostic():
     """Diagnóstico de infraestructura SRE."""
@@ -0,0 +1,147 @@
+# Telemetría compartida del Medidor de Divergencia.
+# Una sola foto (PSI + SystemHealth) en la caché de Django, recalculada como mucho una
+# vez por AXIOM_TELEMETRY_INTERVAL: N pantallas del cuarto de operaciones = 1 cálculo.
+# El stream SSE empuja la foto completa al conectar y después solo las claves que cambian.
+# Bajo WSGI no hay stream: cada conexión recibe una foto y se cierra (short polling).
+
+import asyncio
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .divergence_engine import PipelineStabilityIndex
+from .models import SystemHealth
+
+SNAPSHOT_KEY = "axiom_telemetry:snapshot"
+REFRESH_LOCK_KEY = "axiom_telemetry:refresh"
+KEEPALIVE_SECONDS = 15
+
+# Filas del panel de hardware: (campo de SystemHealth, nombre, clase de la barra,
+# umbral "sano" (>), etiqueta/color sano, etiqueta/color en alerta)
+HEALTH_ROWS = (
+    ('database_score', 'DATABASE', 'fill-db', 90, ('NOMINAL', 'var(--neon-green)'), ('CRITICAL', 'var(--neon-red)')),
+    ('storage_score', 'STORAGE', 'fill-storage', 10, ('NOMINAL', 'var(--neon-blue)'), ('LOW', 'var(--neon-yellow)')),
+    ('ffmpeg_score', 'FFMPEG', 'fill-ffmpeg', 0, ('READY', 'var(--neon-pink)'), ('OFFLINE', 'var(--neon-red)')),
+    ('integrity_score', 'INTEGRITY', 'fill-integrity', 95, ('OPTIMAL', 'var(--nixie-orange)'), ('WARNING', 'var(--neon-yellow)')),
+)
+
+engine = PipelineStabilityIndex()
+
+# Copia local al proceso: hasta que caduca no hace falta ni el viaje a la caché
+_local = {'snapshot': None}
+_local_lock = threading.Lock()
+
+# --- 1. Foto compartida ---
+
+def _health_report():
+    """SystemHealth de solo lectura (los defaults del modelo si el diagnóstico aún no corrió)."""
+    health = SystemHealth.objects.filter(id=1).first() or SystemHealth()
+    rows = []
+    for field, name, fill, threshold, ok, alert in HEALTH_ROWS:
+        score = round(getattr(health, field), 1)
+        label, color = ok if score > threshold else alert
+        rows.append({'key': field, 'name': name, 'fill': fill, 'score': score, 'label': label, 'color': color})
+    synced = timezone.localtime(health.last_diagnostic).strftime('%H:%M:%S') if health.last_diagnostic else None
+    return {'rows': rows, 'synced_at': synced}
+
+def compute_snapshot():
+    """Foto completa del medidor (la parte cara: Redis + DB)."""
+    telemetry = engine.get_diagnostics()
+    return {
+        'psi': telemetry['psi_score'],
+        'status': telemetry['status'],
+        'world_line': telemetry['world_line'],
+        'is_stable': telemetry['is_stable'],
+        'components': telemetry['components'],
+        'stages': telemetry['stages'],
+        'health': _health_report(),
+        'at': time.time(),
+    }
+
+def get_snapshot():
+    """
+    Foto vigente. Si caducó, un único proceso la recalcula (cache.add como candado);
+    el resto sigue sirviendo la anterior mientras tanto.
+    """
+    interval = settings.AXIOM_TELEMETRY_INTERVAL
+    now = time.time()
+    local = _local['snapshot']
+    if local and now < local['at'] + interval:
+        return local
+
+    with _local_lock:
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is None or now >= snapshot['at'] + interval:
+            if snapshot is None or cache.add(REFRESH_LOCK_KEY, 1, timeout=interval):
+                snapshot = compute_snapshot()
+                cache.set(SNAPSHOT_KEY, snapshot, timeout=None)
+        _local['snapshot'] = snapshot
+    return snapshot
+
+# --- 2. Server-Sent Events ---
+
+def snapshot_delta(previous, current):
+    """Claves de la foto que cambiaron (sin contar la marca de tiempo)."""
+    return {key: value for key, value in current.items() if key != 'at' and previous.get(key) != value}
+
+def sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+class SnapshotFeed:
+    """Estado de un cliente: qué foto vio por última vez y cuándo se le escribió algo."""
+
+    def __init__(self):
+        self.sent = None
+        self.last_write = time.monotonic()
+
+    def next_message(self, snapshot):
+        """Foto completa, delta, keepalive o '' si no hay nada que enviar."""
+        now = time.monotonic()
+        if self.sent is None:
+            message = sse_message('snapshot', {k: v for k, v in snapshot.items() if k != 'at'})
+        elif snapshot is self.sent or snapshot['at'] == self.sent['at']:
+            message = ''
+        else:
+            delta = snapshot_delta(self.sent, snapshot)
+            message = sse_message('delta', delta) if delta else ''
+        if not message and now - self.last_write >= KEEPALIVE_SECONDS:
+            # Comentario SSE: mantiene viva la conexión a través de proxies
+            message = ": keepalive\n\n"
+        self.sent = snapshot
+        if message:
+            self.last_write = now
+        return message
+
+def _stream_header():
+    # El navegador reconecta solo al terminar la conexión (EventSource)
+    return f"retry: {settings.AXIOM_TELEMETRY_INTERVAL * 1000}\n\n"
+
+async def event_stream():
+    """Stream asíncrono (ASGI): no ocupa un hilo por pantalla mientras espera."""
+    from asgiref.sync import sync_to_async
+
+    feed = SnapshotFeed()
+    deadline = time.monotonic() + settings.AXIOM_TELEMETRY_STREAM_SECONDS
+    yield _stream_header()
+    while time.monotonic() < deadline:
+        message = feed.next_message(await sync_to_async(get_snapshot)())
+        if message:
+            yield message
+        await asyncio.sleep(settings.AXIOM_TELEMETRY_INTERVAL)
+
+def poll_message(last_event_id=None):
+    """
+    WSGI: un stream abierto ocuparía un hilo por pantalla. Se responde una sola vez y se
+    cierra; EventSource reconecta tras `retry` con Last-Event-ID y, si la foto no cambió,
+    la respuesta no trae datos.
+    """
+    snapshot = get_snapshot()
+    stamp = repr(snapshot['at'])
+    message = _stream_header()
+    if last_event_id != stamp:
+        message += f"id: {stamp}\n" + sse_message('snapshot', {k: v for k, v in snapshot.items() if k != 'at'})
+    return message
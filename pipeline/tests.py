@@ -1,3 +1,1004 @@
-from django.test import TestCase
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, JpegImagePlugin, TiffImagePlugin
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .admin import VersionAdmin
+from .asgi_upload import StreamingUploadRouter
+from .digest_cache import clear_memory_cache
+from .dropfolders import DropFolderRule, DropFolderWatcher
+from .hashing import ChunkedHasher, hash_file_with_manifest, verify_manifest
+from .models import Asset, DropFolderEntry, Project, ScrubRun, UploadSession, Version, VersionCounter
+from .publishing import REJECT_DUPLICATE, REJECT_INVALID, publish_batch
+from .qc import annotate_qc, annotated_qc_codes, evaluate_qc, recompute_qc
+from .scrub import (
+    SCRUB_DEFERRED, SCRUB_MISMATCH, SCRUB_MISSING, SCRUB_OK, run_scrub, scrub_file, scrub_sequence,
+)
+from .sequences import EXR_MAGIC, frame_is_complete, hash_frames, sequence_digest, short_frames
+from .stills import THUMB_SIZE, StillTooLarge, render_still_thumbnail
+from .storage import cas_blob_path, store_in_cas
+from .tasks import process_version_task, requeue_stale_ingests_task
+from .transcode import build_hls_remux_command, build_segment_command, hls_output_args, ladder_maxrate_kbps
+from .utils import calculate_sha256
+
+CHUNK = 1024
+
+
+def make_version(asset, user, department=Version.Department.COMPOSITING, **fields):
+    """
+    Versión mínima sin pasar por la ingesta: nace en INGESTING (el hash y ffprobe
+    quedan para Celery, que en un TestCase nunca se dispara porque no hay commit).
+    """
+    version = Version(
+        asset=asset, uploaded_by=user, department=department,
+        transcoding_status=Version.TranscodingStatus.INGESTING, **fields
+    )
+    version.file.name = f"tests/{uuid.uuid4().hex}.bin"
+    version.save()
+    return version
+
+
+class MediaRootMixin:
+    """MEDIA_ROOT y staging temporales (las subidas escriben y mueven archivos reales)."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp(prefix='axiom-tests-')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=self.media_root,
+            AXIOM_STAGING_ROOT=os.path.join(self.media_root, 'staging'),
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+# --- 1. Subida por bloques ---
+@override_settings(AXIOM_ASYNC_INGEST=True, AXIOM_UPLOAD_MIN_CHUNK_SIZE=CHUNK)
+class ChunkedUploadTests(MediaRootMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('artist')
+        self.project = Project.objects.create(title='Chunked', owner=self.user)
+        self.client.force_authenticate(self.user)
+        self.data = os.urandom(CHUNK * 2 + 100)
+
+    def open_session(self, **extra):
+        payload = {
+            'asset_name': 'sh010_plate', 'filename': 'plate.bin',
+            'total_size': len(self.data), 'chunk_size': CHUNK, **extra,
+        }
+        response = self.client.post(
+            reverse('upload-session-create', kwargs={'project_id': self.project.pk}), payload, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return UploadSession.objects.get(uuid=response.data['session_id'])
+
+    def put_chunk(self, session, index, body=None, digest=None):
+        body = self.data[index * CHUNK:(index + 1) * CHUNK] if body is None else body
+        return self.client.put(
+            reverse('upload-chunk', kwargs={'session_id': session.uuid, 'index': index}),
+            data=body, content_type='application/octet-stream',
+            HTTP_X_CHUNK_SHA256=digest or hashlib.sha256(body).hexdigest(),
+        )
+
+    def complete(self, session):
+        return self.client.post(reverse('upload-complete', kwargs={'session_id': session.uuid}))
+
+    def test_out_of_order_chunks_assemble_the_original(self):
+        session = self.open_session(sha256=hashlib.sha256(self.data).hexdigest())
+        for index in reversed(range(session.total_chunks)):
+            self.assertEqual(self.put_chunk(session, index).status_code, 201)
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 202)
+
+        version = Version.objects.get(pk=response.data['data']['id'])
+        with open(version.file.path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(os.path.exists(session.staging_path))
+        self.assertEqual(len(version.extra_metadata['chunk_manifest']['chunks']), session.total_chunks)
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSession.SessionStatus.COMPLETED)
+
+    def test_corrupt_retry_never_overwrites_an_accepted_chunk(self):
+        session = self.open_session()
+        self.assertEqual(self.put_chunk(session, 0).status_code, 201)
+
+        # Reintento con bytes dañados pero el hash del bloque bueno
+        good_digest = hashlib.sha256(self.data[:CHUNK]).hexdigest()
+        response = self.put_chunk(session, 0, body=b'\0' * CHUNK, digest=good_digest)
+        self.assertEqual(response.status_code, 400)
+        # Reintento truncado
+        self.assertEqual(self.put_chunk(session, 0, body=self.data[:10]).status_code, 400)
+
+        with open(session.staging_path, 'rb') as f:
+            self.assertEqual(f.read(CHUNK), self.data[:CHUNK])
+        self.assertEqual(os.listdir(os.path.dirname(session.staging_path)), [os.path.basename(session.staging_path)])
+
+    def test_complete_reports_missing_chunks(self):
+        session = self.open_session()
+        self.put_chunk(session, 1)
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['missing_chunks'], [0, 2])
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSession.SessionStatus.OPEN)
+
+    def test_closed_session_rejects_a_second_complete(self):
+        session = self.open_session()
+        for index in range(session.total_chunks):
+            self.put_chunk(session, index)
+
+        self.assertEqual(self.complete(session).status_code, 202)
+        self.assertEqual(self.complete(session).status_code, 409)
+        self.assertEqual(Version.objects.filter(asset__project=self.project).count(), 1)
+
+    @override_settings(AXIOM_ASYNC_INGEST=False)
+    def test_sync_complete_hashes_after_claiming_the_session(self):
+        session = self.open_session(sha256='0' * 64)
+        for index in range(session.total_chunks):
+            self.put_chunk(session, index)
+
+        def hash_while_claimed(path):
+            # Durante el hash la sesión ya está reclamada: otro "complete" no espera al candado
+            self.assertEqual(UploadSession.objects.get(pk=session.pk).status, UploadSession.SessionStatus.ASSEMBLING)
+            self.assertEqual(self.complete(session).status_code, 409)
+            return calculate_sha256(path)
+
+        with mock.patch('pipeline.views.calculate_sha256', side_effect=hash_while_claimed):
+            self.assertEqual(self.complete(session).status_code, 400)
+        # Hash declarado incorrecto: la sesión vuelve a OPEN con el staging intacto
+        session.refresh_from_db()
+        self.assertEqual(session.status, UploadSession.SessionStatus.OPEN)
+        with open(session.staging_path, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+
+
+# --- 2. QC: evaluate_qc (instancia) == annotate_qc / recompute_qc (SQL) ---
+class QCEquivalenceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('qc')
+        project = Project.objects.create(
+            title='QC', owner=cls.user, target_fps=24.0, target_width=1920, target_height=1080
+        )
+        video = Asset.objects.create(name='plate', project=project, category=Asset.AssetCategory.VIDEO,
+                                     checksum_sha256='a' * 64)
+        unhashed = Asset.objects.create(name='raw', project=project, category=Asset.AssetCategory.VIDEO)
+        code = Asset.objects.create(name='tool', project=project, category=Asset.AssetCategory.CODE)
+
+        cases = [
+            (video, {'fps': 24.0, 'resolution_width': 1920, 'resolution_height': 1080}),
+            (video, {'fps': 24.005, 'resolution_width': 1920, 'resolution_height': 1080}),
+            (video, {'fps': 25.0, 'resolution_width': 1920, 'resolution_height': 1080}),
+            (video, {'fps': 24.0, 'resolution_width': 1280, 'resolution_height': 720}),
+            (video, {'fps': 24.0, 'resolution_width': 1920, 'resolution_height': None}),
+            (video, {'fps': None, 'resolution_width': 1920, 'resolution_height': 1080}),
+            (video, {'fps': 24.0, 'resolution_width': 0}),
+            (video, {'fps': 24.0, 'resolution_width': 1920, 'resolution_height': 1080, 'frames_missing': 2}),
+            (unhashed, {'fps': 30.0, 'resolution_width': 1920, 'resolution_height': 1080, 'frames_short': 1}),
+            (unhashed, {'fps': None}),
+            (code, {}),
+        ]
+        for asset, fields in cases:
+            make_version(asset, cls.user, **fields)
+
+    def test_annotations_match_instance_rules(self):
+        versions = annotate_qc(Version.objects.select_related('asset__project'))
+        self.assertEqual(len(versions), 11)
+        for version in versions:
+            with self.subTest(version=version.pk):
+                self.assertEqual(annotated_qc_codes(version), evaluate_qc(version))
+                self.assertEqual(version.qc_ok, not evaluate_qc(version))
+
+    def test_recompute_materializes_instance_rules(self):
+        Version.objects.update(qc_passed=None, qc_errors=[])
+        self.assertEqual(recompute_qc(Version.objects.all()), 11)
+        for version in Version.objects.select_related('asset__project'):
+            with self.subTest(version=version.pk):
+                expected = evaluate_qc(version)
+                self.assertEqual(version.qc_errors, expected)
+                self.assertEqual(version.qc_passed, not expected)
+
+
+# --- 3. API de lectura: cursor y GET condicional ---
+class ReadAPITests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader')
+        project = Project.objects.create(title='Read', owner=cls.user)
+        cls.asset = Asset.objects.create(name='sh020', project=project)
+        cls.versions = [make_version(cls.asset, cls.user) for _ in range(5)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_walks_every_row_once_newest_first(self):
+        url, seen = reverse('version-list') + '?page_size=2', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+
+        expected = Version.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('version-list'), {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_etag_revalidation(self):
+        url = reverse('version-detail', kwargs={'pk': self.versions[0].pk})
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+
+        cached = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        version = self.versions[0]
+        version.approval_status = Version.ApprovalStatus.REJECTED
+        version.save(update_fields=['approval_status', 'updated_at'])
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+
+    def test_etag_follows_the_related_asset(self):
+        url = reverse('version-detail', kwargs={'pk': self.versions[0].pk})
+        first = self.client.get(url)
+
+        self.asset.name = 'sh020_v2'
+        self.asset.save(update_fields=['name', 'updated_at'])
+        renamed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.data['asset_name'], 'sh020_v2')
+
+    def test_boolean_filters_accept_http_spellings(self):
+        Version.objects.filter(pk=self.versions[0].pk).update(qc_passed=False)
+        Version.objects.exclude(pk=self.versions[0].pk).update(qc_passed=True)
+        url = reverse('version-list')
+        for value, expected in (('true', 4), ('1', 4), ('False', 1), ('0', 1), ('true,false', 5)):
+            with self.subTest(value=value):
+                response = self.client.get(url, {'qc_passed': value})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), expected)
+        self.assertEqual(self.client.get(url, {'qc_passed': 'yes'}).status_code, 400)
+
+    def test_etag_depends_on_the_representation(self):
+        url = reverse('version-list')
+        full = self.client.get(url)
+        sparse = self.client.get(url, {'fields': 'id,version_number'})
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+        self.assertEqual(set(sparse.data['results'][0]), {'id', 'version_number'})
+
+
+# --- 4. Reserva de números de versión ---
+class VersionReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('publisher')
+        project = Project.objects.create(title='Lineage', owner=cls.user)
+        cls.asset = Asset.objects.create(name='sh030', project=project)
+
+    def test_numbers_and_parents_are_consecutive_per_department(self):
+        v1 = make_version(self.asset, self.user)
+        v2 = make_version(self.asset, self.user)
+        lighting = make_version(self.asset, self.user, department=Version.Department.LIGHTING)
+
+        self.assertEqual((v1.version_number, v2.version_number), (1, 2))
+        self.assertIsNone(v1.parent_version_id)
+        self.assertEqual(v2.parent_version_id, v1.pk)
+        self.assertEqual(lighting.version_number, 1)
+        self.assertIsNone(lighting.parent_version_id)
+
+    def test_failed_reservation_leaves_a_gap_never_a_duplicate(self):
+        make_version(self.asset, self.user)
+        lost, _ = VersionCounter.reserve(self.asset, Version.Department.COMPOSITING)
+        v3 = make_version(self.asset, self.user)
+        self.assertEqual((lost, v3.version_number), (2, 3))
+
+    def test_concurrent_reservations_get_the_right_parent(self):
+        v1 = make_version(self.asset, self.user)
+        # Dos publicaciones reservan antes de que ninguna guarde: ambas ven v1 como padre
+        pending = []
+        for _ in range(2):
+            version = Version(asset=self.asset, uploaded_by=self.user, department=Version.Department.COMPOSITING,
+                              transcoding_status=Version.TranscodingStatus.INGESTING)
+            version.assign_version_number()
+            version.file.name = f"tests/{uuid.uuid4().hex}.bin"
+            pending.append(version)
+        v2, v3 = pending
+        self.assertEqual((v2.parent_version_id, v3.parent_version_id), (v1.pk, v1.pk))
+
+        # v3 termina antes que v2
+        v3.save()
+        v2.save()
+        v2.refresh_from_db()
+        v3.refresh_from_db()
+        self.assertEqual(v2.parent_version_id, v1.pk)
+        self.assertEqual(v3.parent_version_id, v2.pk)
+        self.assertEqual(VersionCounter.objects.get(asset=self.asset).latest_version_id, v3.pk)
+
+    def test_reserve_many_hands_out_contiguous_blocks(self):
+        make_version(self.asset, self.user)
+        other = Asset.objects.create(name='sh040', project=self.asset.project)
+        reserved = VersionCounter.reserve_many({
+            (self.asset.pk, Version.Department.COMPOSITING): 3,
+            (other.pk, Version.Department.COMPOSITING): 2,
+        })
+        self.assertEqual(reserved[(self.asset.pk, Version.Department.COMPOSITING)][0], 2)
+        self.assertEqual(reserved[(other.pk, Version.Department.COMPOSITING)][0], 1)
+        self.assertEqual(VersionCounter.reserve(self.asset, Version.Department.COMPOSITING)[0], 5)
+
+    def test_reserve_many_locks_only_the_requested_pairs(self):
+        make_version(self.asset, self.user)
+        make_version(self.asset, self.user, department=Version.Department.LIGHTING)
+        with CaptureQueriesContext(connection) as queries:
+            VersionCounter.reserve_many({(self.asset.pk, Version.Department.COMPOSITING): 1})
+        locking = [q['sql'] for q in queries if 'pipeline_versioncounter' in q['sql'] and 'last_number' in q['sql']
+                   and q['sql'].startswith('SELECT')]
+        self.assertTrue(locking)
+        self.assertTrue(all('"department" = ' in sql for sql in locking))
+        self.assertEqual(
+            list(VersionCounter.objects.filter(VersionCounter._pairs({(self.asset.pk, Version.Department.COMPOSITING)}))
+                 .values_list('department', flat=True)),
+            [Version.Department.COMPOSITING]
+        )
+
+
+# --- 5. Admin: el listado no crece en consultas con el tamaño de página ---
+class VersionAdminQueryTests(TestCase):
+    # sesión, usuario, filtro de proyecto, COUNT(*) x2 y la página (asset + proyecto + QC en un SELECT)
+    CHANGELIST_QUERIES = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('supervisor', password='x')
+        project = Project.objects.create(title='Admin', owner=cls.admin)
+        for index in range(30):
+            asset = Asset.objects.create(name=f'sh{index:03d}', project=project, category=Asset.AssetCategory.VIDEO)
+            make_version(asset, cls.admin, fps=24.0, resolution_width=1920, resolution_height=1080)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:pipeline_version_changelist')
+
+    def test_changelist_query_count_is_constant(self):
+        for per_page in (5, 30):
+            with self.subTest(per_page=per_page), mock.patch.object(VersionAdmin, 'list_per_page', per_page):
+                with self.assertNumQueries(self.CHANGELIST_QUERIES):
+                    response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context['cl'].result_list), per_page)
+
+
+# --- 6. Escalera HLS ---
+class HLSLadderTests(TestCase):
+
+    def test_audio_is_mapped_only_when_present_and_optional(self):
+        silent = hls_output_args(['[h0]'], [360], '/tmp/hls')
+        self.assertNotIn('0:a:0?', silent)
+        self.assertIn('v:0,name:360p', silent)
+
+        with_audio = hls_output_args(['[h0]', '[h1]'], [360, 720], '/tmp/hls', has_audio=True)
+        self.assertEqual(with_audio.count('0:a:0?'), 2)
+        self.assertIn('v:0,a:0,name:360p v:1,a:1,name:720p', with_audio)
+
+    def test_segmented_mode_keeps_renditions_and_remuxes_the_ladder(self):
+        renditions = [{'name': '1080p', 'height': 1080, 'crf': 20}]
+        segment = build_segment_command('/w/src_00000.mkv', '/w/enc_00000.mp4', 'wm', renditions=renditions, ladder=[360, 720])
+        # Un solo decode del segmento: proxy + rendition + dos peldaños
+        self.assertEqual(segment.count('-i'), 1)
+        self.assertIn('[0:v]split=4', segment[segment.index('-filter_complex') + 1])
+        for path in ('/w/enc_00000.mp4', '/w/enc_00000.1080p.mp4', '/w/enc_00000.hls360p.mp4', '/w/enc_00000.hls720p.mp4'):
+            self.assertIn(path, segment)
+
+        remux = build_hls_remux_command(['/w/hls360p.mp4', '/w/hls720p.mp4'], '/tmp/hls', [360, 720], has_audio=True)
+        self.assertNotIn('-filter_complex', remux)
+        self.assertEqual(remux[remux.index('-c') + 1], 'copy')
+        self.assertIn('v:0,a:0,name:360p v:1,a:1,name:720p', remux)
+
+    def test_maxrate_follows_the_source_aspect(self):
+        self.assertLess(ladder_maxrate_kbps(720, 24, aspect=4 / 3), ladder_maxrate_kbps(720, 24))
+        self.assertGreater(ladder_maxrate_kbps(720, 24, aspect=2.39), ladder_maxrate_kbps(720, 24))
+
+    def test_project_ladder_is_validated(self):
+        owner = User.objects.create_user('ladder')
+        for ladder in ([360, 360], [361], [True], [360.0], '720', [99999]):
+            with self.subTest(ladder=ladder), self.assertRaises(ValidationError):
+                Project(title='HLS', owner=owner, proxy_ladder=ladder).full_clean()
+        self.assertEqual(Project(title='HLS', owner=owner, proxy_ladder=[1080, 360]).hls_ladder(), [360, 1080])
+
+
+# --- 7. Telemetría: bajo WSGI el stream es short polling ---
+class TelemetryPollTests(TestCase):
+
+    def test_wsgi_answers_once_and_skips_unchanged_snapshots(self):
+        url = reverse('divergence-dashboard-stream')
+        first = self.client.get(url)
+        self.assertEqual(first['Content-Type'], 'text/event-stream')
+        self.assertFalse(first.streaming)
+        body = first.content.decode()
+        self.assertIn('event: snapshot', body)
+
+        stamp = next(line[4:] for line in body.splitlines() if line.startswith('id: '))
+        unchanged = self.client.get(url, HTTP_LAST_EVENT_ID=stamp)
+        self.assertNotIn('event:', unchanged.content.decode())
+
+
+# --- 8. Secuencias: ADN con números de frame, frames cortados y scrub por frame ---
+def exr_bytes(chunks):
+    """EXR scanline mínimo: una cabecera con un atributo, tabla de offsets y bloques (y, tamaño, datos)."""
+    header = EXR_MAGIC + (2).to_bytes(4, 'little')
+    header += b'compression\0compression\0' + (1).to_bytes(4, 'little') + b'\x03' + b'\0'
+    offset = len(header) + 8 * len(chunks)
+    table, body = b'', b''
+    for y, data in enumerate(chunks):
+        table += (offset + len(body)).to_bytes(8, 'little')
+        body += y.to_bytes(4, 'little') + len(data).to_bytes(4, 'little') + data
+    return header + table + body
+
+
+class SequenceTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='axiom-seq-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.pattern = os.path.join(self.directory, 'shot.%04d.exr')
+
+    def write_frame(self, frame, content):
+        with open(self.pattern % frame, 'wb') as fp:
+            fp.write(content)
+
+    def test_digest_depends_on_frame_numbers(self):
+        manifest = [[1001, 4, 'a' * 64], [1002, 4, 'b' * 64]]
+        shifted = [[frame + 10, size, digest] for frame, size, digest in manifest]
+        self.assertNotEqual(sequence_digest(manifest), sequence_digest(shifted))
+
+    def test_solid_frames_are_not_short_but_truncated_ones_are(self):
+        rendered = exr_bytes([os.urandom(4096) for _ in range(4)])
+        for frame in (1001, 1002, 1004):
+            self.write_frame(frame, rendered)
+        self.write_frame(1003, exr_bytes([b'\0' * 16] * 4))  # Negro: comprime a casi nada
+        self.write_frame(1005, rendered[:len(rendered) // 3])
+
+        self.assertIs(frame_is_complete(self.pattern % 1003), True)
+        self.assertIs(frame_is_complete(self.pattern % 1005), False)
+        manifest, missing = hash_frames(self.pattern, 1001, 1006, workers=2)
+        self.assertEqual(missing, [1006])
+        self.assertEqual(short_frames(self.pattern, manifest), [1005])
+
+    def test_scrub_names_the_damaged_frame(self):
+        for frame in range(1001, 1004):
+            self.write_frame(frame, exr_bytes([os.urandom(256)]))
+        manifest, _ = hash_frames(self.pattern, 1001, 1003, workers=2)
+        expected = sequence_digest(manifest)
+        self.assertEqual(scrub_sequence(self.pattern, manifest, expected)[0], SCRUB_OK)
+
+        self.write_frame(1002, exr_bytes([os.urandom(256)]))
+        status, _, _, error = scrub_sequence(self.pattern, manifest, expected)
+        self.assertEqual(status, SCRUB_MISMATCH)
+        self.assertIn('1002', error)
+
+
+# --- 9. Publicación por lotes: motivos de rechazo e ingestas perdidas ---
+class BatchPublishTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('batch')
+        self.project = Project.objects.create(title='Batch', owner=self.user)
+        os.makedirs(settings.AXIOM_STAGING_ROOT)
+
+    def stage(self, name, content):
+        with open(os.path.join(settings.AXIOM_STAGING_ROOT, name), 'wb') as fp:
+            fp.write(content)
+        return hashlib.sha256(content).hexdigest()
+
+    def test_rejections_carry_their_reason(self):
+        digest = self.stage('a.bin', b'plate')
+        self.stage('b.bin', b'plate')
+        results = publish_batch(self.project, self.user, [
+            {'asset_name': 'sh010', 'path': 'a.bin', 'sha256': digest},
+            {'asset_name': 'sh020', 'path': 'b.bin', 'sha256': digest},
+            {'path': 'a.bin'},
+        ])
+        self.assertEqual(results[0]['status'], 'accepted')
+        self.assertEqual([r.get('reason') for r in results[1:]], [REJECT_DUPLICATE, REJECT_INVALID])
+
+    @override_settings(AXIOM_INGEST_REQUEUE_MAX=1)
+    def test_stale_ingests_are_requeued_then_failed(self):
+        asset = Asset.objects.create(name='sh050', project=self.project)
+        version = make_version(asset, self.user)
+        stale = timezone.now() - timedelta(seconds=settings.AXIOM_INGEST_REQUEUE_SECONDS + 1)
+
+        Version.objects.filter(pk=version.pk).update(updated_at=stale)
+        with mock.patch('pipeline.tasks.enqueue_ingest') as enqueue:
+            requeue_stale_ingests_task()
+        enqueue.assert_called_once_with([version.pk])
+
+        Version.objects.filter(pk=version.pk).update(updated_at=stale)
+        requeue_stale_ingests_task()
+        version.refresh_from_db()
+        self.assertEqual(version.transcoding_status, Version.TranscodingStatus.ERROR)
+
+
+# --- 10. CAS: links de solo lectura y sin excepciones cuando no se puede enlazar ---
+class ContentStoreTests(MediaRootMixin, TestCase):
+
+    def original(self, name, content):
+        path = os.path.join(self.media_root, name)
+        with open(path, 'wb') as fp:
+            fp.write(content)
+        return path, hashlib.sha256(content).hexdigest()
+
+    def test_shared_plates_are_one_read_only_inode(self):
+        first, digest = self.original('a.mov', b'plate')
+        second, _ = self.original('b.mov', b'plate')
+        store_in_cas(first, digest)
+        store_in_cas(second, digest)
+        self.assertTrue(os.path.samefile(second, cas_blob_path(digest)))
+        self.assertFalse(os.stat(second).st_mode & 0o222)
+
+    def test_link_refused_keeps_the_original_as_a_copy(self):
+        path, digest = self.original('c.mov', b'plate-c')
+        with mock.patch('os.link', side_effect=PermissionError(13, 'denied')), \
+                mock.patch('pipeline.storage.subprocess.run', return_value=mock.Mock(returncode=1)):
+            self.assertEqual(store_in_cas(path, digest), (None, None))
+        self.assertTrue(os.path.exists(path))
+
+
+# --- 11. Ingesta: el hash de la subida no se recalcula (salvo force_verify) ---
+@override_settings(AXIOM_CAS_ENABLED=False)
+class IngestVerifyTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('ingest')
+        project = Project.objects.create(title='Ingest', owner=self.user)
+        self.asset = Asset.objects.create(name='sh010', project=project, category=Asset.AssetCategory.CODE)
+
+    def version_on_disk(self, uploaded, on_disk):
+        version = make_version(self.asset, self.user, checksum_sha256=hashlib.sha256(uploaded).hexdigest())
+        os.makedirs(os.path.dirname(version.file.path), exist_ok=True)
+        with open(version.file.path, 'wb') as fp:
+            fp.write(on_disk)
+        return version
+
+    def test_upload_digest_is_trusted_and_remembered(self):
+        version = self.version_on_disk(b'script', b'script')
+        with mock.patch('pipeline.hashing.hash_file') as hash_file:
+            self.assertTrue(version.ingest_and_verify(version.file.path))
+        hash_file.assert_not_called()
+        self.assertEqual(calculate_sha256(version.file.path), version.checksum_sha256)
+
+    def test_force_verify_rereads_and_catches_a_changed_file(self):
+        version = self.version_on_disk(b'script', b'scrip')
+        version.extra_metadata['chunk_manifest'] = []
+        self.assertFalse(version.ingest_and_verify(version.file.path, force_verify=True))
+        version.refresh_from_db()
+        self.assertIn('no coincide', version.extra_metadata['ingest_error'])
+        self.assertIsNone(Asset.objects.get(pk=self.asset.pk).checksum_sha256)
+
+    def test_sequence_with_a_checksum_still_hashes_its_frames(self):
+        version = make_version(self.asset, self.user, frame_start=1001, frame_end=1003, checksum_sha256='0' * 64)
+        version.file.name = 'tests/shot.%04d.exr'
+        os.makedirs(os.path.dirname(version.file.path), exist_ok=True)
+        for frame in (1001, 1002):
+            with open(version.file.path % frame, 'wb') as fp:
+                fp.write(exr_bytes([os.urandom(256)]))
+        self.assertFalse(version.ingest_and_verify(version.file.path))
+        self.assertEqual(version.frames.count(), 2)
+        self.assertEqual(version.frames_missing, 1)
+        self.assertIn('no coincide', version.extra_metadata['ingest_error'])
+
+
+# --- 12. Regeneración de posters: solo media y sin tocar el estado si falla ---
+class PosterRegenerationTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser('posters', password='x')
+        self.project = Project.objects.create(title='Posters', owner=self.admin)
+        self.client.force_login(self.admin)
+
+    def version(self, name, category):
+        asset = Asset.objects.create(name=name, project=self.project, category=category)
+        version = make_version(asset, self.admin)
+        Version.objects.filter(pk=version.pk).update(transcoding_status=Version.TranscodingStatus.COMPLETED)
+        return version
+
+    def test_action_skips_non_media_versions(self):
+        footage = self.version('sh010', Asset.AssetCategory.VIDEO)
+        script = self.version('tool', Asset.AssetCategory.CODE)
+        with mock.patch('pipeline.tasks.process_version_task.apply_async') as apply_async:
+            response = self.client.post(reverse('admin:pipeline_version_changelist'), {
+                'action': 'regenerate_thumbnails', '_selected_action': [footage.pk, script.pk],
+            }, follow=True)
+        self.assertEqual([c.kwargs['args'] for c in apply_async.call_args_list], [[footage.pk]])
+        self.assertIn('1 omitidas', str(list(response.context['messages'])[0]))
+
+    def test_failed_poster_keeps_a_completed_version(self):
+        footage = self.version('sh020', Asset.AssetCategory.VIDEO)
+        with mock.patch('pipeline.tasks.subprocess.run', return_value=mock.Mock(returncode=1, stderr='boom')):
+            with self.assertRaises(Exception), self.assertLogs('pipeline.tasks', 'ERROR'):
+                process_version_task(footage.pk, thumbnail_only=True)
+        footage.refresh_from_db()
+        self.assertEqual(footage.transcoding_status, Version.TranscodingStatus.COMPLETED)
+
+
+# --- 13. Scrub: coincidencia, corrupción, ausencia y lecturas cortadas por el presupuesto ---
+class ScrubTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('scrub')
+        project = Project.objects.create(title='Scrub', owner=self.user)
+        self.asset = Asset.objects.create(name='sh010', project=project)
+        # Hilos en lugar de procesos: el pool no sale del proceso del test
+        executor = mock.patch('pipeline.scrub._executor', side_effect=lambda workers: ThreadPoolExecutor(workers))
+        executor.start()
+        self.addCleanup(executor.stop)
+
+    def stored(self, content, on_disk=None):
+        version = make_version(self.asset, self.user, checksum_sha256=hashlib.sha256(content).hexdigest())
+        Version.objects.filter(pk=version.pk).update(transcoding_status=Version.TranscodingStatus.COMPLETED)
+        if on_disk is not None:
+            os.makedirs(os.path.dirname(version.file.path), exist_ok=True)
+            with open(version.file.path, 'wb') as fp:
+                fp.write(on_disk)
+        return version
+
+    def test_file_outcomes(self):
+        version = self.stored(b'plate', b'plate')
+        path, expected = version.file.path, version.checksum_sha256
+        self.assertEqual(scrub_file(path, expected)[0], SCRUB_OK)
+        self.assertEqual(scrub_file(path, 'f' * 64)[0], SCRUB_MISMATCH)
+        self.assertEqual(scrub_file(path + '.gone', expected)[0], SCRUB_MISSING)
+        self.assertEqual(scrub_file(path, expected, deadline=time.time() - 1)[0], SCRUB_DEFERRED)
+
+    def test_pass_records_failures_and_finishes(self):
+        healthy = self.stored(b'a', b'a')
+        corrupt = self.stored(b'b', b'B')
+        missing = self.stored(b'c')
+        with self.assertLogs('pipeline.scrub', 'ERROR'):
+            run = run_scrub(workers=2)
+
+        self.assertEqual(run.status, ScrubRun.RunStatus.COMPLETED)
+        self.assertEqual(run.files_checked, 3)
+        self.assertEqual({f['version']: f['status'] for f in run.failures},
+                         {corrupt.pk: SCRUB_MISMATCH, missing.pk: SCRUB_MISSING})
+        for version in (healthy, corrupt, missing):
+            version.refresh_from_db()
+            self.assertIsNotNone(version.last_verified_at)
+        self.assertNotIn('scrub_error', healthy.extra_metadata)
+        self.assertEqual(corrupt.extra_metadata['scrub_error']['status'], SCRUB_MISMATCH)
+
+    def test_interrupted_read_stays_in_the_queue(self):
+        version = self.stored(b'd', b'd')
+        with mock.patch('pipeline.scrub.hash_file_paced', side_effect=TimeoutError('presupuesto')):
+            run = run_scrub(workers=1, limit=1)
+        version.refresh_from_db()
+        self.assertIsNone(version.last_verified_at)
+        self.assertEqual((run.status, run.files_checked), (ScrubRun.RunStatus.RUNNING, 0))
+
+
+# --- 14. Drop folders: estabilidad, reentregas y reintentos ---
+@override_settings(AXIOM_DROPFOLDER_RETRY_SECONDS=300, AXIOM_DROPFOLDER_RETRY_MAX_SECONDS=3600)
+class DropFolderTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('vendor')
+        self.project = Project.objects.create(title='Drop', owner=self.user)
+        self.drop = os.path.join(self.media_root, 'drop')
+        os.makedirs(self.drop)
+
+    def watcher(self, user='vendor'):
+        rule = DropFolderRule({'path': self.drop, 'project': str(self.project.pk), 'user': user, 'department': 'COMP'})
+        return DropFolderWatcher([rule], settle_seconds=30, ignore=())
+
+    def deliver(self, name, content):
+        with open(os.path.join(self.drop, name), 'wb') as fp:
+            fp.write(content)
+
+    def age(self, **fields):
+        """Lleva el reloj de las entradas 60 s hacia atrás (cuenta atrás de estabilidad / reintento)."""
+        past = timezone.now() - timedelta(seconds=60)
+        DropFolderEntry.objects.update(**{field: past for field in fields})
+
+    def test_file_is_ingested_only_after_it_settles(self):
+        watcher = self.watcher()
+        self.deliver('sh010.bin', b'plate')
+        self.assertEqual(watcher.scan(), 1)
+        self.assertEqual(watcher.ingest_stable(), (0, 0))
+
+        # Sigue creciendo: la cuenta atrás vuelve a empezar
+        self.age(changed_at=True)
+        self.deliver('sh010.bin', b'plate-bigger')
+        self.assertEqual(watcher.ingest_stable(), (0, 0))
+        self.assertGreater(DropFolderEntry.objects.get().changed_at, timezone.now() - timedelta(seconds=30))
+
+        self.age(changed_at=True)
+        self.assertEqual(watcher.ingest_stable(), (1, 0))
+        entry = DropFolderEntry.objects.get()
+        self.assertEqual(entry.status, DropFolderEntry.EntryStatus.INGESTED)
+        self.assertEqual(entry.version.asset.name, 'sh010')
+
+    def test_redelivery_under_the_same_name_is_pending_again(self):
+        watcher = self.watcher()
+        self.deliver('sh020.bin', b'v1')
+        watcher.scan()
+        self.age(changed_at=True)
+        watcher.ingest_stable()
+
+        self.deliver('sh020.bin', b'v2-retake')
+        self.assertEqual(watcher.scan(), 1)
+        entry = DropFolderEntry.objects.get()
+        self.assertEqual((entry.status, entry.version_id, entry.size), (DropFolderEntry.EntryStatus.PENDING, None, 9))
+
+    def test_rejected_entries_back_off_then_succeed(self):
+        watcher = self.watcher(user='late')
+        self.deliver('sh030.bin', b'plate')
+        watcher.scan()
+        self.age(changed_at=True)
+        self.assertEqual(watcher.ingest_stable(), (0, 1))
+        entry = DropFolderEntry.objects.get()
+        self.assertEqual((entry.status, entry.attempts), (DropFolderEntry.EntryStatus.REJECTED, 1))
+        self.assertAlmostEqual((entry.retry_at - timezone.now()).total_seconds(), 300, delta=5)
+
+        # Antes de retry_at no se reintenta; después, la espera se duplica
+        self.assertEqual(watcher.ingest_stable(), (0, 0))
+        self.age(retry_at=True)
+        watcher.ingest_stable()
+        entry.refresh_from_db()
+        self.assertEqual(entry.attempts, 2)
+        self.assertAlmostEqual((entry.retry_at - timezone.now()).total_seconds(), 600, delta=5)
+
+        User.objects.create_user('late')
+        self.age(retry_at=True)
+        self.assertEqual(watcher.ingest_stable(), (1, 0))
+
+
+# --- 15. Subida en streaming (ASGI): tamaño máximo y hash declarado ---
+@override_settings(ALLOWED_HOSTS=['testserver'], AXIOM_STREAM_UPLOAD_MAX_BYTES=64, AXIOM_ASYNC_INGEST=True)
+class StreamingUploadTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('streamer')
+        self.token = Token.objects.create(user=self.user)
+        self.project = Project.objects.create(title='Stream', owner=self.user)
+
+    async def put(self, body, declared_size=None, **query):
+        query = {'asset_name': 'sh010', 'filename': 'plate.bin', **query}
+        scope = {
+            'type': 'http', 'method': 'PUT', 'scheme': 'http',
+            'path': f"{settings.AXIOM_STREAM_UPLOAD_PREFIX}projects/{self.project.pk}/upload/",
+            'query_string': urlencode(query).encode(),
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f"Token {self.token.key}".encode()),
+                (b'content-length', str(len(body) if declared_size is None else declared_size).encode()),
+            ],
+        }
+        # El cliente manda el cuerpo en dos mensajes
+        messages = [{'type': 'http.request', 'body': body[:32], 'more_body': True},
+                    {'type': 'http.request', 'body': body[32:], 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await StreamingUploadRouter(django_app=None)(scope, receive, send)
+        return sent[0]['status'], json.loads(sent[1]['body'])
+
+    def staged(self):
+        directory = os.path.join(settings.AXIOM_STAGING_ROOT, '.stream')
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    async def test_declared_size_over_the_limit_is_413(self):
+        status, payload = await self.put(b'x' * 10, declared_size=65)
+        self.assertEqual(status, 413)
+        self.assertIn('AXIOM_STREAM_UPLOAD_MAX_BYTES', payload['error'])
+
+    async def test_body_over_the_limit_is_413_and_leaves_no_staging(self):
+        status, _ = await self.put(b'x' * 65, declared_size=10)
+        self.assertEqual(status, 413)
+        self.assertEqual(self.staged(), [])
+
+    async def test_declared_hash_mismatch_is_400(self):
+        status, payload = await self.put(b'plate' * 10, sha256='0' * 64)
+        self.assertEqual(status, 400)
+        self.assertIn('no coincide', payload['error'])
+        self.assertEqual(self.staged(), [])
+        self.assertFalse(await Version.objects.filter(asset__project=self.project).aexists())
+
+    async def test_matching_upload_is_accepted(self):
+        body = b'plate' * 10
+        status, payload = await self.put(body, sha256=hashlib.sha256(body).hexdigest())
+        self.assertEqual(status, 202)
+        self.assertEqual(payload['checksum_sha256'], hashlib.sha256(body).hexdigest())
+        self.assertTrue(payload['status_url'].startswith('http://testserver/'))
+
+    async def test_internal_errors_are_not_leaked(self):
+        with mock.patch('pipeline.asgi_upload._open_staging', side_effect=OSError('/srv/secret/staging: disco lleno')):
+            with self.assertLogs('pipeline.asgi_upload', 'ERROR'):
+                status, payload = await self.put(b'plate')
+        self.assertEqual(status, 500)
+        self.assertNotIn('secret', payload['error'])
+
+
+# --- 16. Stills: rutas acotadas por formato ---
+class StillThumbnailTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='axiom-stills-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.thumb = os.path.join(self.directory, 'thumb.jpg')
+
+    def source(self, name, image, **options):
+        path = os.path.join(self.directory, name)
+        image.save(path, **options)
+        return path
+
+    def gradient(self, size=(2000, 1200)):
+        """Mitad izquierda roja, mitad derecha azul: una banda mal colocada se nota en el thumb."""
+        image = Image.new('RGB', size, (255, 0, 0))
+        image.paste((0, 0, 255), (size[0] // 2, 0, size[0], size[1]))
+        return image
+
+    def assert_halves(self, path):
+        with Image.open(path) as thumb:
+            self.assertLessEqual(thumb.size, THUMB_SIZE)
+            left, right = thumb.getpixel((5, thumb.height // 2)), thumb.getpixel((thumb.width - 5, thumb.height // 2))
+        self.assertGreater(left[0], 200)
+        self.assertGreater(right[2], 200)
+
+    def test_tiff_is_read_strip_by_strip(self):
+        for compression in ('raw', 'packbits', 'tiff_deflate'):
+            with self.subTest(compression=compression):
+                path = self.source(f'{compression}.tif', self.gradient(), compression=compression)
+                with mock.patch.object(TiffImagePlugin.TiffImageFile, 'load', side_effect=AssertionError('decodificación completa')):
+                    info = render_still_thumbnail(path, self.thumb)
+                self.assertEqual(info, {'method': 'tiff_strips', 'width': 2000, 'height': 1200})
+                self.assert_halves(self.thumb)
+
+    def test_jpeg_is_scaled_inside_the_decoder(self):
+        path = self.source('plate.jpg', self.gradient(), quality=95)
+        decoded = []
+        original_load = JpegImagePlugin.JpegImageFile.load
+
+        def load(image):
+            decoded.append(image.size)
+            return original_load(image)
+
+        with mock.patch.object(JpegImagePlugin.JpegImageFile, 'load', load):
+            info = render_still_thumbnail(path, self.thumb)
+        self.assertEqual(info['method'], 'jpeg_draft')
+        self.assertLess(max(decoded)[0], 2000)
+        self.assert_halves(self.thumb)
+
+    def test_full_decode_respects_the_cap_and_the_pixel_limit_is_restored(self):
+        path = self.source('plate.png', self.gradient())
+        limit = Image.MAX_IMAGE_PIXELS
+        with self.assertRaises(StillTooLarge):
+            render_still_thumbnail(path, self.thumb, max_decode_bytes=1024)
+        self.assertEqual(Image.MAX_IMAGE_PIXELS, limit)
+
+
+# --- 17. Hash por bloques: una lectura, mismo ADN que el streaming y bloques localizables ---
+class ChunkManifestTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='axiom-hash-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.data = os.urandom(CHUNK * 5 + 17)
+        self.path = os.path.join(self.directory, 'plate.bin')
+        with open(self.path, 'wb') as fp:
+            fp.write(self.data)
+
+    def test_file_and_stream_agree(self):
+        digest, manifest = hash_file_with_manifest(self.path, chunk_size=CHUNK, workers=3)
+        self.assertEqual(digest, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual(len(manifest['chunks']), 6)
+
+        hasher = ChunkedHasher(chunk_size=CHUNK)
+        for offset in range(0, len(self.data), 700):  # Bloques de red que no coinciden con los del manifiesto
+            hasher.update(self.data[offset:offset + 700])
+        self.assertEqual((hasher.hexdigest(), hasher.manifest()), (digest, manifest))
+
+    def test_verify_manifest_names_the_damaged_chunks(self):
+        _, manifest = hash_file_with_manifest(self.path, chunk_size=CHUNK)
+        self.assertEqual(verify_manifest(self.path, manifest), [])
+
+        with open(self.path, 'r+b') as fp:
+            fp.seek(CHUNK * 2 + 5)
+            fp.write(b'\0')
+        self.assertEqual(verify_manifest(self.path, manifest), [2])
+
+        os.truncate(self.path, CHUNK * 3)
+        self.assertEqual(verify_manifest(self.path, manifest), [2, 3, 4, 5])
+
+
+# --- 18. Caché de digests: un archivo sin cambios cuesta un stat() ---
+class DigestCacheTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='axiom-digest-')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.addCleanup(clear_memory_cache)
+        self.path = os.path.join(self.directory, 'plate.bin')
+        self.write(b'plate')
+
+    def write(self, content, mtime_ns=None):
+        with open(self.path, 'wb') as fp:
+            fp.write(content)
+        if mtime_ns:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_unchanged_file_is_not_reread(self):
+        digest = calculate_sha256(self.path)
+        clear_memory_cache()  # La fila FileDigest basta (otro proceso / reinicio)
+        with mock.patch('pipeline.hashing.hash_file') as hash_file:
+            self.assertEqual(calculate_sha256(self.path), digest)
+        hash_file.assert_not_called()
+
+    def test_changed_file_or_force_verify_rereads(self):
+        calculate_sha256(self.path)
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        self.write(b'PLATE', mtime_ns=mtime_ns + 1)
+        self.assertEqual(calculate_sha256(self.path), hashlib.sha256(b'PLATE').hexdigest())
+
+        # Mismos tamaño y mtime, otros bytes: solo force_verify lo detecta
+        self.write(b'place', mtime_ns=mtime_ns + 1)
+        self.assertEqual(calculate_sha256(self.path), hashlib.sha256(b'PLATE').hexdigest())
+        with self.assertLogs('pipeline.utils', 'ERROR') as logs:
+            self.assertEqual(calculate_sha256(self.path, force_verify=True), hashlib.sha256(b'place').hexdigest())
+        self.assertIn('Digest divergente', logs.output[0])
+
+
+# --- 19. Métricas: /metrics solo con token o desde la allowlist ---
+@mock.patch('pipeline.views.render_metrics', return_value=(b'', 'text/plain'))
+class MetricsAccessTests(TestCase):
+
+    def test_loopback_is_allowed_and_other_ips_are_not(self, render):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7').status_code, 403)
+
+    @override_settings(AXIOM_METRICS_TOKEN='scrape-me', AXIOM_METRICS_ALLOWED_IPS=['10.0.0.0/8'])
+    def test_bearer_token_or_allowed_network(self, render):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer scrape-me').status_code, 200)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.1.2.3', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 403)
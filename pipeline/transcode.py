@@ -0,0 +1,263 @@
+# Constructores de comandos FFmpeg de AXIOM.
+# Un solo decode del original alimenta todas las salidas (proxy, poster y renditions extra).
+# En modo segmentado, un solo decode por segmento; la escalera HLS se empaqueta con remux.
+
+import math
+import os
+
+PROXY_HEIGHT = 720
+POSTER_TIMESTAMP = 5.0  # Segundo "clásico" del poster frame
+HLS_SEGMENT_SECONDS = 4
+DEFAULT_ASPECT = 16 / 9  # Si el original no trae resolución
+
+def watermark_filter(watermark):
+    """Quemado de identidad (Asset | Depto | Versión) sobre el proxy."""
+    return (
+        f"drawtext=text='{watermark}':x=10:y=H-45:fontsize=22:"
+        f"fontcolor=white:box=1:boxcolor=black@0.4"
+    )
+
+def h264_output_args(crf=22):
+    """Parámetros de entrega del proxy (idénticos para todas las salidas MP4)."""
+    return [
+        '-c:v', 'libx264', '-preset', 'fast', '-crf', str(crf),
+        '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+        '-c:a', 'aac', '-b:a', '128k',
+    ]
+
+def poster_timestamp(duration):
+    """Poster a los 5 s; en clips más cortos usamos la mitad del clip."""
+    if duration and duration <= POSTER_TIMESTAMP:
+        return round(duration / 2, 3)
+    return POSTER_TIMESTAMP
+
+def ladder_maxrate_kbps(height, fps=None, aspect=None):
+    """Tope de bitrate de cada peldaño (~0.1 bits por píxel, con el aspecto real del original)."""
+    width = height * (aspect or DEFAULT_ASPECT)
+    return int(width * height * (fps or 24.0) * 0.1 / 1000)
+
+def hls_output_args(labels, ladder, hls_dir, fps=None, has_audio=False, aspect=None):
+    """
+    Salida HLS con segmentos fMP4 y master playlist para una escalera de proxies.
+    `labels` son las salidas del filtergraph (una por peldaño de `ladder`).
+    Los keyframes se fuerzan cada HLS_SEGMENT_SECONDS para alinear todos los peldaños.
+    `aspect` (ancho / alto del original) dimensiona el tope de bitrate de cada peldaño.
+    """
+    args = []
+    for label in labels:
+        args += ['-map', label]
+        if has_audio:
+            args += ['-map', '0:a:0?']
+
+    args += [
+        '-c:v', 'libx264', '-preset', 'fast', '-crf', '22', '-pix_fmt', 'yuv420p',
+        '-force_key_frames', f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+    ]
+    for i, height in enumerate(ladder):
+        maxrate = ladder_maxrate_kbps(height, fps, aspect)
+        args += [f'-maxrate:v:{i}', f"{maxrate}k", f'-bufsize:v:{i}', f"{maxrate * 2}k"]
+    if has_audio:
+        args += ['-c:a', 'aac', '-b:a', '128k']
+    return args + hls_muxer_args(ladder, hls_dir, has_audio)
+
+def hls_muxer_args(ladder, hls_dir, has_audio=False):
+    """Muxer HLS/fMP4 (segmentos, playlists por peldaño y master) para streams ya mapeados."""
+    stream_map = ' '.join(
+        f"v:{i},a:{i},name:{height}p" if has_audio else f"v:{i},name:{height}p"
+        for i, height in enumerate(ladder)
+    )
+    return [
+        '-f', 'hls', '-hls_time', str(HLS_SEGMENT_SECONDS), '-hls_playlist_type', 'vod',
+        '-hls_segment_type', 'fmp4', '-hls_flags', 'independent_segments',
+        '-hls_fmp4_init_filename', 'init.mp4',
+        '-master_pl_name', 'master.m3u8', '-var_stream_map', stream_map,
+        '-hls_segment_filename', os.path.join(hls_dir, '%v', 'seg_%05d.m4s'),
+        os.path.join(hls_dir, '%v', 'index.m3u8'),
+    ]
+
+def hls_rung_args(height, fps=None, aspect=None):
+    """
+    Un peldaño HLS como MP4 propio (modo segmentado): mismos parámetros que en hls_output_args,
+    con keyframes cada HLS_SEGMENT_SECONDS desde el inicio de cada segmento.
+    """
+    maxrate = ladder_maxrate_kbps(height, fps, aspect)
+    return [
+        '-c:v', 'libx264', '-preset', 'fast', '-crf', '22', '-pix_fmt', 'yuv420p',
+        '-force_key_frames', f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        '-maxrate', f"{maxrate}k", '-bufsize', f"{maxrate * 2}k",
+    ]
+
+def sprite_layout(total_frames, count, columns):
+    """
+    Rejilla del sprite sheet: un tile cada `interval` frames, como mucho `count` tiles.
+    Devuelve (interval, tiles, filas).
+    """
+    interval = max(1, math.ceil(total_frames / count))
+    tiles = math.ceil(total_frames / interval)
+    return interval, tiles, math.ceil(tiles / columns)
+
+def sprite_filter(sprite):
+    """Frames equiespaciados (por número de frame) -> miniaturas -> una sola imagen en rejilla."""
+    return (
+        f"select='not(mod(n,{sprite['interval']}))',scale={sprite['tile_width']}:-2,"
+        f"tile={sprite['columns']}x{sprite['rows']}"
+    )
+
+def sprite_output_args(sprite):
+    """Una sola imagen (JPEG o WebP según la extensión del destino)."""
+    codec = ['-c:v', 'libwebp', '-quality', '75'] if sprite['path'].endswith('.webp') else ['-q:v', '4']
+    return ['-map', '[sprite]', '-frames:v', '1', '-update', '1'] + codec + [sprite['path']]
+
+def sprite_index(sprite, tile_width, tile_height, first_frame=0):
+    """Índice del sprite: frame de origen -> posición del tile (px) dentro de la imagen."""
+    columns, interval = sprite['columns'], sprite['interval']
+    return {
+        'columns': columns, 'rows': sprite['rows'], 'tiles': sprite['tiles'], 'interval': interval,
+        'tile_width': tile_width, 'tile_height': tile_height, 'first_frame': first_frame,
+        'frames': [
+            {'frame': first_frame + i * interval, 'x': (i % columns) * tile_width, 'y': (i // columns) * tile_height}
+            for i in range(sprite['tiles'])
+        ],
+    }
+
+def build_footage_command(input_path, proxy_path, thumb_path, watermark, duration=None, renditions=(),
+                          ladder=(), hls_dir=None, fps=None, has_audio=False, aspect=None, input_args=(), sprite=None):
+    """
+    Un solo ffmpeg: decodifica el original una vez y reparte los frames (split) hacia
+    el proxy 720p, el poster frame, las renditions extra y la escalera HLS.
+    `renditions` es una lista de dicts {'path', 'height', 'crf'}; `ladder` una lista de alturas.
+    `input_args` van antes del -i (ej. -framerate / -start_number de una secuencia).
+    `sprite` (ver sprite_layout) añade el sprite sheet de scrub como una rama más.
+    """
+    branches = 2 + len(renditions) + len(ladder) + (1 if sprite else 0)
+    poster_at = poster_timestamp(duration)
+
+    labels = ''.join(f"[v{i}]" for i in range(branches))
+    graph = [
+        f"[0:v]split={branches}{labels}",
+        f"[v0]scale=-2:{PROXY_HEIGHT},{watermark_filter(watermark)}[proxy]",
+        f"[v1]trim=start={poster_at},setpts=PTS-STARTPTS[poster]",
+    ]
+    for i, rendition in enumerate(renditions, start=2):
+        graph.append(f"[v{i}]scale=-2:{rendition['height']},{watermark_filter(watermark)}[r{i}]")
+
+    ladder_labels = []
+    for i, height in enumerate(ladder, start=2 + len(renditions)):
+        graph.append(f"[v{i}]scale=-2:{height},{watermark_filter(watermark)}[h{i}]")
+        ladder_labels.append(f"[h{i}]")
+
+    if sprite:
+        graph.append(f"[v{branches - 1}]{sprite_filter(sprite)}[sprite]")
+
+    command = ['ffmpeg', '-y', *input_args, '-i', input_path, '-filter_complex', ';'.join(graph)]
+
+    # Salida 1: Proxy de revisión
+    command += ['-map', '[proxy]', '-map', '0:a:0?'] + h264_output_args() + [proxy_path]
+
+    # Salida 2: Poster frame (mismo decode, sin segundo ffmpeg)
+    command += ['-map', '[poster]', '-frames:v', '1', '-update', '1', thumb_path]
+
+    # Salidas extra (ej. 1080p para sala de proyección)
+    for i, rendition in enumerate(renditions, start=2):
+        command += ['-map', f"[r{i}]", '-map', '0:a:0?'] + h264_output_args(rendition.get('crf', 22)) + [rendition['path']]
+
+    # Sprite sheet de scrub (mismo decode)
+    if sprite:
+        command += sprite_output_args(sprite)
+
+    # Escalera adaptativa (HLS/fMP4) para revisión remota
+    if ladder:
+        command += hls_output_args(ladder_labels, ladder, hls_dir, fps=fps, has_audio=has_audio, aspect=aspect)
+
+    return command
+
+def build_sprite_command(input_path, sprite):
+    """Solo el sprite sheet (modo segmentado: se saca del proxy ya concatenado, no del original)."""
+    return ['ffmpeg', '-y', '-i', input_path, '-filter_complex', f"[0:v]{sprite_filter(sprite)}[sprite]"] + \
+        sprite_output_args(sprite)
+
+def build_hls_remux_command(rung_paths, hls_dir, ladder, has_audio=False):
+    """
+    Escalera HLS a partir de los peldaños ya encodeados del modo segmentado: solo remux
+    (-c copy), sin volver a decodificar el original. `rung_paths` va en el orden de `ladder`.
+    """
+    command = ['ffmpeg', '-y']
+    for path in rung_paths:
+        command += ['-i', path]
+    for i in range(len(rung_paths)):
+        command += ['-map', f"{i}:v:0"]
+        if has_audio:
+            command += ['-map', f"{i}:a:0?"]
+    return command + ['-c', 'copy'] + hls_muxer_args(ladder, hls_dir, has_audio)
+
+def build_poster_command(input_path, thumb_path, duration=None, input_args=()):
+    """Trabajo de solo-thumbnail: seek del lado de la entrada (no decodifica desde el inicio)."""
+    return [
+        'ffmpeg', '-y', *input_args, '-ss', str(poster_timestamp(duration)), '-i', input_path,
+        '-frames:v', '1', '-update', '1', thumb_path
+    ]
+
+# --- MODO SEGMENTADO (Footage largo repartido entre workers) ---
+
+def build_split_command(input_path, segment_pattern, segment_seconds):
+    """
+    Corta el original en segmentos sin re-encodear (-c copy): el muxer de segmentos
+    solo puede cortar en keyframes, así que cada segmento arranca en un keyframe.
+    """
+    return [
+        'ffmpeg', '-y', '-i', input_path,
+        '-map', '0:v:0', '-an', '-c', 'copy',
+        '-f', 'segment', '-segment_time', str(segment_seconds),
+        '-reset_timestamps', '1',
+        segment_pattern
+    ]
+
+def segment_variant_path(output_path, variant):
+    """Salida de una variante (rendition o peldaño HLS) de un segmento: enc_00001.<variante>.mp4."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.{variant}{ext}"
+
+def hls_rung_variant(height):
+    """Nombre de variante del peldaño HLS de `height` píxeles (ej. 'hls720p')."""
+    return f"hls{height}p"
+
+def build_segment_command(segment_path, output_path, watermark, renditions=(), ladder=(), fps=None, aspect=None):
+    """
+    Encode de un segmento con el mismo filtro y parámetros que el proxy de un solo job.
+    Como en build_footage_command, un solo decode alimenta también las renditions extra y
+    los peldaños HLS (cada uno a su MP4, ver segment_variant_path) para concatenarlos después.
+    """
+    branches = 1 + len(renditions) + len(ladder)
+    labels = ''.join(f"[v{i}]" for i in range(branches))
+    graph = [
+        f"[0:v]split={branches}{labels}",
+        f"[v0]scale=-2:{PROXY_HEIGHT},{watermark_filter(watermark)}[proxy]",
+    ]
+    outputs = ['-map', '[proxy]', '-an'] + h264_output_args() + [output_path]
+
+    for i, rendition in enumerate(renditions, start=1):
+        graph.append(f"[v{i}]scale=-2:{rendition['height']},{watermark_filter(watermark)}[r{i}]")
+        outputs += ['-map', f"[r{i}]", '-an'] + h264_output_args(rendition.get('crf', 22)) + \
+            [segment_variant_path(output_path, rendition['name'])]
+
+    for i, height in enumerate(ladder, start=1 + len(renditions)):
+        graph.append(f"[v{i}]scale=-2:{height},{watermark_filter(watermark)}[h{i}]")
+        outputs += ['-map', f"[h{i}]", '-an'] + hls_rung_args(height, fps, aspect) + \
+            [segment_variant_path(output_path, hls_rung_variant(height))]
+
+    return ['ffmpeg', '-y', '-i', segment_path, '-filter_complex', ';'.join(graph)] + outputs
+
+def build_concat_command(list_path, source_path, proxy_path):
+    """
+    Concatenación sin pérdida (-c:v copy) de los segmentos ya encodeados (proxy, rendition o peldaño).
+    El audio se toma del original en una sola pasada para evitar huecos entre segmentos.
+    """
+    return [
+        'ffmpeg', '-y',
+        '-f', 'concat', '-safe', '0', '-i', list_path,
+        '-i', source_path,
+        '-map', '0:v:0', '-map', '1:a:0?',
+        '-c:v', 'copy', '-c:a', 'aac', '-b:a', '128k',
+        '-movflags', '+faststart',
+        proxy_path
+    ]
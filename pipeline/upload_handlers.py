@@ -0,0 +1,44 @@
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+from .hashing import ChunkedHasher
+
+
+class HashingUploadMixin:
+    """
+    Calcula el ADN (SHA-256) y el tamaño del archivo mientras los bytes llegan.
+    El resultado viaja pegado al UploadedFile (sha256_checksum / checksum_size /
+    chunk_manifest) para que clean(), ingest_and_verify y el Asset no vuelvan a leer el archivo
+    (salvo AXIOM_INGEST_FORCE_VERIFY).
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Inicializamos antes del super(): MemoryFileUploadHandler lanza
+        # StopFutureHandlers desde new_file() cuando se activa.
+        self._hasher = ChunkedHasher()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        # Solo el handler que realmente guarda el archivo calcula el hash.
+        # (El de memoria se desactiva solo con archivos grandes).
+        if getattr(self, 'activated', True):
+            self._hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256_checksum = self._hasher.hexdigest()
+            uploaded.checksum_size = self._hasher.size
+            uploaded.chunk_manifest = self._hasher.manifest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    """Archivos pequeños: se quedan en RAM y se hashean al vuelo."""
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    """Archivos pesados (EXR/MOV): se escriben a disco y se hashean al vuelo."""
@@ -1,14 +1,41 @@
 from django.urls import path
 from rest_framework.authtoken.views import obtain_auth_token # <-- Importante
-from .views import dashboard_view, VersionUploadView
+from .views import (
+    dashboard_view, dashboard_stream_view, VersionUploadView, BatchPublishView, SequencePublishView,
+    UploadSessionCreateView, UploadSessionDetailView, UploadChunkView, UploadSessionCompleteView,
+    VersionStatusView,
+    ProjectListView, ProjectDetailView, AssetListView, AssetDetailView, VersionListView, VersionDetailView,
+)
 
 urlpatterns = [
     # API: Endpoint para subir versiones
     path('projects/<int:project_id>/upload/', VersionUploadView.as_view(), name='version-upload'),
     
+    # API: Publicación por lotes (manifiesto de muchos archivos en una petición)
+    path('projects/<int:project_id>/publish/batch/', BatchPublishView.as_view(), name='batch-publish'),
+    path('projects/<int:project_id>/publish/sequence/', SequencePublishView.as_view(), name='sequence-publish'),
+    
+    # API: Subida por bloques (resumible y paralela)
+    path('projects/<int:project_id>/uploads/', UploadSessionCreateView.as_view(), name='upload-session-create'),
+    path('uploads/<uuid:session_id>/', UploadSessionDetailView.as_view(), name='upload-session-detail'),
+    path('uploads/<uuid:session_id>/chunks/<int:index>/', UploadChunkView.as_view(), name='upload-chunk'),
+    path('uploads/<uuid:session_id>/complete/', UploadSessionCompleteView.as_view(), name='upload-complete'),
+    
+    # API: Estado de ingesta/procesamiento (destino del 202 asíncrono)
+    path('versions/<int:pk>/status/', VersionStatusView.as_view(), name='version-status'),
+    
+    # API: Lectura de alto volumen (cursor, ?fields= y ETag/304)
+    path('projects/', ProjectListView.as_view(), name='project-list'),
+    path('projects/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
+    path('assets/', AssetListView.as_view(), name='asset-list'),
+    path('assets/<int:pk>/', AssetDetailView.as_view(), name='asset-detail'),
+    path('versions/', VersionListView.as_view(), name='version-list'),
+    path('versions/<int:pk>/', VersionDetailView.as_view(), name='version-detail'),
+    
     # API: Endpoint para obtener tu Token (Login vía API)
     path('api-token-auth/', obtain_auth_token, name='api_token_auth'),
     
     # UI: El Medidor de Divergencia (Dashboard)
     path('dashboard/', dashboard_view, name='divergence-dashboard'),
+    path('dashboard/stream/', dashboard_stream_view, name='divergence-dashboard-stream'),
 ]
\ No newline at end of file
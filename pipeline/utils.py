@@ -1,16 +1,95 @@
-import hashlib
 import os
 import subprocess
 import json # <--- Nuevo import para leer la salida de ffprobe
+import logging
 from django.utils.text import slugify
 
-def calculate_sha256(file_path):
-    """ADN del archivo: SHA-256 por bloques."""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+from .divergence_engine import PipelineStabilityIndex
+
+logger = logging.getLogger(__name__)
+engine = PipelineStabilityIndex()
+
+def calculate_sha256(file_path, force_verify=False):
+    """
+    ADN del archivo: SHA-256 por bloques, memorizado por (device, inode, size, mtime_ns).
+    Un archivo sin cambios cuesta un stat() en lugar de releerlo entero.
+    force_verify=True ignora la caché y relee los bytes (auditorías / scrubs).
+    """
+    from .digest_cache import file_key, lookup_digest, remember_digest
+    from .hashing import hash_file
+
+    key = file_key(file_path)
+    cached = lookup_digest(key)
+    if cached and not force_verify:
+        return cached
+
+    with engine.track('hash', nbytes=key[2]):
+        digest = hash_file(file_path)
+    if cached and cached != digest:
+        # Mismo inodo, tamaño y mtime pero otros bytes: corrupción silenciosa en disco
+        logger.error(f"🧬 Digest divergente en {file_path}: caché {cached[:12]} / disco {digest[:12]}")
+
+    # Si el archivo cambió mientras lo leíamos, el digest no corresponde a ninguna identidad estable
+    if file_key(file_path) == key:
+        remember_digest(key, digest, file_path)
+    return digest
+
+def calculate_sha256_with_manifest(file_path):
+    """
+    ADN + manifiesto por bloques en una sola lectura (bloques hasheados en paralelo).
+    Siempre lee el archivo: el manifiesto necesita los bytes. El digest alimenta la caché.
+    """
+    from .digest_cache import file_key, remember_digest
+    from .hashing import hash_file_with_manifest
+
+    key = file_key(file_path)
+    with engine.track('hash', nbytes=key[2]):
+        digest, manifest = hash_file_with_manifest(file_path)
+    if file_key(file_path) == key:
+        remember_digest(key, digest, file_path)
+    return digest, manifest
+
+def remember_file_digest(file_path, digest):
+    """
+    Memoriza un digest ya calculado sobre estos bytes (ej. mientras llegaba la subida)
+    para la identidad actual del archivo, ya en su ruta definitiva. Cuesta un stat().
+    """
+    from .digest_cache import file_key, remember_digest
+
+    remember_digest(file_key(file_path), digest, file_path)
+
+def get_upload_checksum(file_obj, compute=True):
+    """
+    ADN de un archivo recién subido: (sha256, tamaño).
+    Reutiliza el digest calculado por el upload handler mientras llegaban los bytes;
+    si no existe (ej. archivo creado en código), se calcula una sola vez y se memoriza.
+    Con compute=False nunca se lee el archivo: devuelve (None, None) si no hay digest previo.
+    """
+    # FieldFile -> UploadedFile subyacente (donde el handler dejó el digest)
+    uploaded = getattr(file_obj, 'file', file_obj)
+
+    digest = getattr(uploaded, 'sha256_checksum', None)
+    if digest is None and not compute:
+        return None, None
+    if digest is None:
+        from .hashing import ChunkedHasher
+
+        hasher = ChunkedHasher()
+        file_obj.seek(0)
+        for chunk in file_obj.chunks():
+            hasher.update(chunk)
+        file_obj.seek(0)
+        digest = hasher.hexdigest()
+        uploaded.sha256_checksum = digest
+        uploaded.checksum_size = hasher.size
+        uploaded.chunk_manifest = hasher.manifest()
+
+    return digest, getattr(uploaded, 'checksum_size', None)
+
+def get_upload_manifest(file_obj):
+    """Manifiesto por bloques calculado durante la subida (o None)."""
+    uploaded = getattr(file_obj, 'file', file_obj)
+    return getattr(uploaded, 'chunk_manifest', None)
 
 def get_video_metadata(file_path):
     """Extrae metadatos técnicos usando FFprobe."""
@@ -19,7 +98,8 @@ def get_video_metadata(file_path):
         '-show_streams', '-show_format', file_path
     ]
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        with engine.track('probe'):
+            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
         data = json.loads(result.stdout)
         
         video_track = next((s for s in data['streams'] if s['codec_type'] == 'video'), None)
@@ -42,6 +122,7 @@ def get_video_metadata(file_path):
             'duration': float(data['format'].get('duration', 0)),
             'color_space': video_track.get('color_space', 'ACEScg'),
             'timecode_start': tc, # <--- ¡Aquí está!
+            'has_audio': any(s['codec_type'] == 'audio' for s in data['streams']),
         }
     except Exception as e:
         print(f"❌ Error en FFprobe: {e}")
@@ -1,27 +1,58 @@
 import os
+import hashlib
+import logging
+from asgiref.sync import sync_to_async
+from operator import attrgetter
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework import generics, status, permissions
+from rest_framework.exceptions import ValidationError as APIValidationError
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
-from .models import Project, Asset, Version, SystemHealth
-from .serializers import VersionSerializer
+from .models import Project, Asset, Version, UploadSession, UploadChunk, get_version_path
+from .serializers import (
+    ProjectSerializer, AssetSerializer, VersionSerializer, VersionStatusSerializer, UploadSessionSerializer,
+)
+from .pagination import KeysetPagination
+from .publishing import (
+    PSI_SENSOR_BY_REASON, DuplicateContent, get_category_from_extension, publish_batch, publish_sequence, read_batch_manifest,
+)
 from .divergence_engine import PipelineStabilityIndex
+from .utils import calculate_sha256
+from .hashing import build_manifest
+from .metrics import observe_upload, render_metrics, scrape_allowed
+from .telemetry import event_stream, get_snapshot, poll_message
+
+logger = logging.getLogger(__name__)
 
 # Inicializamos el motor de estabilidad
 engine = PipelineStabilityIndex()
 
-def get_category_from_extension(filename):
-    """Detecta la categoría del archivo basado en su extensión."""
-    ext = os.path.splitext(filename)[1].lower()
-    mapping = {
-        '.mp4': Asset.AssetCategory.VIDEO, '.mov': Asset.AssetCategory.VIDEO,
-        '.obj': Asset.AssetCategory.MODEL_3D, '.fbx': Asset.AssetCategory.MODEL_3D,
-        '.usd': Asset.AssetCategory.MODEL_3D, '.abc': Asset.AssetCategory.MODEL_3D,
-        '.py': Asset.AssetCategory.CODE, '.json': Asset.AssetCategory.CODE,
-    }
-    return mapping.get(ext, Asset.AssetCategory.OTHER)
+def initial_transcoding_status():
+    """Con ingesta asíncrona la Versión nace en INGESTING y Celery hace el trabajo pesado."""
+    if settings.AXIOM_ASYNC_INGEST:
+        return Version.TranscodingStatus.INGESTING
+    return Version.TranscodingStatus.PENDING
+
+def ingest_accepted_response(request, version):
+    """202: el archivo ya está persistido; el cliente consulta el status_url."""
+    status_url = request.build_absolute_uri(reverse('version-status', kwargs={'pk': version.pk}))
+    return Response({
+        "data": VersionStatusSerializer(version).data,
+        "status_url": status_url,
+        "message": f"Archivo recibido en {version.department}. Ingesta en curso."
+    }, status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
 
 # --- 1. Vista de Subida (API para Sony/DCCs) ---
 class VersionUploadView(APIView):
@@ -53,7 +84,7 @@ class VersionUploadView(APIView):
                 file=file_obj,
                 department=department,
                 uploaded_by=request.user,
-                transcoding_status=Version.TranscodingStatus.PENDING
+                transcoding_status=initial_transcoding_status()
             )
 
             # Ejecuta el clean() del modelo (Validación de SHA-256)
@@ -61,6 +92,10 @@ class VersionUploadView(APIView):
             version.save()
 
             engine.report_status('storage', success=True)
+            observe_upload('multipart', file_obj.size)
+
+            if version.transcoding_status == Version.TranscodingStatus.INGESTING:
+                return ingest_accepted_response(request, version)
 
             serializer = VersionSerializer(version)
             return Response({
@@ -72,21 +107,513 @@ class VersionUploadView(APIView):
             engine.report_status('integrity', success=False)
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-# --- 2. Vista del Dashboard (El Medidor de Divergencia) ---
+# --- 1.b Publicación por Lotes (cientos de elementos en una sola petición) ---
+class BatchPublishView(APIView):
+    """
+    Recibe un manifiesto de elementos (archivos multipart o rutas pre-subidas en staging)
+    y responde 202 con el resultado de cada uno. Un elemento rechazado no frena al resto.
+    """
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, project_id):
+        project = get_object_or_404(Project, pk=project_id)
+        try:
+            items = read_batch_manifest(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = publish_batch(project, request.user, items, request.FILES)
+
+        accepted = [r for r in results if r['status'] == 'accepted']
+        for result in accepted:
+            result['status_url'] = request.build_absolute_uri(
+                reverse('version-status', kwargs={'pk': result['version_id']})
+            )
+            observe_upload('batch', result.pop('filesize'))
+        engine.report_many(
+            [('storage', True)] * len(accepted) +
+            [(PSI_SENSOR_BY_REASON[r['reason']], False) for r in results if r.get('reason') in PSI_SENSOR_BY_REASON]
+        )
+
+        return Response({
+            "accepted": len(accepted),
+            "rejected": len(results) - len(accepted),
+            "results": results,
+        }, status=status.HTTP_202_ACCEPTED if accepted else status.HTTP_400_BAD_REQUEST)
+
+# --- 1.c Publicación de Secuencias de Imágenes (renders por frame) ---
+class SequencePublishView(APIView):
+    """
+    Publica una secuencia pre-subida en staging (patrón + rango de frames) como una
+    sola Versión. Responde 202: el hash por frame y el QC de huecos corren en Celery.
+    """
+    parser_classes = (JSONParser, FormParser)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, project_id):
+        project = get_object_or_404(Project, pk=project_id)
+        try:
+            result = publish_sequence(project, request.user, request.data)
+        except ValueError as e:
+            # Solo los duplicados SSOT cuentan para el sensor; un patrón o rango inválido no
+            if isinstance(e, DuplicateContent):
+                engine.report_status('integrity', success=False)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        engine.report_status('storage', success=True)
+        observe_upload('sequence', None)
+        result['status_url'] = request.build_absolute_uri(
+            reverse('version-status', kwargs={'pk': result['version_id']})
+        )
+        return Response(result, status=status.HTTP_202_ACCEPTED)
+
+# --- 2. Subida por Bloques (Resumible / Paralela) ---
+STREAM_BLOCK_SIZE = 1024 * 1024  # Leemos el cuerpo del PUT en bloques de 1 MB
+
+def copy_into(source_path, target_path, offset, size):
+    """Copia `source_path` dentro de `target_path` a partir de `offset` (en el kernel si se puede)."""
+    with open(source_path, 'rb') as source, open(target_path, 'r+b') as target:
+        copied = 0
+        while copied < size:
+            try:
+                step = os.copy_file_range(source.fileno(), target.fileno(), size - copied,
+                                          offset_src=copied, offset_dst=offset + copied)
+            except (AttributeError, OSError):
+                break
+            if not step:
+                break
+            copied += step
+        # Sin copy_file_range (otro SO / sistema de archivos): copia por bloques
+        source.seek(copied)
+        while copied < size:
+            block = source.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            os.pwrite(target.fileno(), block, offset + copied)
+            copied += len(block)
+
+class UploadSessionCreateView(APIView):
+    """Abre una sesión de subida: el cliente después manda bloques numerados en paralelo."""
+    parser_classes = (JSONParser, FormParser)
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, project_id):
+        project = get_object_or_404(Project, pk=project_id)
+        asset_name = request.data.get('asset_name')
+        filename = request.data.get('filename')
+
+        try:
+            total_size = int(request.data.get('total_size'))
+        except (TypeError, ValueError):
+            total_size = None
+
+        if not asset_name or not filename or total_size is None or total_size <= 0:
+            return Response(
+                {"error": "Faltan datos críticos: 'asset_name', 'filename' o 'total_size'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # El cliente propone el tamaño de bloque; el servidor lo acota
+        try:
+            chunk_size = int(request.data.get('chunk_size') or settings.AXIOM_UPLOAD_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            chunk_size = settings.AXIOM_UPLOAD_CHUNK_SIZE
+        chunk_size = max(settings.AXIOM_UPLOAD_MIN_CHUNK_SIZE, min(chunk_size, settings.AXIOM_UPLOAD_MAX_CHUNK_SIZE))
+
+        session = UploadSession.objects.create(
+            project=project,
+            asset_name=asset_name,
+            department=request.data.get('department', 'GEN'),
+            filename=os.path.basename(filename),
+            total_size=total_size,
+            chunk_size=chunk_size,
+            expected_sha256=request.data.get('sha256') or None,
+            uploaded_by=request.user,
+        )
+
+        # Pre-reservamos el archivo de staging (sparse): cada bloque cae en su offset
+        os.makedirs(os.path.dirname(session.staging_path), exist_ok=True)
+        with open(session.staging_path, 'wb') as f:
+            f.truncate(total_size)
+
+        serializer = UploadSessionSerializer(session, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """Estado de la sesión: qué bloques ya llegaron (para reanudar tras una desconexión)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, session_id):
+        session = get_object_or_404(UploadSession, uuid=session_id, uploaded_by=request.user)
+        serializer = UploadSessionSerializer(session, context={'request': request})
+        return Response(serializer.data)
+
+
+class UploadChunkView(APIView):
+    """
+    Recibe un bloque numerado (cuerpo binario crudo). Se vuelca primero a su propio
+    archivo .chunk y solo tras validar tamaño y X-Chunk-SHA256 se copia a su offset:
+    un reintento truncado o corrupto nunca pisa un bloque ya aceptado.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def put(self, request, session_id, index):
+        session = get_object_or_404(UploadSession, uuid=session_id, uploaded_by=request.user)
+        if session.status != UploadSession.SessionStatus.OPEN:
+            return Response({"error": "La sesión ya no acepta bloques."}, status=status.HTTP_409_CONFLICT)
+        if index >= session.total_chunks:
+            return Response({"error": f"Bloque fuera de rango: {index}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        expected_hash = request.headers.get('X-Chunk-SHA256', '').lower()
+        if not expected_hash:
+            return Response({"error": "Falta el header X-Chunk-SHA256"}, status=status.HTTP_400_BAD_REQUEST)
+
+        offset, expected_size = session.chunk_bounds(index)
+        stream = request.stream
+        if stream is None:
+            return Response({"error": "Bloque vacío."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Escritura en streaming a un archivo propio del bloque: nunca cargamos el bloque en RAM
+        chunk_path = session.chunk_path(index)
+        chunk_hash = hashlib.sha256()
+        written = 0
+        try:
+            with open(chunk_path, 'wb') as part:
+                while written <= expected_size:
+                    block = stream.read(STREAM_BLOCK_SIZE)
+                    if not block:
+                        break
+                    if written + len(block) > expected_size:
+                        written += len(block)
+                        break
+                    chunk_hash.update(block)
+                    part.write(block)
+                    written += len(block)
+
+            if written != expected_size:
+                return Response(
+                    {"error": f"Tamaño inválido en bloque {index}: {written} bytes (esperado: {expected_size})"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if chunk_hash.hexdigest() != expected_hash:
+                engine.report_status('integrity', success=False)
+                return Response(
+                    {"error": f"Hash inválido en bloque {index}. Reenvíalo."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Bloque válido: ahora sí se copia a su offset en el staging
+            copy_into(chunk_path, session.staging_path, offset, written)
+        finally:
+            if os.path.exists(chunk_path):
+                os.remove(chunk_path)
+
+        UploadChunk.objects.update_or_create(
+            session=session, index=index,
+            defaults={'size': written, 'checksum_sha256': expected_hash}
+        )
+        # Actividad: una subida lenta pero viva no caduca (expire_upload_sessions_task)
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now())
+        return Response({"index": index, "size": written}, status=status.HTTP_201_CREATED)
+
+
+def restore_staging(final_path, staging_path):
+    """Deshace el rename staging -> ruta final cuando el registro de la Versión falla."""
+    if final_path and os.path.exists(final_path) and not os.path.exists(staging_path):
+        try:
+            os.replace(final_path, staging_path)
+        except OSError as e:
+            logger.error(f"📦 No se pudo devolver {final_path} al staging: {e}")
+
+
+class UploadSessionCompleteView(APIView):
+    """
+    Cierra la sesión: verifica que estén todos los bloques, mueve el staging a su
+    ruta de get_version_path (rename, sin copia) y registra la Versión.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, session_id):
+        # El candado de la fila solo cubre el reclamo (OPEN -> ASSEMBLING): un segundo
+        # "complete" simultáneo ve la sesión reclamada. El hash y el rename van fuera.
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), uuid=session_id, uploaded_by=request.user
+            )
+            if session.status != UploadSession.SessionStatus.OPEN:
+                return Response({"error": "La sesión ya fue cerrada."}, status=status.HTTP_409_CONFLICT)
+
+            received = session.chunks.count()
+            if received != session.total_chunks:
+                missing = sorted(set(range(session.total_chunks)) - set(session.chunks.values_list('index', flat=True)))
+                return Response(
+                    {"error": "Faltan bloques por subir.", "missing_chunks": missing},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            session.status = UploadSession.SessionStatus.ASSEMBLING
+            session.save(update_fields=['status', 'updated_at'])
+        return self._complete(request, session)
+
+    @staticmethod
+    def _reopen(session):
+        """Fallo recuperable: la sesión vuelve a OPEN y el cliente puede reintentar el "complete"."""
+        UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.SessionStatus.ASSEMBLING
+        ).update(status=UploadSession.SessionStatus.OPEN, updated_at=timezone.now())
+
+    def _complete(self, request, session):
+        transcoding_status = initial_transcoding_status()
+        digest = None
+        if transcoding_status != Version.TranscodingStatus.INGESTING:
+            # ADN del archivo ensamblado (única lectura completa del lado del servidor),
+            # sin transacción abierta: un archivo de varios GB no retiene conexión ni candado
+            digest = calculate_sha256(session.staging_path)
+            if session.expected_sha256 and session.expected_sha256.lower() != digest:
+                engine.report_status('integrity', success=False)
+                self._reopen(session)
+                return Response(
+                    {"error": "El hash del archivo ensamblado no coincide con el declarado."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        final_path = None
+        try:
+            detected_category = get_category_from_extension(session.filename)
+            asset, _ = Asset.objects.get_or_create(
+                name=session.asset_name,
+                project=session.project,
+                defaults={'category': detected_category}
+            )
+
+            version = Version(
+                asset=asset,
+                department=session.department,
+                uploaded_by=request.user,
+                checksum_sha256=digest,
+                filesize=session.total_size,
+                transcoding_status=transcoding_status
+            )
+            # Los digests de cada bloque subido ya forman el manifiesto (sin releer nada)
+            version.extra_metadata['chunk_manifest'] = build_manifest(
+                session.chunk_size, session.chunks.order_by('index').values_list('checksum_sha256', flat=True)
+            )
+            if digest is None and session.expected_sha256:
+                # El worker de ingesta contrasta el hash declarado al calcular el real
+                version.extra_metadata['declared_sha256'] = session.expected_sha256
+            # Necesitamos el número de versión antes del save() para conocer la ruta final
+            version.assign_version_number()
+            relative_path = default_storage.get_available_name(get_version_path(version, session.filename))
+            version.file.name = relative_path
+
+            # Validación de SHA-256 (duplicados / redundancia) antes de mover el archivo
+            version.full_clean()
+
+            # La ingesta síncrona lee el archivo dentro del save(): primero el rename.
+            # Si el INSERT falla, el except lo deshace.
+            final_path = default_storage.path(relative_path)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(session.staging_path, final_path)
+
+            # Dentro de la transacción solo el INSERT y el cierre de la sesión
+            with transaction.atomic():
+                version.save()
+                session.status = UploadSession.SessionStatus.COMPLETED
+                session.version = version
+                session.save(update_fields=['status', 'version', 'updated_at'])
+
+        except ValidationError as e:
+            # Rechazo definitivo (SSOT / QC): la sesión se cierra y el staging se descarta
+            restore_staging(final_path, session.staging_path)
+            engine.report_status('integrity', success=False)
+            session.status = UploadSession.SessionStatus.FAILED
+            session.save(update_fields=['status', 'updated_at'])
+            if os.path.exists(session.staging_path):
+                os.remove(session.staging_path)
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError as e:
+            # Carrera (número de versión / checksum): la sesión vuelve a OPEN, el cliente reintenta
+            restore_staging(final_path, session.staging_path)
+            self._reopen(session)
+            return Response({"error": f"Conflicto al registrar la versión, reintenta: {e}"},
+                            status=status.HTTP_409_CONFLICT)
+        except Exception:
+            restore_staging(final_path, session.staging_path)
+            self._reopen(session)
+            logger.exception(f"📦 Upload {session.uuid}: fallo al completar")
+            return Response({"error": "Error interno al completar la subida."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        engine.report_status('storage', success=True)
+        observe_upload('chunked', session.total_size)
+
+        if version.transcoding_status == Version.TranscodingStatus.INGESTING:
+            return ingest_accepted_response(request, version)
+
+        serializer = VersionSerializer(version)
+        return Response({
+            "data": serializer.data,
+            "message": f"Ingreso exitoso en {session.department}. Hash verificado."
+        }, status=status.HTTP_201_CREATED)
+
+
+class VersionStatusView(APIView):
+    """Estado de ingesta/procesamiento de una Versión (destino del 202 asíncrono)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        version = get_object_or_404(Version.objects.select_related('asset'), pk=pk)
+        return Response(VersionStatusSerializer(version).data)
+
+
+# --- 3. Vista del Dashboard (El Medidor de Divergencia) ---
 def dashboard_view(request):
-    telemetry = engine.get_diagnostics()
-    
-    # Traemos la salud persistente de la DB (Hardware)
-    health, created = SystemHealth.objects.get_or_create(id=1)
+    # Foto compartida (PSI + salud de hardware): muchas pantallas no multiplican el cálculo
+    telemetry = get_snapshot()
     
     context = {
-        'psi': telemetry['psi_score'],
+        'psi': telemetry['psi'],
         'status': telemetry['status'],
         'world_line': telemetry['world_line'],
         'is_stable': telemetry['is_stable'],
         'sensors': telemetry['components'],
-        'health': health,
-        'divergence_index': telemetry['psi_score']
+        'stages': telemetry['stages'],
+        'health': telemetry['health'],
+        'divergence_index': telemetry['psi'],
     }
     
-    return render(request, 'pipeline/dashboard.html', context)
\ No newline at end of file
+    return render(request, 'pipeline/dashboard.html', context)
+
+async def dashboard_stream_view(request):
+    """SSE: la foto completa al conectar y después solo los cambios (bajo WSGI, short polling)."""
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    else:
+        message = await sync_to_async(poll_message)(request.headers.get('Last-Event-ID'))
+        response = HttpResponse(message, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx no debe acumular los eventos
+    return response
+
+
+# --- 4. Métricas (Prometheus) ---
+def metrics_view(request):
+    """Exposición de texto para Prometheus: web + workers (multiproceso) + estado de DB/colas/PSI."""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden("Métricas: token o IP no autorizados.")
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
+# --- 5. API de Lectura (Alto volumen: cursor, sparse fields y GET condicional) ---
+BOOLEAN_PARAM_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+class ReadAPIMixin:
+    """
+    Base de los endpoints de lectura:
+    - Filtros por query param (`?transcoding_status=ERROR,PENDING` -> __in).
+    - Paginación keyset (KeysetPagination) y `?fields=` (SparseFieldsMixin).
+    - ETag / Last-Modified calculados con (id, updated_at) de las filas servidas:
+      si el cliente ya tiene esa página responde 304 sin serializar ni transferir nada.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_params = {}  # query param -> campo del modelo
+    boolean_params = ()  # params de filter_params sobre campos booleanos
+    related_validators = ()  # relaciones (ya en select_related) cuyos campos también se serializan
+
+    def filter_queryset(self, queryset):
+        for param, field in self.filter_params.items():
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            values = value.split(',')
+            if param in self.boolean_params:
+                # BooleanField no acepta 'true' / 'false' (lo que manda cualquier cliente HTTP)
+                if any(v.lower() not in BOOLEAN_PARAM_VALUES for v in values):
+                    raise APIValidationError({param: f"Valor inválido: {value} (usa true/false o 1/0)"})
+                values = [BOOLEAN_PARAM_VALUES[v.lower()] for v in values]
+            try:
+                queryset = queryset.filter(**{f"{field}__in": values})
+            except (ValueError, ValidationError):
+                raise APIValidationError({param: f"Valor inválido: {value}"})
+        return queryset
+
+    def cache_validators(self, rows):
+        # La URL completa entra en el ETag: filtros, cursor y ?fields= cambian la representación
+        fingerprint = hashlib.sha256(self.request.get_full_path().encode())
+        last_modified = None
+        for row in rows:
+            # Renombrar un Asset cambia asset_name en sus Versiones: su updated_at entra en la huella
+            stamps = [row.updated_at] + [attrgetter(relation)(row).updated_at for relation in self.related_validators]
+            fingerprint.update(f"{row.pk}:{','.join(stamp.isoformat() for stamp in stamps)};".encode())
+            last_modified = max(stamps) if last_modified is None else max(last_modified, *stamps)
+        return quote_etag(fingerprint.hexdigest()[:32]), last_modified
+
+    def conditional_response(self, rows, build_response):
+        etag, last_modified = self.cache_validators(rows)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build_response()
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Los clientes pueden cachear, pero siempre revalidan (un 304 es casi gratis)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.conditional_response(
+            page, lambda: self.get_paginated_response(self.get_serializer(page, many=True).data)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            [instance], lambda: Response(self.get_serializer(instance).data)
+        )
+
+class ProjectListView(ReadAPIMixin, generics.ListAPIView):
+    queryset = Project.objects.all()
+    serializer_class = ProjectSerializer
+
+class ProjectDetailView(ReadAPIMixin, generics.RetrieveAPIView):
+    queryset = Project.objects.all()
+    serializer_class = ProjectSerializer
+
+class AssetListView(ReadAPIMixin, generics.ListAPIView):
+    queryset = Asset.objects.select_related('project')
+    serializer_class = AssetSerializer
+    related_validators = ('project',)
+    filter_params = {'project': 'project_id', 'category': 'category'}
+
+class AssetDetailView(ReadAPIMixin, generics.RetrieveAPIView):
+    queryset = Asset.objects.select_related('project')
+    serializer_class = AssetSerializer
+    related_validators = ('project',)
+
+class VersionListView(ReadAPIMixin, generics.ListAPIView):
+    # extra_metadata (manifiestos, errores de ingesta) no se expone: no lo traemos de la DB
+    queryset = Version.objects.select_related('asset').defer('extra_metadata')
+    serializer_class = VersionSerializer
+    related_validators = ('asset',)
+    filter_params = {
+        'project': 'asset__project_id',
+        'asset': 'asset_id',
+        'department': 'department',
+        'transcoding_status': 'transcoding_status',
+        'approval_status': 'approval_status',
+        'qc_passed': 'qc_passed',
+    }
+    boolean_params = ('qc_passed',)
+
+class VersionDetailView(ReadAPIMixin, generics.RetrieveAPIView):
+    queryset = Version.objects.select_related('asset').defer('extra_metadata')
+    serializer_class = VersionSerializer
+    related_validators = ('asset',)
@@ -1,45 +1,186 @@
-import requests
-import argparse
-import os
-
-def publish_to_axiom(video_path, asset_name, department, token, api_url):
-    # Validar que el archivo exista antes de intentar subirlo
-    if not os.path.exists(video_path):
-        print(f"❌ Error: The file '{video_path}' does not exist.")
-        return
-
-    headers = {"Authorization": f"Token {token}"}
-    payload = {
-        "asset_name": asset_name,
-        "department": department
-    }
-    
-    try:
-        with open(video_path, 'rb') as f:
-            files = {'file': f}
-            print(f"🚀 Connecting to AXIOM... \n📦 Uploading: {asset_name} [{department}]")
-            
-            response = requests.post(api_url, headers=headers, data=payload, files=files)
-        
-        if response.status_code == 201:
-            print("✅ Success! Version registered in the Pipeline.")
-            print(f"📡 Server Response: {response.json().get('message', 'File processed.')}")
-        else:
-            print(f"❌ Error {response.status_code}: {response.text}")
-            
-    except Exception as e:
-        print(f"💥 Unexpected Failure: {str(e)}")
-
-if __name__ == "__main__":
-    # Configuración de argumentos de línea de comandos
-    parser = argparse.ArgumentParser(description="AXIOM Pipeline - DCC Publish Tool")
-    
-    parser.add_argument("--file", required=True, help="Path to the video file to upload")
-    parser.add_argument("--asset", required=True, help="Name of the asset (e.g., Batman_Cape)")
-    parser.add_argument("--dept", default="COMP", help="Department (ANIM, FX, COMP, etc.)")
-    parser.add_argument("--token", required=True, help="Your AXIOM API Token")
-    parser.add_argument("--url", default="http://localhost:8000/api/projects/1/upload/", help="API Endpoint")
-
-    args = parser.parse_args()
-
-    publish_to_axiom(args.file, args.asset, args.dept, args.token, args.url)
\ No newline at end of file
+import requests
+import argparse
+import hashlib
+import json
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CHUNK_RETRIES = 3
+
+def publish_to_axiom(video_path, asset_name, department, token, api_url):
+    # Validar que el archivo exista antes de intentar subirlo
+    if not os.path.exists(video_path):
+        print(f"❌ Error: The file '{video_path}' does not exist.")
+        return
+
+    headers = {"Authorization": f"Token {token}"}
+    payload = {
+        "asset_name": asset_name,
+        "department": department
+    }
+    
+    try:
+        with open(video_path, 'rb') as f:
+            files = {'file': f}
+            print(f"🚀 Connecting to AXIOM... \n📦 Uploading: {asset_name} [{department}]")
+            
+            response = requests.post(api_url, headers=headers, data=payload, files=files)
+        
+        if response.status_code in (201, 202):
+            print("✅ Success! Version registered in the Pipeline.")
+            print(f"📡 Server Response: {response.json().get('message', 'File processed.')}")
+            if response.status_code == 202:
+                print(f"⏳ Ingest status: {response.json().get('status_url')}")
+        else:
+            print(f"❌ Error {response.status_code}: {response.text}")
+            
+    except Exception as e:
+        print(f"💥 Unexpected Failure: {str(e)}")
+
+# ==========================================
+# --- SUBIDA POR BLOQUES (Resumible) ---
+# ==========================================
+
+def _state_path(video_path):
+    """Archivo de estado junto al original: permite reanudar tras una desconexión."""
+    return f"{video_path}.axiom-upload.json"
+
+def _load_resume_state(video_path, headers):
+    """Recupera una sesión abierta previa si el archivo no cambió desde entonces."""
+    state_file = _state_path(video_path)
+    if not os.path.exists(state_file):
+        return None
+
+    with open(state_file) as f:
+        state = json.load(f)
+
+    stat = os.stat(video_path)
+    if state.get('size') != stat.st_size or state.get('mtime_ns') != stat.st_mtime_ns:
+        return None
+
+    response = requests.get(state['session_url'], headers=headers)
+    if response.status_code != 200 or response.json().get('status') != 'OPEN':
+        return None
+    return state['session_url'], response.json()
+
+def _file_sha256(video_path, block_size=8 * 1024 * 1024):
+    """ADN del archivo completo: el servidor lo contrasta con el archivo ensamblado."""
+    digest = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _upload_chunk(video_path, session, index, headers, local):
+    """Lee, hashea y sube un bloque. Cada hilo reutiliza su propia conexión HTTP."""
+    if not hasattr(local, 'http'):
+        local.http = requests.Session()
+        local.http.headers.update(headers)
+
+    offset = index * session['chunk_size']
+    with open(video_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(session['chunk_size'])
+
+    chunk_headers = {
+        'Content-Type': 'application/octet-stream',
+        'X-Chunk-SHA256': hashlib.sha256(data).hexdigest(),
+    }
+    url = session['chunk_url'].replace('{index}', str(index))
+
+    for attempt in range(1, CHUNK_RETRIES + 1):
+        try:
+            response = local.http.put(url, data=data, headers=chunk_headers)
+            if response.status_code in (200, 201):
+                return index
+            error = f"{response.status_code}: {response.text}"
+        except requests.RequestException as e:
+            error = str(e)
+        time.sleep(2 ** attempt)
+
+    raise RuntimeError(f"Chunk {index} failed after {CHUNK_RETRIES} attempts ({error})")
+
+def publish_chunked(video_path, asset_name, department, token, sessions_url, chunk_size, workers):
+    if not os.path.exists(video_path):
+        print(f"❌ Error: The file '{video_path}' does not exist.")
+        return
+
+    headers = {"Authorization": f"Token {token}"}
+    stat = os.stat(video_path)
+
+    try:
+        resumed = _load_resume_state(video_path, headers)
+        if resumed:
+            session_url, session = resumed
+            print(f"🔁 Resuming upload session {session['session_id']}")
+        else:
+            print(f"🧬 Hashing {os.path.basename(video_path)}...")
+            payload = {
+                "asset_name": asset_name,
+                "department": department,
+                "filename": os.path.basename(video_path),
+                "total_size": stat.st_size,
+                "chunk_size": chunk_size,
+                "sha256": _file_sha256(video_path),
+            }
+            response = requests.post(sessions_url, headers=headers, json=payload)
+            if response.status_code != 201:
+                print(f"❌ Error {response.status_code}: {response.text}")
+                return
+            session = response.json()
+            session_url = session['complete_url'].rsplit('complete/', 1)[0]
+
+            with open(_state_path(video_path), 'w') as f:
+                json.dump({'session_url': session_url, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, f)
+
+        pending = sorted(set(range(session['total_chunks'])) - set(session['received_chunks']))
+        print(f"🚀 Connecting to AXIOM... \n📦 Uploading: {asset_name} [{department}] "
+              f"({len(pending)}/{session['total_chunks']} chunks, {workers} workers)")
+
+        local = threading.local()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_upload_chunk, video_path, session, i, headers, local) for i in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                print(f"   ▸ {done}/{len(pending)} chunks", end='\r')
+        print()
+
+        response = requests.post(session['complete_url'], headers=headers)
+        if response.status_code in (201, 202):
+            os.remove(_state_path(video_path))
+            print("✅ Success! Version registered in the Pipeline.")
+            print(f"📡 Server Response: {response.json().get('message', 'File processed.')}")
+            if response.status_code == 202:
+                print(f"⏳ Ingest status: {response.json().get('status_url')}")
+        else:
+            print(f"❌ Error {response.status_code}: {response.text}")
+
+    except Exception as e:
+        print(f"💥 Unexpected Failure (re-run the same command to resume): {str(e)}")
+
+if __name__ == "__main__":
+    # Configuración de argumentos de línea de comandos
+    parser = argparse.ArgumentParser(description="AXIOM Pipeline - DCC Publish Tool")
+    
+    parser.add_argument("--file", required=True, help="Path to the video file to upload")
+    parser.add_argument("--asset", required=True, help="Name of the asset (e.g., Batman_Cape)")
+    parser.add_argument("--dept", default="COMP", help="Department (ANIM, FX, COMP, etc.)")
+    parser.add_argument("--token", required=True, help="Your AXIOM API Token")
+    parser.add_argument("--url", default="http://localhost:8000/api/projects/1/upload/", help="API Endpoint")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel chunk uploads")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Chunk size in MB")
+    parser.add_argument("--single", action="store_true", help="Legacy mode: upload the whole file in one POST")
+
+    args = parser.parse_args()
+
+    if args.single:
+        publish_to_axiom(args.file, args.asset, args.dept, args.token, args.url)
+    else:
+        # .../projects/<id>/upload/ -> .../projects/<id>/uploads/
+        sessions_url = args.url.rstrip('/').rsplit('/', 1)[0] + '/uploads/'
+        publish_chunked(
+            args.file, args.asset, args.dept, args.token, sessions_url,
+            args.chunk_size * 1024 * 1024, args.workers
+        )
\ No newline at end of file
@@ -5,6 +5,8 @@
 # ==========================================
 VENV_PATH="venv" 
 SESSION="axiom_pipeline"
+# Métricas Prometheus multiproceso (Django + workers escriben aquí, /metrics lo suma)
+METRICS_DIR="/tmp/axiom-metrics"
 
 echo "🧹 Limpiando procesos anteriores de AXIOM..."
 # Mata la sesión de tmux anterior si existe (silencia el error si no existe)
@@ -12,9 +14,13 @@ tmux kill-session -t $SESSION 2>/dev/null
 
 # Mata cualquier Worker o Beat rebelde que haya quedado huérfano
 pkill -f "celery -A AXIOM" 2>/dev/null
+pkill -f "manage.py watch_dropfolders" 2>/dev/null
 
 # Limpia la cola de Redis para no procesar basura vieja
 redis-cli flushall 2>/dev/null
+
+# Las métricas de procesos muertos no deben sumarse a la nueva sesión
+rm -rf "$METRICS_DIR" && mkdir -p "$METRICS_DIR"
 echo "✨ Limpieza completada. Iniciando ignición..."
 
 # ==========================================
@@ -24,7 +30,7 @@ tmux new-session -d -s $SESSION
 
 # Función para preparar cada ventana (Entrar a la carpeta y activar venv)
 prepare_window() {
-    tmux send-keys -t $SESSION:$1 "cd $(pwd) && source $VENV_PATH/bin/activate" C-m
+    tmux send-keys -t $SESSION:$1 "cd $(pwd) && source $VENV_PATH/bin/activate && export PROMETHEUS_MULTIPROC_DIR=$METRICS_DIR" C-m
 }
 
 # ==========================================
@@ -34,21 +40,47 @@ prepare_window() {
 # Ventana 0: Django
 tmux rename-window -t $SESSION:0 'Django'
 prepare_window 0
-tmux send-keys -t $SESSION:0 "python3 manage.py runserver" C-m
+tmux send-keys -t $SESSION:0 "uvicorn AXIOM.asgi:application --reload --port 8000" C-m
 
 # Ventana 1: Redis
 tmux new-window -t $SESSION:1 -n 'Redis'
 tmux send-keys -t $SESSION:1 "redis-server" C-m
 
-# Ventana 2: Worker
-tmux new-window -t $SESSION:2 -n 'Worker'
+# Ventanas 2-5: Un worker por cola (ver CELERY_TASK_QUEUES en settings.py)
+# Ingesta (IO-bound): muchas tareas concurrentes
+tmux new-window -t $SESSION:2 -n 'W-Ingest'
 prepare_window 2
-tmux send-keys -t $SESSION:2 "celery -A AXIOM worker -l info" C-m
+tmux send-keys -t $SESSION:2 "celery -A AXIOM worker -l info -Q ingest -n ingest@%h -c 8 --prefetch-multiplier 4 --soft-time-limit 1800 --time-limit 2100" C-m
 
-# Ventana 3: Beat
-tmux new-window -t $SESSION:3 -n 'Beat'
+# Transcode (CPU-bound): pocos procesos, sin reservar tareas de más
+tmux new-window -t $SESSION:3 -n 'W-Transcode'
 prepare_window 3
-tmux send-keys -t $SESSION:3 "celery -A AXIOM beat -l info" C-m
+tmux send-keys -t $SESSION:3 "celery -A AXIOM worker -l info -Q transcode -n transcode@%h -c 2 --prefetch-multiplier 1 --soft-time-limit 10800 --time-limit 11100" C-m
+
+# Stills (thumbnails/posters): trabajos cortos que nunca esperan a un encode
+tmux new-window -t $SESSION:4 -n 'W-Stills'
+prepare_window 4
+tmux send-keys -t $SESSION:4 "celery -A AXIOM worker -l info -Q stills -n stills@%h -c 4 --prefetch-multiplier 4 --max-tasks-per-child 20 --soft-time-limit 300 --time-limit 360" C-m
+
+# Housekeeping (diagnóstico SRE, limpieza)
+tmux new-window -t $SESSION:5 -n 'W-Housekeeping'
+prepare_window 5
+tmux send-keys -t $SESSION:5 "celery -A AXIOM worker -l info -Q housekeeping -n housekeeping@%h -c 1 --prefetch-multiplier 1 --soft-time-limit 600 --time-limit 900" C-m
+
+# Ventana 6: Beat
+tmux new-window -t $SESSION:6 -n 'Beat'
+prepare_window 6
+tmux send-keys -t $SESSION:6 "celery -A AXIOM beat -l info" C-m
+
+# Ventana 7: Drop folders (AXIOM_DROPFOLDERS)
+tmux new-window -t $SESSION:7 -n 'DropFolders'
+prepare_window 7
+tmux send-keys -t $SESSION:7 "python3 manage.py watch_dropfolders" C-m
+
+# Ventana 8: Scrub de integridad (worker propio: no ocupa el slot de housekeeping)
+tmux new-window -t $SESSION:8 -n 'W-Scrub'
+prepare_window 8
+tmux send-keys -t $SESSION:8 "celery -A AXIOM worker -l info -Q scrub -n scrub@%h -c 1 --prefetch-multiplier 1 --soft-time-limit 840 --time-limit 900" C-m
 
 # ==========================================
 # --- 4. CONECTAR A LA SESIÓN ---